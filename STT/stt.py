@@ -1,9 +1,12 @@
 import whisper
+import numpy as np
 from pydub import AudioSegment
 from pydub.silence import detect_silence
 import json
 from datetime import timedelta
-import os
+
+# Whisper works on 16 kHz mono float32 samples
+SAMPLE_RATE = 16000
 
 def format_timestamp(milliseconds):
     """Convert milliseconds to readable timestamp format"""
@@ -14,13 +17,68 @@ def format_timestamp(milliseconds):
     ms = td.microseconds // 1000
     return f"{hours:02d}:{minutes:02d}:{seconds:02d}.{ms:03d}"
 
+# dtype of headerless .pcm/.raw files per seperator.extract_stt_audio sample_format
+RAW_SAMPLE_FORMATS = {
+    's16': '<i2',
+    'f32': '<f4'
+}
+
+def load_audio(audio, sample_format='s16'):
+    """
+    Load audio as 16 kHz mono samples for Whisper and for silence detection
+    
+    Parameters:
+    - audio: path to an audio file (mp3, wav, etc.), a .npy or headerless
+             .pcm/.raw file from seperator.extract_stt_audio (16 kHz mono,
+             memory-mapped), or a NumPy array of 16 kHz mono samples
+             (int16, or float in [-1, 1])
+    - sample_format: sample type of a .pcm/.raw file, 's16' or 'f32' (as
+                     passed to extract_stt_audio; .npy files record it)
+    
+    Returns (samples, AudioSegment for silence detection). Samples stay
+    int16 or float32 as stored; only the AudioSegment is quantized to
+    16 bits, and only the parts that are transcribed are converted for Whisper
+    """
+    if isinstance(audio, np.ndarray):
+        samples = audio
+    elif str(audio).lower().endswith('.npy'):
+        samples = np.load(audio, mmap_mode='r')
+    elif str(audio).lower().endswith(('.pcm', '.raw')):
+        if sample_format not in RAW_SAMPLE_FORMATS:
+            raise ValueError(f"Unknown sample format '{sample_format}' (use 's16' or 'f32')")
+        samples = np.memmap(audio, dtype=RAW_SAMPLE_FORMATS[sample_format], mode='r')
+    else:
+        segment = AudioSegment.from_file(audio).set_channels(1).set_frame_rate(SAMPLE_RATE).set_sample_width(2)
+        return np.frombuffer(segment.raw_data, dtype=np.int16), segment
+    
+    if samples.dtype.kind == 'f':
+        pcm = (np.clip(samples, -1.0, 1.0) * 32767).astype(np.int16)
+    elif samples.dtype == np.int16:
+        pcm = samples
+    else:
+        raise ValueError(f"Unsupported sample type {samples.dtype} (use int16 or float)")
+    
+    segment = AudioSegment(data=pcm.tobytes(), sample_width=2, frame_rate=SAMPLE_RATE, channels=1)
+    return samples, segment
+
+def segment_samples(samples, start_ms, end_ms):
+    """float32 samples of [start_ms, end_ms) as Whisper expects them"""
+    start = start_ms * SAMPLE_RATE // 1000
+    end = end_ms * SAMPLE_RATE // 1000
+    if samples.dtype.kind == 'f':
+        return np.asarray(samples[start:end], dtype=np.float32)
+    return np.asarray(samples[start:end], dtype=np.float32) / 32768.0
+
 def transcribe_with_pauses(audio_file, model_size="base", min_silence_len=500, 
-                           silence_thresh=-45, min_segment_len=500, language=None):
+                           silence_thresh=-45, min_segment_len=500, language=None,
+                           sample_format='s16'):
     """
     Transcribe audio file with pause detection and timestamps using Whisper
     
     Parameters:
-    - audio_file: path to audio file (mp3, wav, etc.)
+    - audio_file: path to audio file (mp3, wav, etc.), .npy/.pcm file from
+                  seperator.extract_stt_audio, or 16 kHz mono NumPy array
+                  (see load_audio)
     - model_size: Whisper model size ("tiny", "base", "small", "medium", "large")
                   tiny: fastest, less accurate
                   base: good balance (recommended)
@@ -29,15 +87,17 @@ def transcribe_with_pauses(audio_file, model_size="base", min_silence_len=500,
     - silence_thresh: silence threshold in dBFS (default -45)
     - min_segment_len: minimum speech segment length in ms (default 500ms)
     - language: language code (e.g., "en", "es", "fr") or None for auto-detect
+    - sample_format: 's16' or 'f32' for a headerless .pcm/.raw file (see load_audio)
     """
     
     print(f"Loading Whisper model: {model_size}")
     model = whisper.load_model(model_size)
     
-    print(f"Loading audio file: {audio_file}")
+    print(f"Loading audio: {audio_file if not isinstance(audio_file, np.ndarray) else 'array'}")
     
-    # Load audio file
-    audio = AudioSegment.from_file(audio_file)
+    # Load audio once at Whisper's sample rate; segments are passed to
+    # Whisper as arrays, so they are not re-encoded and decoded again
+    samples, audio = load_audio(audio_file, sample_format)
     
     # Detect non-silent chunks
     print("Detecting speech segments and pauses...")
@@ -87,11 +147,7 @@ def transcribe_with_pauses(audio_file, model_size="base", min_silence_len=500,
         print(f"\nProcessing segment {idx + 1}/{len(speech_segments)} ({format_timestamp(start)} - {format_timestamp(end)})")
         
         # Extract segment
-        segment = audio[start:end]
-        
-        # Export to temporary wav
-        temp_file = "Media/temp_segment.wav"
-        segment.export(temp_file, format="wav")
+        segment = segment_samples(samples, start, end)
         
         # Transcribe with Whisper
         try:
@@ -99,7 +155,7 @@ def transcribe_with_pauses(audio_file, model_size="base", min_silence_len=500,
             if language:
                 transcribe_options["language"] = language
             
-            result = model.transcribe(temp_file, **transcribe_options)
+            result = model.transcribe(segment, **transcribe_options)
             text = result["text"].strip()
             
             results.append({
@@ -123,10 +179,6 @@ def transcribe_with_pauses(audio_file, model_size="base", min_silence_len=500,
                 "text": "[ERROR]",
                 "error": str(e)
             })
-        
-        # Clean up temp file
-        if os.path.exists(temp_file):
-            os.remove(temp_file)
     
     # Detect pauses between segments
     pauses = []
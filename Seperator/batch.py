@@ -0,0 +1,369 @@
+import argparse
+import contextlib
+import io
+import json
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+
+from Seperator import probe
+from Seperator import seperator
+
+# ============================================================================
+# BATCH PROCESSING
+# ============================================================================
+#
+#   python -m Seperator.batch season1/ --operation separate --jobs 4 --max-ffmpeg 4 --threads 2
+#   python -m Seperator.batch --manifest jobs.json --jobs 4
+#
+# Jobs run on a process pool. Each worker applies the same ffmpeg limits: a
+# semaphore shared by every worker caps the number of ffmpeg processes
+# running at once, and -threads caps the threads each of them uses. A job
+# whose outputs all exist and are newer than its inputs is skipped. Workers
+# send ffmpeg progress events back to the parent, which prints percent, speed
+# and ETA per job; an ffmpeg that stops advancing is killed after
+# stall_timeout seconds and its job fails.
+#
+# A manifest is a JSON list of jobs:
+#   [{"operation": "separate", "input": "ep1.mkv", "output_dir": "out/ep1"},
+#    {"operation": "combine", "input": "ep1_video.mp4", "audio": "ep1_de.mp3",
+#     "output": "ep1_de.mp4"}]
+# Any other keys are passed to the seperator function as keyword arguments.
+
+OPERATIONS = ('separate', 'extract_audio', 'extract_all_audio', 'extract_video', 'extract_subtitles', 'combine')
+
+# Files picked up when a directory is given (combine jobs need a manifest)
+VIDEO_EXTENSIONS = {'.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.ts', '.flv', '.wmv'}
+
+DEFAULT_STALL_TIMEOUT = 120.0
+
+# Seconds between progress lines of one job
+PROGRESS_INTERVAL = 10.0
+
+def jobs_from_directory(directory, operation='separate', output_root=None, recursive=True, **options):
+    """
+    One job per video file under a directory
+    
+    Outputs go to output_root (default: next to the inputs), keeping the
+    subdirectory layout. Files written by the jobs themselves (the outputs
+    of another job, or anything under output_root) are not picked up, so
+    running the same directory again does not process its own outputs.
+    
+    Parameters:
+    - directory: directory to scan
+    - operation: any of OPERATIONS except 'combine'
+    - output_root: where outputs are written
+    - recursive: include subdirectories
+    - options: keyword arguments passed to the seperator function
+    """
+    if operation == 'combine':
+        raise ValueError("combine jobs need a manifest (video and audio file per job)")
+    
+    output_root_abs = os.path.abspath(output_root) if output_root else None
+    jobs = []
+    for root, dirs, files in os.walk(directory):
+        dirs[:] = sorted(name for name in dirs
+                         if os.path.abspath(os.path.join(root, name)) != output_root_abs)
+        for name in sorted(files):
+            if os.path.splitext(name)[1].lower() not in VIDEO_EXTENSIONS:
+                continue
+            out_dir = os.path.join(output_root, os.path.relpath(root, directory)) if output_root else root
+            jobs.append(dict(options, operation=operation, input=os.path.join(root, name),
+                             output_dir=os.path.normpath(out_dir)))
+        if not recursive:
+            break
+    
+    outputs = set()
+    for job in jobs:
+        try:
+            outputs.update(os.path.abspath(output_file) for output_file in job_outputs(job))
+        except Exception:
+            pass
+    return [job for job in jobs if os.path.abspath(job['input']) not in outputs]
+
+def load_manifest(manifest_file):
+    """Jobs from a JSON manifest (paths are relative to the manifest)"""
+    with open(manifest_file, 'r', encoding='utf-8') as f:
+        jobs = json.load(f)
+    
+    base = os.path.dirname(os.path.abspath(manifest_file))
+    for job in jobs:
+        if job.get('operation') not in OPERATIONS:
+            raise ValueError(f"Unknown operation {job.get('operation')!r} in {manifest_file}")
+        for key in ('input', 'audio', 'output', 'output_dir'):
+            if job.get(key):
+                job[key] = os.path.join(base, job[key])
+    return jobs
+
+def job_inputs(job):
+    """Input files of a job"""
+    return [job['input']] + ([job['audio']] if job.get('audio') else [])
+
+def job_outputs(job):
+    """
+    Files a job will write, using the same names as the seperator functions
+    
+    Multi-stream operations look the streams up in the probe cache.
+    """
+    operation = job['operation']
+    input_file = job['input']
+    stem = Path(input_file).stem
+    output_dir = job.get('output_dir') or os.path.dirname(input_file)
+    audio_format = job.get('audio_format', 'mp3')
+    audio_quality = job.get('audio_quality', '192k')
+    
+    if operation == 'extract_audio':
+        return [job.get('output') or os.path.join(output_dir, f"{stem}_audio.{audio_format}")]
+    if operation == 'extract_video':
+        return [job.get('output') or os.path.join(output_dir, f"{stem}_video_only{Path(input_file).suffix}")]
+    if operation == 'combine':
+        return [job.get('output') or os.path.join(output_dir, f"{stem}_combined.mp4")]
+    
+    info = probe.probe_media(input_file)
+    with contextlib.redirect_stdout(io.StringIO()):
+        if operation == 'extract_all_audio':
+            return [output_file for _, _, output_file in seperator._audio_outputs(
+                input_file, info, output_dir, audio_format, audio_quality)]
+        if operation == 'extract_subtitles':
+            return [output_file for _, _, output_file in seperator._subtitle_outputs(input_file, info, output_dir)]
+        
+        outputs = seperator._audio_outputs(input_file, info, output_dir, audio_format, audio_quality)
+        outputs += seperator._subtitle_outputs(input_file, info, output_dir)
+        if info.video_streams:
+            outputs.append(seperator._video_output(input_file, info, output_dir,
+                                                   job.get('video_codec', 'copy')))
+    return [output_file for _, _, output_file in outputs]
+
+def is_up_to_date(job):
+    """Whether every output of a job exists and is newer than all of its inputs"""
+    try:
+        outputs = job_outputs(job)
+    except Exception:
+        return False
+    if not outputs or not all(os.path.exists(output_file) for output_file in outputs):
+        return False
+    newest_input = max(os.path.getmtime(input_file) for input_file in job_inputs(job))
+    return min(os.path.getmtime(output_file) for output_file in outputs) >= newest_input
+
+def run_job(job):
+    """Run one job with the seperator functions; returns True on success"""
+    options = {key: value for key, value in job.items()
+               if key not in ('operation', 'input', 'audio', 'output', 'output_dir')}
+    operation = job['operation']
+    input_file = job['input']
+    output_dir = job.get('output_dir')
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    
+    if operation == 'separate':
+        return bool(seperator.separate_all_streams(input_file, output_dir, **options))
+    if operation == 'extract_all_audio':
+        return bool(seperator.extract_all_audio_tracks(input_file, output_dir, **options))
+    if operation == 'extract_subtitles':
+        return bool(seperator.extract_all_subtitles(input_file, output_dir))
+    
+    output_file = job_outputs(job)[0]
+    if operation == 'extract_audio':
+        return seperator.extract_audio(input_file, output_file, **options) is not None
+    if operation == 'extract_video':
+        return seperator.extract_video_no_audio(input_file, output_file, **options) is not None
+    return seperator.combine_video_audio(input_file, job['audio'], output_file, **options) is not None
+
+# Progress queue and current job input of a pool process
+_events = None
+_current_job = None
+
+def _send_progress(event):
+    _events.put((_current_job, event))
+
+def _init_worker(slots, threads, events, stall_timeout):
+    global _events
+    _events = events
+    seperator.configure_ffmpeg(slots, threads, _send_progress if events is not None else None, stall_timeout)
+
+def _worker(job):
+    """Run a job in a pool process, capturing its output so workers do not interleave"""
+    global _current_job
+    _current_job = job['input']
+    log = io.StringIO()
+    start = time.perf_counter()
+    try:
+        with contextlib.redirect_stdout(log):
+            ok = run_job(job)
+    except Exception as e:
+        log.write(f"❌ {type(e).__name__}: {e}\n")
+        ok = False
+    return ok, time.perf_counter() - start, log.getvalue()
+
+def format_eta(seconds):
+    """Seconds as '1h02m', '3m20s' or '45s'"""
+    seconds = int(seconds)
+    if seconds >= 3600:
+        return f"{seconds // 3600}h{seconds % 3600 // 60:02d}m"
+    if seconds >= 60:
+        return f"{seconds // 60}m{seconds % 60:02d}s"
+    return f"{seconds}s"
+
+def print_progress(events, interval=PROGRESS_INTERVAL):
+    """Print job progress from worker events until None arrives"""
+    last_printed = {}
+    while True:
+        item = events.get()
+        if item is None:
+            return
+        input_file, event = item
+        now = time.monotonic()
+        if event.done or now - last_printed.get(input_file, now - interval) < interval:
+            continue
+        last_printed[input_file] = now
+        
+        status = []
+        if event.percent is not None:
+            status.append(f"{event.percent:.0f}%")
+        elif event.out_time is not None:
+            status.append(f"{format_eta(event.out_time)} written")
+        if event.speed is not None:
+            status.append(f"{event.speed:.1f}x")
+        if event.eta is not None:
+            status.append(f"ETA {format_eta(event.eta)}")
+        print(f"⏳ {input_file}: {', '.join(status) or 'starting'}")
+
+def run_batch(jobs, max_workers=None, max_ffmpeg=None, threads=None, force=False,
+              stall_timeout=DEFAULT_STALL_TIMEOUT, progress_interval=PROGRESS_INTERVAL):
+    """
+    Run jobs on a process pool
+    
+    Parameters:
+    - jobs: job dicts (see jobs_from_directory and load_manifest)
+    - max_workers: pool processes (default: CPU count)
+    - max_ffmpeg: ffmpeg processes allowed at once across all workers
+                  (default: max_workers)
+    - threads: threads per ffmpeg process (default: CPU count / max_ffmpeg)
+    - force: run jobs whose outputs are up to date as well
+    - stall_timeout: seconds without ffmpeg progress before a job is failed
+                     (None to wait forever)
+    - progress_interval: seconds between progress lines per job (None for no
+                         progress output)
+    
+    Returns dict with completed, skipped and failed inputs, wall time,
+    media hours processed and throughput
+    """
+    cpus = os.cpu_count() or 1
+    max_workers = max_workers or cpus
+    max_ffmpeg = max_ffmpeg or max_workers
+    threads = threads or max(1, cpus // max_ffmpeg)
+    
+    print(f"\n{'='*70}")
+    print("BATCH PROCESSING")
+    print(f"{'='*70}")
+    print(f"Jobs: {len(jobs)}, workers: {max_workers}, ffmpeg processes: {max_ffmpeg}, threads each: {threads}")
+    
+    pending = []
+    skipped = []
+    for job in jobs:
+        if not force and is_up_to_date(job):
+            skipped.append(job['input'])
+            print(f"⏭️  Up to date: {job['input']}")
+        else:
+            pending.append(job)
+    
+    completed = []
+    failed = []
+    media_seconds = 0.0
+    start = time.perf_counter()
+    
+    if pending:
+        context = multiprocessing.get_context()
+        slots = context.BoundedSemaphore(max_ffmpeg)
+        events = None
+        if progress_interval is not None:
+            events = context.Queue()
+            printer = threading.Thread(target=print_progress, args=(events, progress_interval), daemon=True)
+            printer.start()
+        
+        with ProcessPoolExecutor(max_workers=min(max_workers, len(pending)), mp_context=context,
+                                 initializer=_init_worker,
+                                 initargs=(slots, threads, events, stall_timeout)) as executor:
+            futures = {executor.submit(_worker, job): job for job in pending}
+            for future in as_completed(futures):
+                job = futures[future]
+                ok, elapsed, log = future.result()
+                if ok:
+                    completed.append(job['input'])
+                    try:
+                        media_seconds += probe.probe_media(job['input']).duration or 0
+                    except Exception:
+                        pass
+                    print(f"✅ {job['operation']}: {job['input']} ({elapsed:.1f}s)")
+                else:
+                    failed.append(job['input'])
+                    print(f"❌ {job['operation']}: {job['input']} ({elapsed:.1f}s)")
+                    print(log.rstrip())
+        
+        if events is not None:
+            events.put(None)
+            printer.join()
+    
+    elapsed = time.perf_counter() - start
+    hours = elapsed / 3600
+    media_hours = media_seconds / 3600
+    files_per_hour = len(completed) / hours if hours > 0 else 0.0
+    media_hours_per_hour = media_hours / hours if hours > 0 else 0.0
+    
+    print(f"\n{'='*70}")
+    print("BATCH COMPLETE")
+    print(f"{'='*70}")
+    print(f"Completed: {len(completed)}, skipped: {len(skipped)}, failed: {len(failed)}")
+    print(f"Wall time: {elapsed:.1f}s, media processed: {media_hours:.2f} h")
+    print(f"Throughput: {files_per_hour:.1f} files/h, {media_hours_per_hour:.1f} media-hours/h")
+    print("="*70)
+    
+    return {
+        'completed': completed,
+        'skipped': skipped,
+        'failed': failed,
+        'elapsed': elapsed,
+        'media_hours': media_hours,
+        'files_per_hour': files_per_hour,
+        'media_hours_per_hour': media_hours_per_hour
+    }
+
+def main():
+    parser = argparse.ArgumentParser(description="Run seperator jobs over a directory or manifest")
+    parser.add_argument('directory', nargs='?', help="directory of video files")
+    parser.add_argument('--manifest', help="JSON job list instead of a directory")
+    parser.add_argument('--operation', choices=[op for op in OPERATIONS if op != 'combine'], default='separate')
+    parser.add_argument('--output-dir', default=None, help="output root (default: next to the inputs)")
+    parser.add_argument('--no-recursive', action='store_true')
+    parser.add_argument('--audio-format', default='mp3')
+    parser.add_argument('--audio-quality', default='192k')
+    parser.add_argument('--jobs', type=int, default=None, help="worker processes")
+    parser.add_argument('--max-ffmpeg', type=int, default=None, help="ffmpeg processes at once")
+    parser.add_argument('--threads', type=int, default=None, help="threads per ffmpeg process")
+    parser.add_argument('--force', action='store_true', help="rerun up-to-date jobs")
+    parser.add_argument('--stall-timeout', type=float, default=DEFAULT_STALL_TIMEOUT,
+                        help="seconds without ffmpeg progress before a job fails (0 to disable)")
+    parser.add_argument('--progress-interval', type=float, default=PROGRESS_INTERVAL,
+                        help="seconds between progress lines per job")
+    args = parser.parse_args()
+    
+    if args.manifest:
+        jobs = load_manifest(args.manifest)
+    elif args.directory:
+        options = {}
+        if args.operation in ('separate', 'extract_audio', 'extract_all_audio'):
+            options = {'audio_format': args.audio_format, 'audio_quality': args.audio_quality}
+        jobs = jobs_from_directory(args.directory, args.operation, args.output_dir,
+                                   not args.no_recursive, **options)
+    else:
+        parser.error("give a directory or --manifest")
+    
+    results = run_batch(jobs, args.jobs, args.max_ffmpeg, args.threads, args.force,
+                        args.stall_timeout or None, args.progress_interval)
+    raise SystemExit(1 if results['failed'] else 0)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,283 @@
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import subprocess
+import tempfile
+import time
+from pathlib import Path
+
+from Seperator import seperator
+
+# ============================================================================
+# SEPARATOR BENCHMARKS
+# ============================================================================
+#
+#   python -m Seperator.bench demux --audio-tracks 4 --subtitles 2 --seconds 120
+#   python -m Seperator.bench demux --input movie.mkv
+#   python -m Seperator.bench stt-audio --seconds 600
+#   python -m Seperator.bench splice --lengths 600 2400 --edit 5
+#
+# Bytes read are the rchar counter of /proc/self/io, which includes every
+# ffmpeg/ffprobe child once it has exited (Linux only).
+
+def bytes_read():
+    """Bytes read so far by this process and its finished children (None off Linux)"""
+    try:
+        with open('/proc/self/io', 'r') as f:
+            counters = dict(line.split(': ') for line in f.read().splitlines() if line)
+    except OSError:
+        return None
+    return int(counters['rchar'])
+
+def make_multitrack_file(output_file, seconds=120, audio_tracks=4, subtitles=2):
+    """Synthetic MKV with one H.264 video, audio_tracks AAC tracks and text subtitle tracks"""
+    workdir = os.path.dirname(output_file)
+    cmd = ['ffmpeg', '-y', '-loglevel', 'error',
+           '-f', 'lavfi', '-i', f'testsrc2=size=1280x720:rate=30:duration={seconds}']
+    for track in range(audio_tracks):
+        cmd.extend(['-f', 'lavfi', '-i', f'sine=frequency={220 * (track + 1)}:duration={seconds}'])
+    
+    for track in range(subtitles):
+        srt_file = os.path.join(workdir, f"subtitle_{track}.srt")
+        with open(srt_file, 'w', encoding='utf-8') as f:
+            for n in range(seconds // 2):
+                f.write(f"{n + 1}\n00:{2 * n // 60:02d}:{2 * n % 60:02d},000 --> "
+                        f"00:{2 * n // 60:02d}:{2 * n % 60:02d},900\nLine {n} of track {track}\n\n")
+        cmd.extend(['-i', srt_file])
+    
+    for idx in range(1 + audio_tracks + subtitles):
+        cmd.extend(['-map', str(idx)])
+    cmd.extend(['-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', '-c:s', 'srt', output_file])
+    subprocess.run(cmd, check=True)
+    return output_file
+
+def separate_with_loops(input_file, output_dir, audio_format='mp3', audio_quality='192k'):
+    """
+    Old approach: one ffmpeg run per stream, finding the track count by
+    mapping increasing track numbers until ffmpeg fails
+    """
+    base_name = Path(input_file).stem
+    subprocess.run(['ffmpeg', '-i', input_file, '-an', '-vcodec', 'copy', '-y',
+                    os.path.join(output_dir, f"{base_name}_video.mp4")], capture_output=True)
+    
+    audio_args = ['-vn', '-acodec', 'libmp3lame', '-b:a', audio_quality]
+    for kind, extension, codec_args in (('a', audio_format, audio_args), ('s', 'srt', [])):
+        track_num = 0
+        while True:
+            output_file = os.path.join(output_dir, f"{base_name}_{kind}_{track_num}.{extension}")
+            cmd = ['ffmpeg', '-i', input_file, '-map', f'0:{kind}:{track_num}'] + codec_args + ['-y', output_file]
+            if subprocess.run(cmd, capture_output=True).returncode != 0:
+                break
+            track_num += 1
+
+def benchmark_demux(input_file=None, seconds=120, audio_tracks=4, subtitles=2, rounds=3):
+    """
+    Compare per-stream extraction with single-pass separate_all_streams
+    
+    Uses input_file, or a synthetic multi-track file when None. Reports the
+    best wall-clock time over rounds and the bytes read by the processes.
+    """
+    workdir = tempfile.mkdtemp(prefix="demux_bench_")
+    try:
+        if input_file is None:
+            print(f"Creating {seconds}s test file with {audio_tracks} audio and {subtitles} subtitle tracks...")
+            input_file = make_multitrack_file(os.path.join(workdir, "multitrack.mkv"),
+                                              seconds, audio_tracks, subtitles)
+        size = os.path.getsize(input_file)
+        
+        print("\n" + "="*70)
+        print("DEMUX BENCHMARK")
+        print("="*70)
+        print(f"Input: {input_file} ({size / (1024*1024):.1f} MB)")
+        print(f"{'Method':<22}{'Time (s)':>10}{'Read (MB)':>12}{'x input':>9}")
+        
+        def run(label, separate):
+            best = None
+            read = None
+            for _ in range(rounds):
+                output_dir = tempfile.mkdtemp(dir=workdir)
+                before = bytes_read()
+                start = time.perf_counter()
+                separate(output_dir)
+                elapsed = time.perf_counter() - start
+                if before is not None:
+                    read = bytes_read() - before
+                best = elapsed if best is None else min(best, elapsed)
+                shutil.rmtree(output_dir)
+            
+            read_mb = f"{read / (1024*1024):.1f}" if read is not None else "n/a"
+            ratio = f"{read / size:.1f}" if read is not None else "n/a"
+            print(f"{label:<22}{best:>10.2f}{read_mb:>12}{ratio:>9}")
+            return best, read
+        
+        legacy = run("per-stream runs", lambda output_dir: separate_with_loops(input_file, output_dir))
+        
+        def single_pass(output_dir):
+            with contextlib.redirect_stdout(io.StringIO()):
+                seperator.separate_all_streams(input_file, output_dir)
+        
+        single = run("single pass", single_pass)
+        
+        print("="*70)
+        print(f"Speedup: {legacy[0] / single[0]:.1f}x")
+        print("="*70)
+        return {'per_stream': legacy, 'single_pass': single}
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def decode_for_stt_legacy(audio_file):
+    """
+    What the STT stage did with the old extract_audio output: pydub decodes
+    the whole file, then Whisper decodes it again through ffmpeg at 16 kHz
+    """
+    from pydub import AudioSegment
+    import numpy as np
+    
+    AudioSegment.from_file(audio_file)
+    cmd = ['ffmpeg', '-nostdin', '-i', audio_file, '-f', 's16le', '-ac', '1', '-ar', '16000', '-']
+    pcm = subprocess.run(cmd, capture_output=True, check=True).stdout
+    return np.frombuffer(pcm, np.int16).astype(np.float32) / 32768.0
+
+def decode_for_stt_preset(audio_file):
+    """Same for the whisper preset output: memory-map it and convert once (as stt.load_audio)"""
+    from pydub import AudioSegment
+    import numpy as np
+    
+    samples = np.load(audio_file, mmap_mode='r')
+    AudioSegment(data=samples.tobytes(), sample_width=2, frame_rate=16000, channels=1)
+    return np.asarray(samples, dtype=np.float32) / 32768.0
+
+def benchmark_stt_audio(input_file=None, seconds=600, rounds=3):
+    """
+    Compare the old STT input (extract_audio to .wav with default settings)
+    with the whisper preset: file size, extraction time and the time the STT
+    stage spends decoding it
+    """
+    workdir = tempfile.mkdtemp(prefix="stt_audio_bench_")
+    try:
+        if input_file is None:
+            print(f"Creating {seconds}s test file...")
+            input_file = make_multitrack_file(os.path.join(workdir, "input.mkv"), seconds, 1, 0)
+        
+        legacy_file = os.path.join(workdir, "extracted_audio.wav")
+        preset_file = os.path.join(workdir, "extracted_audio.npy")
+        
+        def best_of(fn):
+            best = None
+            for _ in range(rounds):
+                start = time.perf_counter()
+                with contextlib.redirect_stdout(io.StringIO()):
+                    fn()
+                elapsed = time.perf_counter() - start
+                best = elapsed if best is None else min(best, elapsed)
+            return best
+        
+        legacy_extract = best_of(lambda: seperator.extract_audio(input_file, legacy_file))
+        preset_extract = best_of(lambda: seperator.extract_audio(input_file, preset_file, preset='whisper'))
+        legacy_decode = best_of(lambda: decode_for_stt_legacy(legacy_file))
+        preset_decode = best_of(lambda: decode_for_stt_preset(preset_file))
+        legacy_size = os.path.getsize(legacy_file)
+        preset_size = os.path.getsize(preset_file)
+        
+        print("\n" + "="*70)
+        print("STT AUDIO BENCHMARK")
+        print("="*70)
+        print(f"Input: {input_file}")
+        print(f"{'Output':<26}{'Size (MB)':>11}{'Extract (s)':>13}{'Decode (s)':>12}")
+        print(f"{'default .wav (mp3 codec)':<26}{legacy_size / (1024*1024):>11.2f}{legacy_extract:>13.2f}{legacy_decode:>12.3f}")
+        print(f"{'whisper preset .npy':<26}{preset_size / (1024*1024):>11.2f}{preset_extract:>13.2f}{preset_decode:>12.3f}")
+        print("="*70)
+        print(f"Decode speedup: {legacy_decode / preset_decode:.1f}x")
+        print("="*70)
+        return {
+            'legacy': {'size': legacy_size, 'extract': legacy_extract, 'decode': legacy_decode},
+            'preset': {'size': preset_size, 'extract': preset_extract, 'decode': preset_decode}
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def benchmark_splice(lengths=(600, 2400), edit_seconds=5, rounds=1):
+    """
+    Compare fixing edit_seconds of dub audio by re-muxing the whole film
+    (combine_video_audio with the full corrected track) with
+    splice_audio_range, for synthetic films of several lengths
+    """
+    workdir = tempfile.mkdtemp(prefix="splice_bench_")
+    try:
+        replacement = os.path.join(workdir, "replacement.wav")
+        subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-f', 'lavfi',
+                        '-i', f'sine=frequency=1000:duration={edit_seconds}', replacement], check=True)
+        
+        rows = []
+        for seconds in lengths:
+            print(f"Creating {seconds}s test film...")
+            film = os.path.join(workdir, f"film_{seconds}.mp4")
+            full_audio = os.path.join(workdir, f"film_{seconds}.wav")
+            subprocess.run(['ffmpeg', '-y', '-loglevel', 'error',
+                            '-f', 'lavfi', '-i', f'testsrc2=size=320x240:rate=25:duration={seconds}',
+                            '-f', 'lavfi', '-i', f'sine=frequency=440:duration={seconds}',
+                            '-c:v', 'libx264', '-preset', 'ultrafast', '-c:a', 'aac', film], check=True)
+            subprocess.run(['ffmpeg', '-y', '-loglevel', 'error', '-i', film, full_audio], check=True)
+            
+            def best_of(fn):
+                best = None
+                for _ in range(rounds):
+                    start = time.perf_counter()
+                    with contextlib.redirect_stdout(io.StringIO()):
+                        if fn() is None:
+                            raise RuntimeError("benchmark run failed")
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                return best
+            
+            full = best_of(lambda: seperator.combine_video_audio(
+                film, full_audio, os.path.join(workdir, "full.mp4")))
+            splice = best_of(lambda: seperator.splice_audio_range(
+                film, replacement, seconds / 2, output_file=os.path.join(workdir, "spliced.mp4")))
+            rows.append((seconds, full, splice))
+        
+        print("\n" + "="*70)
+        print(f"SPLICE BENCHMARK ({edit_seconds}s edit)")
+        print("="*70)
+        print(f"{'Film (s)':<12}{'Full re-mux (s)':>18}{'Splice (s)':>14}{'Speedup':>10}")
+        for seconds, full, splice in rows:
+            print(f"{seconds:<12}{full:>18.2f}{splice:>14.2f}{full / splice:>9.1f}x")
+        print("="*70)
+        return rows
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream separation benchmarks")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    demux_parser = subparsers.add_parser('demux', help="per-stream vs single-pass separation")
+    demux_parser.add_argument('--input', default=None, help="media file (default: synthetic multi-track MKV)")
+    demux_parser.add_argument('--seconds', type=int, default=120)
+    demux_parser.add_argument('--audio-tracks', type=int, default=4)
+    demux_parser.add_argument('--subtitles', type=int, default=2)
+    demux_parser.add_argument('--rounds', type=int, default=3)
+    
+    stt_parser = subparsers.add_parser('stt-audio', help="default audio extraction vs whisper preset")
+    stt_parser.add_argument('--input', default=None, help="media file (default: synthetic file)")
+    stt_parser.add_argument('--seconds', type=int, default=600)
+    stt_parser.add_argument('--rounds', type=int, default=3)
+    
+    splice_parser = subparsers.add_parser('splice', help="full re-mux vs audio range splice")
+    splice_parser.add_argument('--lengths', type=int, nargs='+', default=[600, 2400])
+    splice_parser.add_argument('--edit', type=float, default=5)
+    splice_parser.add_argument('--rounds', type=int, default=1)
+    
+    args = parser.parse_args()
+    
+    if args.command == 'demux':
+        benchmark_demux(args.input, args.seconds, args.audio_tracks, args.subtitles, args.rounds)
+    elif args.command == 'stt-audio':
+        benchmark_stt_audio(args.input, args.seconds, args.rounds)
+    elif args.command == 'splice':
+        benchmark_splice(args.lengths, args.edit, args.rounds)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,248 @@
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from fractions import Fraction
+
+# ============================================================================
+# MEDIA PROBING
+# ============================================================================
+#
+# ffprobe results parsed into MediaInfo objects and cached twice: in process
+# memory and on disk (one JSON file per probed file version). Entries are
+# keyed by (absolute path, size, mtime), so an edited or replaced file is
+# probed again while repeated lookups of the same file cost a stat() call.
+
+DEFAULT_PROBE_CACHE_DIR = ".probe_cache"
+
+# Extensions picked up by probe_directory
+MEDIA_EXTENSIONS = {'.mp4', '.mkv', '.mov', '.avi', '.webm', '.m4v', '.ts', '.flv', '.wmv',
+                    '.mp3', '.wav', '.m4a', '.aac', '.flac', '.ogg', '.opus'}
+
+def parse_frame_rate(value):
+    """ffprobe rate string ('30000/1001', '25') as a Fraction, or None if unset/invalid"""
+    try:
+        rate = Fraction(value)
+    except (TypeError, ValueError, ZeroDivisionError):
+        return None
+    return rate if rate > 0 else None
+
+def _number(value, kind=float):
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+class StreamInfo:
+    """One stream of a probed file"""
+    
+    def __init__(self, data):
+        self.raw = data
+        self.index = data.get('index')
+        self.codec_type = data.get('codec_type')
+        self.codec_name = data.get('codec_name')
+        self.codec_long_name = data.get('codec_long_name', data.get('codec_name'))
+        self.width = data.get('width')
+        self.height = data.get('height')
+        self.sample_rate = _number(data.get('sample_rate'), int)
+        self.channels = data.get('channels')
+        self.bit_rate = _number(data.get('bit_rate'), int)
+        self.language = data.get('tags', {}).get('language')
+        self.attached_pic = bool(data.get('disposition', {}).get('attached_pic'))
+        # r_frame_rate is the stream's base rate; avg_frame_rate covers VFR files where it is unset
+        self.frame_rate = (parse_frame_rate(data.get('r_frame_rate'))
+                           or parse_frame_rate(data.get('avg_frame_rate')))
+    
+    def __repr__(self):
+        return f"StreamInfo({self.index}, {self.codec_type}, {self.codec_name})"
+
+class MediaInfo:
+    """
+    Parsed ffprobe output of one media file
+    
+    duration is in seconds (None when the container does not say); the raw
+    ffprobe dict is kept in raw.
+    """
+    
+    def __init__(self, path, size, mtime_ns, data):
+        self.path = path
+        self.size = size
+        self.mtime_ns = mtime_ns
+        self.raw = data
+        
+        fmt = data.get('format', {})
+        self.format_name = fmt.get('format_name')
+        self.format_long_name = fmt.get('format_long_name', fmt.get('format_name'))
+        self.duration = _number(fmt.get('duration'))
+        self.bit_rate = _number(fmt.get('bit_rate'), int)
+        self.streams = [StreamInfo(stream) for stream in data.get('streams', [])]
+    
+    def streams_of_type(self, codec_type):
+        """Streams of one type in file order (cover art is not counted as video)"""
+        return [stream for stream in self.streams
+                if stream.codec_type == codec_type
+                and not (codec_type == 'video' and stream.attached_pic)]
+    
+    @property
+    def video_streams(self):
+        return self.streams_of_type('video')
+    
+    @property
+    def audio_streams(self):
+        return self.streams_of_type('audio')
+    
+    @property
+    def subtitle_streams(self):
+        return self.streams_of_type('subtitle')
+    
+    @property
+    def codecs(self):
+        """Codec name of every stream, in file order"""
+        return [stream.codec_name for stream in self.streams]
+    
+    def __repr__(self):
+        return (f"MediaInfo({self.path!r}, duration={self.duration}, "
+                f"streams={[stream.codec_type for stream in self.streams]})")
+
+def run_ffprobe(path):
+    """Raw ffprobe format and stream information as a dict"""
+    cmd = [
+        'ffprobe',
+        '-v', 'quiet',
+        '-print_format', 'json',
+        '-show_format',
+        '-show_streams',
+        path
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+class ProbeCache:
+    """
+    In-process and on-disk cache of MediaInfo keyed by (path, size, mtime)
+    
+    Disk entries are JSON files named by the hash of the key, so a changed
+    file simply misses; stale entries are left for clear() to remove.
+    """
+    
+    def __init__(self, cache_dir=DEFAULT_PROBE_CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.memory = {}
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def key(path, size, mtime_ns):
+        payload = json.dumps([path, size, mtime_ns], ensure_ascii=False)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+    
+    def entry_file(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.json")
+    
+    def get(self, path):
+        """MediaInfo of a file, probing it only if this version has not been probed before"""
+        path = os.path.abspath(path)
+        stat = os.stat(path)
+        key = self.key(path, stat.st_size, stat.st_mtime_ns)
+        
+        with self.lock:
+            if key in self.memory:
+                self.hits += 1
+                return self.memory[key]
+        
+        info = None
+        if self.cache_dir:
+            try:
+                with open(self.entry_file(key), 'r', encoding='utf-8') as f:
+                    info = MediaInfo(path, stat.st_size, stat.st_mtime_ns, json.load(f)['ffprobe'])
+            except (FileNotFoundError, json.JSONDecodeError, KeyError):
+                info = None
+        
+        if info is None:
+            info = MediaInfo(path, stat.st_size, stat.st_mtime_ns, run_ffprobe(path))
+            self._store(key, info)
+            with self.lock:
+                self.misses += 1
+        else:
+            with self.lock:
+                self.hits += 1
+        
+        with self.lock:
+            self.memory[key] = info
+        return info
+    
+    def _store(self, key, info):
+        if not self.cache_dir:
+            return
+        entry_file = self.entry_file(key)
+        os.makedirs(os.path.dirname(entry_file), exist_ok=True)
+        # mkstemp gives every thread and forked worker its own temp file
+        fd, temp_file = tempfile.mkstemp(suffix='.tmp', dir=os.path.dirname(entry_file))
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            json.dump({'path': info.path, 'size': info.size, 'mtime_ns': info.mtime_ns,
+                       'ffprobe': info.raw}, f, ensure_ascii=False)
+        os.replace(temp_file, entry_file)
+    
+    def clear(self):
+        """Drop every in-process and on-disk entry"""
+        with self.lock:
+            self.memory.clear()
+        if self.cache_dir:
+            shutil.rmtree(self.cache_dir, ignore_errors=True)
+
+_default_cache = None
+_default_cache_lock = threading.Lock()
+
+def get_probe_cache():
+    """Shared ProbeCache used by probe_media"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ProbeCache()
+        return _default_cache
+
+def probe_media(path, cache=None):
+    """
+    MediaInfo of a media file (cached, see ProbeCache)
+    
+    Raises FileNotFoundError for a missing file and
+    subprocess.CalledProcessError when ffprobe cannot read it.
+    """
+    return (cache or get_probe_cache()).get(path)
+
+def probe_many(paths, max_workers=8, cache=None):
+    """
+    Probe many files in parallel
+    
+    Returns dict mapping each path to its MediaInfo, or the exception raised
+    """
+    cache = cache or get_probe_cache()
+    
+    def run(path):
+        try:
+            return cache.get(path)
+        except Exception as e:
+            return e
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        return dict(zip(paths, executor.map(run, paths)))
+
+def probe_directory(directory, max_workers=8, recursive=True, extensions=MEDIA_EXTENSIONS, cache=None):
+    """
+    Probe every media file under a directory in parallel
+    
+    Returns dict mapping each file path to its MediaInfo, or the exception raised
+    """
+    paths = []
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        paths.extend(os.path.join(root, name) for name in sorted(files)
+                     if os.path.splitext(name)[1].lower() in extensions)
+        if not recursive:
+            break
+    return probe_many(paths, max_workers, cache)
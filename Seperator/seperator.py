@@ -1,7 +1,14 @@
+import contextlib
+import queue
+import shutil
 import subprocess
+import tempfile
+import threading
+import time
 import os
 from pathlib import Path
-import json
+
+from Seperator import probe
 
 # ============================================================================
 # UTILITY FUNCTIONS
@@ -54,35 +61,42 @@ def validate_input_file(input_file):
         return False
     return True
 
-def get_media_info(input_file):
+def probe_media_info(input_file):
     """
-    Get detailed information about media file streams
+    Get parsed information about media file streams
+    
+    Results are cached by path, size and modification time (see
+    Seperator.probe), so repeated calls on an unchanged file do not run
+    ffprobe again.
     
     Args:
         input_file (str): Path to media file
         
     Returns:
-        dict: Media information or None if error
+        probe.MediaInfo: Media information or None if error
     """
     if not validate_input_file(input_file):
         return None
     
-    cmd = [
-        'ffprobe',
-        '-v', 'quiet',
-        '-print_format', 'json',
-        '-show_format',
-        '-show_streams',
-        input_file
-    ]
-    
     try:
-        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
-        return json.loads(result.stdout)
+        return probe.probe_media(input_file)
     except Exception as e:
         print(f"❌ Error getting media info: {e}")
         return None
 
+def get_media_info(input_file):
+    """
+    Get detailed information about media file streams
+    
+    Args:
+        input_file (str): Path to media file
+        
+    Returns:
+        dict: Raw ffprobe output or None if error
+    """
+    info = probe_media_info(input_file)
+    return info.raw if info else None
+
 def print_media_info(input_file):
     """
     Print human-readable media information
@@ -90,7 +104,7 @@ def print_media_info(input_file):
     Args:
         input_file (str): Path to media file
     """
-    info = get_media_info(input_file)
+    info = probe_media_info(input_file)
     if not info:
         return
     
@@ -99,51 +113,473 @@ def print_media_info(input_file):
     print("="*70)
     
     # Format info
-    if 'format' in info:
-        fmt = info['format']
-        print(f"\nFile: {fmt.get('filename', 'Unknown')}")
-        print(f"Format: {fmt.get('format_long_name', 'Unknown')}")
-        print(f"Duration: {float(fmt.get('duration', 0)):.2f} seconds")
-        print(f"Size: {int(fmt.get('size', 0)) / (1024*1024):.2f} MB")
-        print(f"Bitrate: {int(fmt.get('bit_rate', 0)) / 1000:.0f} kbps")
+    fmt = info.raw.get('format', {})
+    print(f"\nFile: {fmt.get('filename', 'Unknown')}")
+    print(f"Format: {info.format_long_name or 'Unknown'}")
+    print(f"Duration: {info.duration or 0:.2f} seconds")
+    print(f"Size: {info.size / (1024*1024):.2f} MB")
+    print(f"Bitrate: {(info.bit_rate or 0) / 1000:.0f} kbps")
     
     # Stream info
-    if 'streams' in info:
-        video_count = 0
-        audio_count = 0
-        subtitle_count = 0
+    video_count = 0
+    audio_count = 0
+    subtitle_count = 0
+    
+    for stream in info.streams:
+        if stream.codec_type == 'video':
+            video_count += 1
+            print(f"\nVideo Stream #{video_count}:")
+            print(f"  Codec: {stream.codec_long_name or 'Unknown'}")
+            print(f"  Resolution: {stream.width or 0}x{stream.height or 0}")
+            print(f"  FPS: {float(stream.frame_rate or 0):.2f}")
+            
+        elif stream.codec_type == 'audio':
+            audio_count += 1
+            print(f"\nAudio Stream #{audio_count}:")
+            print(f"  Codec: {stream.codec_long_name or 'Unknown'}")
+            print(f"  Sample Rate: {stream.sample_rate or 'Unknown'} Hz")
+            print(f"  Channels: {stream.channels or 'Unknown'}")
+            
+        elif stream.codec_type == 'subtitle':
+            subtitle_count += 1
+            print(f"\nSubtitle Stream #{subtitle_count}:")
+            print(f"  Codec: {stream.codec_long_name or 'Unknown'}")
+    
+    print("\n" + "="*70)
+    print(f"Total: {video_count} video, {audio_count} audio, {subtitle_count} subtitle streams")
+    print("="*70)
+
+# Subtitle codecs ffmpeg can convert to SRT (bitmap subtitles such as PGS cannot be)
+TEXT_SUBTITLE_CODECS = {'subrip', 'srt', 'ass', 'ssa', 'mov_text', 'webvtt', 'text'}
+
+def _audio_codec_args(audio_format, audio_quality):
+    """ffmpeg audio encoder arguments for an output format"""
+    if audio_format == 'mp3':
+        return ['-acodec', 'libmp3lame', '-b:a', audio_quality]
+    elif audio_format == 'wav':
+        return ['-acodec', 'pcm_s16le']
+    elif audio_format == 'aac' or audio_format == 'm4a':
+        return ['-acodec', 'aac', '-b:a', audio_quality]
+    elif audio_format == 'flac':
+        return ['-acodec', 'flac']
+    elif audio_format == 'ogg':
+        return ['-acodec', 'libvorbis', '-b:a', audio_quality]
+    return ['-acodec', 'copy']
+
+def demux_streams(input_file, outputs):
+    """
+    Write several streams of a media file in a single ffmpeg run
+    
+    ffmpeg reads the input once and feeds every output from it, instead of
+    one full pass over the file per extracted stream.
+    
+    Args:
+        input_file (str): Path to media file
+        outputs (list): (stream specifier, codec args, output file) per output,
+                        e.g. ('0:a:1', ['-acodec', 'flac'], 'track_1.flac')
         
-        for stream in info['streams']:
-            codec_type = stream.get('codec_type', '')
+    Returns:
+        list: Output files written, or None if error
+    """
+    cmd = ['ffmpeg', '-y', '-i', input_file]
+    for stream_spec, codec_args, output_file in outputs:
+        cmd.extend(['-map', stream_spec] + codec_args + [output_file])
+    
+    try:
+        _run_ffmpeg(cmd, [output_file for _, _, output_file in outputs])
+        return [output_file for _, _, output_file in outputs]
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error demuxing streams: {e.stderr}")
+        return None
+
+# ============================================================================
+# FFMPEG EXECUTION
+# ============================================================================
+
+# Limits and progress reporting applied to every ffmpeg run of this process (see configure_ffmpeg)
+_ffmpeg_slots = None
+_ffmpeg_threads = None
+_ffmpeg_progress = None
+_ffmpeg_stall_timeout = None
+
+def configure_ffmpeg(slots=None, threads=None, progress=None, stall_timeout=None):
+    """
+    Limit and monitor the ffmpeg processes started by this module
+    
+    Batch workers share one semaphore, which caps the number of ffmpeg
+    processes running at once across all of them.
+    
+    Args:
+        slots: Semaphore acquired around every ffmpeg run (None for no limit)
+        threads (int): Threads per ffmpeg decoder, encoder and filter graph (None for ffmpeg's default)
+        progress (callable): Called with a ProgressEvent about twice a second while ffmpeg runs
+        stall_timeout (float): Kill ffmpeg when its output position has not
+                               advanced for this many seconds (None to wait forever)
+    """
+    global _ffmpeg_slots, _ffmpeg_threads, _ffmpeg_progress, _ffmpeg_stall_timeout
+    _ffmpeg_slots = slots
+    _ffmpeg_threads = threads
+    _ffmpeg_progress = progress
+    _ffmpeg_stall_timeout = stall_timeout
+
+# Keys of ffmpeg's -progress output (plus a stream_<file>_<stream>_q quality key per video output)
+PROGRESS_KEYS = {'frame', 'fps', 'bitrate', 'total_size', 'out_time_us', 'out_time_ms', 'out_time',
+                 'dup_frames', 'drop_frames', 'speed', 'progress'}
+
+def _progress_number(value, kind=float):
+    """Number from a -progress field ('N/A' and missing values are None)"""
+    try:
+        return kind(value)
+    except (TypeError, ValueError):
+        return None
+
+class ProgressEvent:
+    """
+    One progress report of a running ffmpeg
+    
+    Attributes:
+        out_time (float): Seconds of output written so far
+        speed (float): Processing speed as a multiple of real time
+        bitrate (float): Output bitrate in kbit/s
+        frame (int): Video frames written (None for audio-only outputs)
+        fps (float): Video frames written per second
+        total_size (int): Output bytes written
+        done (bool): True for the final report
+        duration (float): Input duration in seconds, None if unknown
+        elapsed (float): Wall-clock seconds since ffmpeg started
+    """
+    
+    def __init__(self, fields, duration=None, elapsed=0.0):
+        self.frame = _progress_number(fields.get('frame'), int)
+        self.fps = _progress_number(fields.get('fps'))
+        self.bitrate = _progress_number(fields.get('bitrate', '').replace('kbits/s', ''))
+        self.total_size = _progress_number(fields.get('total_size'), int)
+        # out_time_ms is in microseconds as well (an old ffmpeg naming mistake)
+        out_time_us = _progress_number(fields.get('out_time_us', fields.get('out_time_ms')), int)
+        self.out_time = out_time_us / 1000000 if out_time_us is not None else None
+        self.speed = _progress_number(fields.get('speed', '').rstrip('x'))
+        self.done = fields.get('progress') == 'end'
+        self.duration = duration
+        self.elapsed = elapsed
+    
+    @property
+    def percent(self):
+        """Share of the input processed (0-100), None if the duration is unknown"""
+        if not self.duration or self.out_time is None:
+            return None
+        return min(100.0, max(0.0, 100.0 * self.out_time / self.duration))
+    
+    @property
+    def eta(self):
+        """Estimated wall-clock seconds left, None if unknown"""
+        if self.done:
+            return 0.0
+        if not self.duration or not self.out_time or self.elapsed <= 0:
+            return None
+        return max(0.0, (self.duration - self.out_time) * self.elapsed / self.out_time)
+    
+    def __repr__(self):
+        return (f"ProgressEvent(out_time={self.out_time}, speed={self.speed}, "
+                f"bitrate={self.bitrate}, frame={self.frame}, done={self.done})")
+
+class FFmpegStalledError(subprocess.CalledProcessError):
+    """Raised when ffmpeg is killed because its output position stopped advancing"""
+
+def iter_ffmpeg_progress(cmd, duration=None, stdout=None, stall_timeout=None, output_files=None):
+    """
+    Run an ffmpeg command and yield its progress as it runs
+    
+    ffmpeg reports through -progress on stderr; its log is reduced to error
+    messages, which become the stderr of the exception on failure. ffmpeg
+    can exit 0 without writing an output (e.g. when it cannot open an
+    input), so output_files are checked after the run as well.
+    
+    Args:
+        cmd (list): ffmpeg command
+        duration (float, optional): Input duration for percent and ETA
+        stdout (file, optional): Open file that receives a pipe:1 output
+        stall_timeout (float, optional): Kill ffmpeg when its output position
+                                         has not advanced for this many seconds
+        output_files (list, optional): Files that must exist and be non-empty afterwards
+        
+    Yields:
+        ProgressEvent: About twice a second, and once at the end
+        
+    Raises:
+        subprocess.CalledProcessError: ffmpeg failed or left an output missing or empty
+        FFmpegStalledError: ffmpeg stalled and was killed
+    """
+    cmd = [cmd[0], '-nostats', '-loglevel', 'error', '-progress', 'pipe:2'] + cmd[1:]
+    process = subprocess.Popen(cmd, stdin=subprocess.DEVNULL,
+                               stdout=stdout if stdout is not None else subprocess.DEVNULL,
+                               stderr=subprocess.PIPE, text=True)
+    
+    # stderr is read on a thread so a silent ffmpeg does not block the stall check
+    lines = queue.Queue()
+    
+    def read_stderr():
+        for line in process.stderr:
+            lines.put(line)
+        lines.put(None)
+    
+    threading.Thread(target=read_stderr, daemon=True).start()
+    
+    start = time.monotonic()
+    last_advance = start
+    last_out_time = None
+    fields = {}
+    errors = []
+    
+    try:
+        while True:
+            try:
+                line = lines.get(timeout=1.0)
+            except queue.Empty:
+                line = ''
+            if line is None:
+                break
             
-            if codec_type == 'video':
-                video_count += 1
-                print(f"\nVideo Stream #{video_count}:")
-                print(f"  Codec: {stream.get('codec_long_name', 'Unknown')}")
-                print(f"  Resolution: {stream.get('width', 0)}x{stream.get('height', 0)}")
-                print(f"  FPS: {eval(stream.get('r_frame_rate', '0/1')):.2f}")
-                
-            elif codec_type == 'audio':
-                audio_count += 1
-                print(f"\nAudio Stream #{audio_count}:")
-                print(f"  Codec: {stream.get('codec_long_name', 'Unknown')}")
-                print(f"  Sample Rate: {stream.get('sample_rate', 'Unknown')} Hz")
-                print(f"  Channels: {stream.get('channels', 'Unknown')}")
-                
-            elif codec_type == 'subtitle':
-                subtitle_count += 1
-                print(f"\nSubtitle Stream #{subtitle_count}:")
-                print(f"  Codec: {stream.get('codec_long_name', 'Unknown')}")
-        
-        print("\n" + "="*70)
-        print(f"Total: {video_count} video, {audio_count} audio, {subtitle_count} subtitle streams")
-        print("="*70)
+            now = time.monotonic()
+            if stall_timeout and now - last_advance > stall_timeout:
+                process.kill()
+                process.wait()
+                raise FFmpegStalledError(process.returncode, cmd,
+                                         stderr=f"ffmpeg made no progress for {stall_timeout:.0f}s\n" + ''.join(errors))
+            
+            key, separator, value = line.strip().partition('=')
+            if separator and (key in PROGRESS_KEYS or (key.startswith('stream_') and key.endswith('_q'))):
+                fields[key] = value
+                if key == 'progress':
+                    event = ProgressEvent(fields, duration, now - start)
+                    if event.out_time is not None and event.out_time != last_out_time:
+                        last_out_time = event.out_time
+                        last_advance = now
+                    fields = {}
+                    yield event
+            elif line:
+                errors.append(line)
+        
+        returncode = process.wait()
+    finally:
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        process.stderr.close()
+    
+    if returncode != 0:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=''.join(errors))
+    
+    missing = [output_file for output_file in output_files or []
+               if not os.path.isfile(output_file) or os.path.getsize(output_file) == 0]
+    if missing:
+        raise subprocess.CalledProcessError(returncode, cmd, stderr=''.join(errors) +
+                                            f"Missing or empty output: {', '.join(missing)}\n")
+
+def _input_duration(cmd):
+    """Duration of the first input of an ffmpeg command (probe cache), None if unknown"""
+    if '-i' not in cmd:
+        return None
+    input_file = cmd[cmd.index('-i') + 1]
+    # Pipes, devices and URLs are not probed (ffprobe would block on them)
+    if not os.path.isfile(input_file):
+        return None
+    try:
+        return probe.probe_media(input_file).duration
+    except Exception:
+        return None
+
+def _run_ffmpeg(cmd, output_files=None, stdout=None):
+    """
+    Run an ffmpeg command within the configure_ffmpeg limits
+    
+    -threads applies per input and per output, so it is inserted before
+    every -i and before every output file (the last argument unless
+    output_files are given). output_files must exist and be non-empty
+    after the run. stdout is an open file that receives a pipe:1 output.
+    Progress goes to the configured callback.
+    
+    Raises subprocess.CalledProcessError (FFmpegStalledError when stalled).
+    """
+    if _ffmpeg_threads:
+        threads = str(_ffmpeg_threads)
+        output_args = set(output_files or [cmd[-1]])
+        limited = [cmd[0], '-filter_threads', threads]
+        for arg in cmd[1:]:
+            if arg == '-i' or arg in output_args:
+                limited.extend(['-threads', threads])
+            limited.append(arg)
+        cmd = limited
+    
+    duration = _input_duration(cmd) if _ffmpeg_progress else None
+    
+    with _ffmpeg_slots or contextlib.nullcontext():
+        for event in iter_ffmpeg_progress(cmd, duration, stdout, _ffmpeg_stall_timeout, output_files):
+            if _ffmpeg_progress:
+                _ffmpeg_progress(event)
+
+# ============================================================================
+# TIME RANGES
+# ============================================================================
+
+def parse_timestamp(value):
+    """
+    Seconds from a timestamp
+    
+    Args:
+        value: Seconds (int/float) or 'HH:MM:SS(.mmm)', 'MM:SS(.mmm)' or 'SS(.mmm)'
+               (a comma works as decimal separator, as in SRT)
+        
+    Returns:
+        float: Seconds
+        
+    Raises:
+        ValueError: value is not a valid timestamp
+    """
+    if isinstance(value, (int, float)):
+        seconds = float(value)
+    else:
+        parts = str(value).strip().replace(',', '.').split(':')
+        if len(parts) > 3:
+            raise ValueError(f"Invalid timestamp: {value!r}")
+        seconds = 0.0
+        for part in parts:
+            seconds = seconds * 60 + float(part)
+    if seconds < 0:
+        raise ValueError(f"Negative timestamp: {value!r}")
+    return seconds
+
+def _range_args(start=None, end=None):
+    """
+    ffmpeg arguments for a time range: (input options, output options)
+    
+    -ss goes before -i, so ffmpeg seeks in the input instead of decoding
+    everything up to start.
+    """
+    input_args = []
+    output_args = []
+    start = parse_timestamp(start) if start is not None else 0.0
+    if start > 0:
+        input_args = ['-ss', f'{start:.6f}']
+    if end is not None:
+        end = parse_timestamp(end)
+        if end <= start:
+            raise ValueError(f"Range end {end} is not after start {start}")
+        output_args = ['-t', f'{end - start:.6f}']
+    return input_args, output_args
+
+def packet_times(input_file, stream_spec, around, keyframes_only=False, window=10.0):
+    """
+    Packet timestamps of one stream near a point in time
+    
+    Only the packets within window seconds of around are read (the window
+    grows until it contains a match), not the whole file.
+    
+    Args:
+        input_file (str): Path to media file
+        stream_spec (str): ffprobe stream specifier, e.g. 'a:0' or 'v:0'
+        around (float): Seconds
+        keyframes_only (bool): Only packets flagged as keyframes (GOP starts)
+        window (float): Initial search window in seconds
+        
+    Returns:
+        list: Sorted packet start times in seconds
+    """
+    duration = None
+    while True:
+        cmd = [
+            'ffprobe',
+            '-v', 'error',
+            '-select_streams', stream_spec,
+            '-read_intervals', f'{max(0.0, around - window):.6f}%{around + window:.6f}',
+            '-show_entries', 'packet=pts_time,flags',
+            '-of', 'csv=p=0',
+            input_file
+        ]
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        
+        times = []
+        for line in result.stdout.splitlines():
+            pts_time, _, flags = line.partition(',')
+            if pts_time in ('', 'N/A') or (keyframes_only and 'K' not in flags):
+                continue
+            times.append(float(pts_time))
+        times.sort()
+        
+        # Done once the window holds a packet on each side of around, or covers the whole file
+        if times and times[0] <= around <= times[-1]:
+            return times
+        if duration is None:
+            duration = probe.probe_media(input_file).duration or 0.0
+        if around - window <= 0 and around + window >= duration:
+            return times
+        window *= 4
+
+def _first_packet_time(input_file, stream_spec):
+    """
+    Timestamp of the first packet of a stream (negative for AAC and MP3
+    encoder delay, which start_time already hides)
+    """
+    cmd = ['ffprobe', '-v', 'error', '-select_streams', stream_spec, '-read_intervals', '%+#1',
+           '-show_entries', 'packet=pts_time', '-of', 'csv=p=0', input_file]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    for line in result.stdout.splitlines():
+        pts_time = line.strip().rstrip(',')
+        if pts_time not in ('', 'N/A'):
+            return float(pts_time)
+    return 0.0
+
+def frame_count(input_file, start, end):
+    """
+    Number of packets of the first video stream shown in [start, end)
+    
+    Limiting a stream copy that starts at a keyframe to this many packets
+    ends it right before the frame at end, whatever the reordering delay
+    (-t is checked against decode timestamps, so B-frames let the keyframe
+    at end and frames after it through).
+    
+    Returns:
+        int: Packet count
+    """
+    cmd = [
+        'ffprobe',
+        '-v', 'error',
+        '-select_streams', 'v:0',
+        '-read_intervals', f'{start:.6f}%{end + 1.0:.6f}',
+        '-show_entries', 'packet=pts_time',
+        '-of', 'csv=p=0',
+        input_file
+    ]
+    result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+    times = [float(line.strip().rstrip(',')) for line in result.stdout.splitlines()
+             if line.strip().rstrip(',') not in ('', 'N/A')]
+    return sum(start <= t < end for t in times)
+
+def keyframe_range(input_file, start, end=None):
+    """
+    GOP-aligned bounds of a time range of the first video stream
+    
+    Stream copy can only cut a video at keyframes, so a copied range starts
+    at the last keyframe at or before start and ends at the first keyframe
+    at or after end.
+    
+    Returns:
+        tuple: (start, end) in seconds; end is None when no keyframe follows
+               (or no end was given)
+    """
+    start = parse_timestamp(start)
+    before = [t for t in packet_times(input_file, 'v:0', start, keyframes_only=True) if t <= start]
+    if end is None:
+        return (before[-1] if before else 0.0), None
+    end = parse_timestamp(end)
+    after = [t for t in packet_times(input_file, 'v:0', end, keyframes_only=True) if t >= end]
+    return (before[-1] if before else 0.0), (after[0] if after else None)
 
 # ============================================================================
 # AUDIO EXTRACTION FUNCTIONS
 # ============================================================================
 
-def extract_audio(input_file, output_audio=None, audio_format='mp3', audio_quality='192k'):
+def extract_audio(input_file, output_audio=None, audio_format='mp3', audio_quality='192k', preset=None,
+                  start=None, end=None):
     """
     Extract audio stream from video file
     
@@ -152,10 +588,21 @@ def extract_audio(input_file, output_audio=None, audio_format='mp3', audio_quali
         output_audio (str, optional): Output audio file path. Auto-generated if None
         audio_format (str): Output format ('mp3', 'wav', 'aac', 'flac', 'ogg', 'm4a')
         audio_quality (str): Bitrate for lossy formats ('128k', '192k', '256k', '320k')
+        preset (str, optional): 'whisper' writes 16 kHz mono PCM for the STT
+                                stage instead (see extract_stt_audio)
+        start, end (optional): Only extract this time range (seconds or
+                               'HH:MM:SS.mmm'); the input is seeked, not decoded
+                               up to start
         
     Returns:
         str: Path to output audio file, or None if error
     """
+    if preset == 'whisper':
+        return extract_stt_audio(input_file, output_audio, start=start, end=end)
+    elif preset is not None:
+        print(f"❌ Error: Unknown audio preset '{preset}'")
+        return None
+    
     if not validate_input_file(input_file):
         return None
     
@@ -170,27 +617,112 @@ def extract_audio(input_file, output_audio=None, audio_format='mp3', audio_quali
     print(f"Input: {input_file}")
     print(f"Output: {output_audio}")
     print(f"Format: {audio_format}, Quality: {audio_quality}")
+    if start is not None or end is not None:
+        print(f"Range: {start if start is not None else 0} - {end if end is not None else 'end'}")
+    
+    input_args, output_args = _range_args(start, end)
     
     # Build ffmpeg command based on format
-    cmd = ['ffmpeg', '-i', input_file]
+    cmd = ['ffmpeg'] + input_args + ['-i', input_file, '-vn'] + _audio_codec_args(audio_format, audio_quality)
+    cmd.extend(output_args + ['-y', output_audio])
     
-    if audio_format == 'mp3':
-        cmd.extend(['-vn', '-acodec', 'libmp3lame', '-b:a', audio_quality])
-    elif audio_format == 'wav':
-        cmd.extend(['-vn', '-acodec', 'pcm_s16le'])
-    elif audio_format == 'aac' or audio_format == 'm4a':
-        cmd.extend(['-vn', '-acodec', 'aac', '-b:a', audio_quality])
-    elif audio_format == 'flac':
-        cmd.extend(['-vn', '-acodec', 'flac'])
-    elif audio_format == 'ogg':
-        cmd.extend(['-vn', '-acodec', 'libvorbis', '-b:a', audio_quality])
-    else:
-        cmd.extend(['-vn', '-acodec', 'copy'])
+    try:
+        _run_ffmpeg(cmd, [output_audio])
+        print(f"✅ Audio extracted successfully: {output_audio}")
+        print("="*70)
+        return output_audio
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error extracting audio: {e.stderr}")
+        print("="*70)
+        return None
+
+# What Whisper consumes: 16 kHz mono
+STT_SAMPLE_RATE = 16000
+
+# ffmpeg raw format, WAV codec and NumPy dtype of each STT sample format
+STT_SAMPLE_FORMATS = {
+    's16': ('s16le', 'pcm_s16le', '<i2'),
+    'f32': ('f32le', 'pcm_f32le', '<f4')
+}
+
+# .npy header size reserved before the sample count is known (a multiple of 64)
+NPY_HEADER_SIZE = 128
+
+def _npy_header(descr, count):
+    """Version 1.0 .npy header for a 1-D array of count samples, NPY_HEADER_SIZE bytes long"""
+    header = f"{{'descr': '{descr}', 'fortran_order': False, 'shape': ({count},), }}"
+    header = header.ljust(NPY_HEADER_SIZE - 10 - 1) + '\n'
+    return b'\x93NUMPY\x01\x00' + len(header).to_bytes(2, 'little') + header.encode('latin1')
+
+def extract_stt_audio(input_file, output_audio=None, sample_format='s16', loudness_target=None,
+                      start=None, end=None):
+    """
+    Extract audio in exactly the form the STT stage consumes
     
-    cmd.extend(['-y', output_audio])
+    The first audio track is downmixed to mono and resampled to 16 kHz once
+    here, so neither pydub nor Whisper has to decode or resample it again.
+    The container follows the output extension:
+    - .npy: NumPy array, loadable with np.load(mmap_mode='r')
+    - .pcm / .raw: headerless little-endian samples (np.memmap)
+    - .wav: PCM WAV
+    
+    Args:
+        input_file (str): Path to video file
+        output_audio (str, optional): Output file path. Auto-generated (.npy) if None
+        sample_format (str): 's16' (16-bit integer) or 'f32' (32-bit float)
+        loudness_target (float, optional): Normalize to this integrated loudness
+                                           in LUFS with ffmpeg loudnorm (e.g. -23)
+        start, end (optional): Only extract this time range
+        
+    Returns:
+        str: Path to output audio file, or None if error
+    """
+    if not validate_input_file(input_file):
+        return None
+    if sample_format not in STT_SAMPLE_FORMATS:
+        print(f"❌ Error: Unknown sample format '{sample_format}' (use 's16' or 'f32')")
+        return None
+    
+    raw_format, wav_codec, descr = STT_SAMPLE_FORMATS[sample_format]
+    
+    if output_audio is None:
+        base = Path(input_file).stem
+        output_audio = f"{base}_stt.npy"
+    container = Path(output_audio).suffix.lower()
+    
+    print(f"\n{'='*70}")
+    print("EXTRACTING AUDIO FOR STT")
+    print(f"{'='*70}")
+    print(f"Input: {input_file}")
+    print(f"Output: {output_audio}")
+    print(f"Format: {STT_SAMPLE_RATE} Hz mono {sample_format}"
+          + (f", normalized to {loudness_target} LUFS" if loudness_target is not None else ""))
+    
+    input_args, output_args = _range_args(start, end)
+    cmd = ['ffmpeg'] + input_args + ['-i', input_file, '-map', '0:a:0', '-vn'] + output_args
+    if loudness_target is not None:
+        cmd.extend(['-af', f'loudnorm=I={loudness_target}:TP=-1.5:LRA=11'])
+    cmd.extend(['-ac', '1', '-ar', str(STT_SAMPLE_RATE)])
+    
+    if container == '.wav':
+        cmd.extend(['-acodec', wav_codec])
+    else:
+        cmd.extend(['-f', raw_format])
     
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        if container == '.npy':
+            # ffmpeg writes the samples straight after a placeholder header,
+            # which is rewritten once the sample count is known
+            with open(output_audio, 'wb') as out:
+                out.write(_npy_header(descr, 0))
+                out.flush()
+                _run_ffmpeg(cmd + ['pipe:1'], stdout=out)
+                count = (out.seek(0, os.SEEK_END) - NPY_HEADER_SIZE) // int(descr[-1])
+                out.seek(0)
+                out.write(_npy_header(descr, count))
+        else:
+            _run_ffmpeg(cmd + ['-y', output_audio], [output_audio])
+        
         print(f"✅ Audio extracted successfully: {output_audio}")
         print("="*70)
         return output_audio
@@ -203,6 +735,8 @@ def extract_all_audio_tracks(input_file, output_dir=None, audio_format='mp3', au
     """
     Extract all audio tracks from media file as separate files
     
+    The tracks are listed with ffprobe and written in one ffmpeg run.
+    
     Args:
         input_file (str): Path to media file
         output_dir (str, optional): Output directory. Created if doesn't exist
@@ -226,31 +760,12 @@ def extract_all_audio_tracks(input_file, output_dir=None, audio_format='mp3', au
     print("EXTRACTING ALL AUDIO TRACKS")
     print(f"{'='*70}")
     
-    base_name = Path(input_file).stem
-    audio_files = []
-    track_num = 0
+    info = probe_media_info(input_file)
+    outputs = _audio_outputs(input_file, info, output_dir, audio_format, audio_quality) if info else []
+    audio_files = (demux_streams(input_file, outputs) or []) if outputs else []
     
-    while True:
-        output_file = os.path.join(output_dir, f"{base_name}_audio_track_{track_num}.{audio_format}")
-        
-        cmd = ['ffmpeg', '-i', input_file, '-map', f'0:a:{track_num}', '-vn']
-        
-        if audio_format == 'mp3':
-            cmd.extend(['-acodec', 'libmp3lame', '-b:a', audio_quality])
-        elif audio_format == 'wav':
-            cmd.extend(['-acodec', 'pcm_s16le'])
-        elif audio_format == 'aac':
-            cmd.extend(['-acodec', 'aac', '-b:a', audio_quality])
-        
-        cmd.extend(['-y', output_file])
-        
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print(f"✅ Track {track_num}: {output_file}")
-            audio_files.append(output_file)
-            track_num += 1
-        except subprocess.CalledProcessError:
-            break
+    for track_num, output_file in enumerate(audio_files):
+        print(f"✅ Track {track_num}: {output_file}")
     
     if audio_files:
         print(f"\n✅ Extracted {len(audio_files)} audio track(s)")
@@ -260,11 +775,19 @@ def extract_all_audio_tracks(input_file, output_dir=None, audio_format='mp3', au
     print("="*70)
     return audio_files
 
+def _audio_outputs(input_file, info, output_dir, audio_format='mp3', audio_quality='192k'):
+    """demux_streams outputs for every audio track"""
+    base_name = Path(input_file).stem
+    return [(f'0:a:{track_num}', _audio_codec_args(audio_format, audio_quality),
+             os.path.join(output_dir, f"{base_name}_audio_track_{track_num}.{audio_format}"))
+            for track_num in range(len(info.audio_streams))]
+
 # ============================================================================
 # VIDEO EXTRACTION FUNCTIONS
 # ============================================================================
 
-def extract_video_no_audio(input_file, output_video=None, video_codec='copy'):
+def extract_video_no_audio(input_file, output_video=None, video_codec='copy', start=None, end=None,
+                           report=None):
     """
     Extract video stream without audio
     
@@ -272,6 +795,12 @@ def extract_video_no_audio(input_file, output_video=None, video_codec='copy'):
         input_file (str): Path to video file
         output_video (str, optional): Output video file. Auto-generated if None
         video_codec (str): 'copy' (fast, no re-encoding) or codec like 'libx264'
+        start, end (optional): Only extract this time range (seconds or
+                               'HH:MM:SS.mmm'). With 'copy' the cut is made at
+                               the keyframes around the range (see keyframe_range)
+        report (dict, optional): Filled with the 'start' and 'end' (seconds;
+                                 end None for the end of the input) the
+                                 output actually covers
         
     Returns:
         str: Path to output video file, or None if error
@@ -292,17 +821,35 @@ def extract_video_no_audio(input_file, output_video=None, video_codec='copy'):
     print(f"Output: {output_video}")
     print(f"Video Codec: {video_codec}")
     
-    cmd = [
-        'ffmpeg',
-        '-i', input_file,
-        '-an',  # Remove audio
-        '-vcodec', video_codec,
-        '-y',
-        output_video
-    ]
+    input_args, output_args = _range_args(start, end)
+    range_start = parse_timestamp(start) if start is not None else 0.0
+    range_end = parse_timestamp(end) if end is not None else None
     
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        if video_codec == 'copy' and (start is not None or end is not None):
+            # Cut exactly at the keyframes a copy would snap to, so the
+            # output starts on a keyframe and its bounds are known
+            range_start, range_end = keyframe_range(input_file, range_start, range_end)
+            input_args, output_args = _range_args(range_start)
+            if range_end is not None:
+                output_args = ['-frames:v', str(frame_count(input_file, range_start, range_end))]
+            print(f"Range: {start or 0} - {end if end is not None else 'end'} (copied GOPs: "
+                  f"{range_start:.3f}s - {f'{range_end:.3f}s' if range_end is not None else 'end'})")
+        
+        cmd = [
+            'ffmpeg'
+        ] + input_args + [
+            '-i', input_file,
+            '-an',  # Remove audio
+            '-vcodec', video_codec
+        ] + output_args + [
+            '-y',
+            output_video
+        ]
+        
+        _run_ffmpeg(cmd, [output_video])
+        if report is not None:
+            report.update({'start': range_start, 'end': range_end})
         print(f"✅ Video extracted successfully: {output_video}")
         print("="*70)
         return output_video
@@ -349,7 +896,7 @@ def extract_video_silent(input_file, output_video=None):
     ]
     
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        _run_ffmpeg(cmd, [output_video])
         print(f"✅ Video with silent audio created: {output_video}")
         print("="*70)
         return output_video
@@ -366,6 +913,9 @@ def extract_all_subtitles(input_file, output_dir=None):
     """
     Extract all subtitle tracks from media file
     
+    The tracks are listed with ffprobe and written in one ffmpeg run; bitmap
+    subtitles, which cannot be converted to SRT, are skipped.
+    
     Args:
         input_file (str): Path to media file
         output_dir (str, optional): Output directory
@@ -386,28 +936,12 @@ def extract_all_subtitles(input_file, output_dir=None):
     print("EXTRACTING ALL SUBTITLES")
     print(f"{'='*70}")
     
-    base_name = Path(input_file).stem
-    subtitle_files = []
-    track_num = 0
+    info = probe_media_info(input_file)
+    outputs = _subtitle_outputs(input_file, info, output_dir) if info else []
+    subtitle_files = (demux_streams(input_file, outputs) or []) if outputs else []
     
-    while True:
-        output_file = os.path.join(output_dir, f"{base_name}_subtitle_{track_num}.srt")
-        
-        cmd = [
-            'ffmpeg',
-            '-i', input_file,
-            '-map', f'0:s:{track_num}',
-            '-y',
-            output_file
-        ]
-        
-        try:
-            subprocess.run(cmd, capture_output=True, text=True, check=True)
-            print(f"✅ Subtitle {track_num}: {output_file}")
-            subtitle_files.append(output_file)
-            track_num += 1
-        except subprocess.CalledProcessError:
-            break
+    for output_file in subtitle_files:
+        print(f"✅ Subtitle: {output_file}")
     
     if subtitle_files:
         print(f"\n✅ Extracted {len(subtitle_files)} subtitle(s)")
@@ -417,22 +951,96 @@ def extract_all_subtitles(input_file, output_dir=None):
     print("="*70)
     return subtitle_files
 
+def _video_output(input_file, info, output_dir, video_codec='copy'):
+    """
+    demux_streams output for the first video stream
+    
+    The video goes to MP4 unless it is copied and its codec cannot be stored
+    in MP4 (see can_copy_stream); then it is copied to Matroska instead.
+    """
+    container = '.mp4'
+    if video_codec == 'copy' and not can_copy_stream(info.video_streams[0], container):
+        container = '.mkv'
+    return ('0:v:0', ['-vcodec', video_codec],
+            os.path.join(output_dir, f"{Path(input_file).stem}_video{container}"))
+
+def _subtitle_outputs(input_file, info, output_dir):
+    """demux_streams outputs for every subtitle track that can be written as SRT"""
+    base_name = Path(input_file).stem
+    outputs = []
+    for track_num, stream in enumerate(info.subtitle_streams):
+        if stream.codec_name not in TEXT_SUBTITLE_CODECS:
+            print(f"⚠️  Skipping subtitle {track_num}: {stream.codec_name} cannot be converted to SRT")
+            continue
+        outputs.append((f'0:s:{track_num}', [],
+                        os.path.join(output_dir, f"{base_name}_subtitle_{track_num}.srt")))
+    return outputs
+
 # ============================================================================
 # COMBINATION FUNCTIONS
 # ============================================================================
 
+# Codecs each container can hold as (video, audio); containers not listed
+# (Matroska and the like) take anything
+CONTAINER_CODECS = {
+    '.mp4': ({'h264', 'hevc', 'mpeg4', 'mpeg2video', 'av1', 'vp9'},
+             {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'opus', 'flac'}),
+    '.m4v': ({'h264', 'hevc', 'mpeg4'}, {'aac', 'mp3', 'ac3', 'alac'}),
+    '.mov': ({'h264', 'hevc', 'mpeg4', 'mpeg2video', 'prores', 'mjpeg'},
+             {'aac', 'mp3', 'ac3', 'eac3', 'alac', 'pcm_s16le', 'pcm_s24le'}),
+    '.webm': ({'vp8', 'vp9', 'av1'}, {'opus', 'vorbis'})
+}
+
+# Encoders used when a stream cannot be copied, as (video, audio)
+CONTAINER_ENCODERS = {
+    '.webm': ('libvpx-vp9', 'libopus')
+}
+DEFAULT_ENCODERS = ('libx264', 'aac')
+
+# Sample rates AAC streams can be stored with
+AAC_SAMPLE_RATES = {8000, 11025, 12000, 16000, 22050, 24000, 32000, 44100, 48000, 64000, 88200, 96000}
+
+def can_copy_stream(stream, container):
+    """
+    Whether a probed stream can be stream-copied into a container
+    
+    Args:
+        stream (probe.StreamInfo): Video or audio stream
+        container (str): Output extension, e.g. '.mp4'
+        
+    Returns:
+        bool: True if the codec is allowed in the container as-is
+    """
+    allowed = CONTAINER_CODECS.get(container.lower())
+    if allowed is not None:
+        video_codecs, audio_codecs = allowed
+        if stream.codec_name not in (video_codecs if stream.codec_type == 'video' else audio_codecs):
+            return False
+    if stream.codec_name == 'aac' and stream.sample_rate not in AAC_SAMPLE_RATES:
+        return False
+    return True
+
 def combine_video_audio(video_file, audio_file, output_file=None, 
-                       video_codec='copy', audio_codec='aac', audio_bitrate='192k'):
+                       video_codec='auto', audio_codec='auto', audio_bitrate='192k',
+                       video_stream=0, audio_stream=0):
     """
     Combine separate video and audio files into one media file
     
+    Both inputs are probed. With 'auto', a stream is copied when the output
+    container can hold its codec as-is and only re-encoded otherwise. The
+    video file may be the original (with its own audio): only the selected
+    video stream is taken from it, so no video-only intermediate is needed.
+    
     Args:
-        video_file (str): Path to video file
+        video_file (str): Path to video file (any media file with a video stream)
         audio_file (str): Path to audio file
         output_file (str, optional): Output file path
-        video_codec (str): Video codec ('copy' or 'libx264', 'libx265', etc.)
-        audio_codec (str): Audio codec ('aac', 'mp3', 'copy')
+        video_codec (str): 'auto', 'copy' or an encoder ('libx264', 'libx265', etc.)
+        audio_codec (str): 'auto', 'copy', 'aac' or 'mp3'
         audio_bitrate (str): Audio bitrate if re-encoding
+        video_stream (int): Which video stream of video_file to use (0 = first;
+                            cover art is not counted)
+        audio_stream (int): Which audio stream of audio_file to use (0 = first)
         
     Returns:
         str: Path to output file, or None if error
@@ -447,11 +1055,33 @@ def combine_video_audio(video_file, audio_file, output_file=None,
         base = Path(video_file).stem
         output_file = f"{base}_combined.mp4"
     
+    container = Path(output_file).suffix.lower()
+    video_encoder, audio_encoder = CONTAINER_ENCODERS.get(container, DEFAULT_ENCODERS)
+    
+    video_info = probe_media_info(video_file)
+    audio_info = probe_media_info(audio_file)
+    if not video_info or not audio_info:
+        return None
+    if video_stream >= len(video_info.video_streams):
+        print(f"❌ Error: '{video_file}' has no video stream #{video_stream}")
+        return None
+    if audio_stream >= len(audio_info.audio_streams):
+        print(f"❌ Error: '{audio_file}' has no audio stream #{audio_stream}")
+        return None
+    
+    source_video = video_info.video_streams[video_stream]
+    source_audio = audio_info.audio_streams[audio_stream]
+    
+    if video_codec == 'auto':
+        video_codec = 'copy' if can_copy_stream(source_video, container) else video_encoder
+    if audio_codec == 'auto':
+        audio_codec = 'copy' if can_copy_stream(source_audio, container) else audio_encoder
+    
     print(f"\n{'='*70}")
     print("COMBINING VIDEO + AUDIO")
     print(f"{'='*70}")
-    print(f"Video: {video_file}")
-    print(f"Audio: {audio_file}")
+    print(f"Video: {video_file} (stream {video_stream}, {source_video.codec_name})")
+    print(f"Audio: {audio_file} (stream {audio_stream}, {source_audio.codec_name})")
     print(f"Output: {output_file}")
     print(f"Video codec: {video_codec}, Audio codec: {audio_codec}")
     
@@ -460,8 +1090,8 @@ def combine_video_audio(video_file, audio_file, output_file=None,
         '-i', video_file,
         '-i', audio_file,
         '-c:v', video_codec,
-        '-map', '0:v:0',  # Video from first input
-        '-map', '1:a:0',  # Audio from second input
+        '-map', f'0:{source_video.index}',  # Video from first input
+        '-map', f'1:{source_audio.index}',  # Audio from second input
     ]
     
     # Audio codec settings
@@ -471,11 +1101,13 @@ def combine_video_audio(video_file, audio_file, output_file=None,
         cmd.extend(['-c:a', 'aac', '-b:a', audio_bitrate])
     elif audio_codec == 'mp3':
         cmd.extend(['-c:a', 'libmp3lame', '-b:a', audio_bitrate])
+    else:
+        cmd.extend(['-c:a', audio_codec, '-b:a', audio_bitrate])
     
     cmd.extend(['-shortest', '-y', output_file])
     
     try:
-        subprocess.run(cmd, capture_output=True, text=True, check=True)
+        _run_ffmpeg(cmd, [output_file])
         print(f"✅ Combined successfully: {output_file}")
         print("="*70)
         return output_file
@@ -499,17 +1131,326 @@ def replace_audio(video_file, new_audio_file, output_file=None):
     """
     return combine_video_audio(video_file, new_audio_file, output_file)
 
+# Encoder and part container for each audio codec splice_audio_range can
+# re-encode a range in. Only codecs whose encoder delay is trimmed exactly
+# when the parts are joined are listed (MP3, Opus and Vorbis parts shift the
+# audio after the range by up to a frame).
+SPLICE_ENCODERS = {
+    'aac': ('aac', 'm4a'),
+    'ac3': ('ac3', 'mov'),
+    'flac': ('flac', 'mp4'),
+    'pcm_s16le': ('pcm_s16le', 'mov')
+}
+
+def splice_audio_range(media_file, replacement_audio, start, end=None, output_file=None):
+    """
+    Replace a time range of the audio in an existing output with new audio
+    
+    Only the audio packets covering the range are decoded, mixed and
+    re-encoded (in the original codec and settings). The audio before and
+    after them is copied packet for packet, and video and subtitles are
+    stream-copied, so the encoding work scales with the edited range rather
+    than the film length. The first audio track is the one replaced.
+    
+    Args:
+        media_file (str): Existing output, e.g. a dubbed video
+        replacement_audio (str): Audio for the range; it starts playing at start
+        start: Range start (seconds or 'HH:MM:SS.mmm')
+        end (optional): Range end (default: start + replacement length)
+        output_file (str, optional): Output file path
+        
+    Returns:
+        str: Path to output file, or None if error
+    """
+    if not validate_input_file(media_file):
+        return None
+    if not validate_input_file(replacement_audio):
+        return None
+    
+    if output_file is None:
+        base = Path(media_file).stem
+        ext = Path(media_file).suffix
+        output_file = f"{base}_spliced{ext}"
+    
+    info = probe_media_info(media_file)
+    if not info:
+        return None
+    if not info.audio_streams:
+        print(f"❌ Error: '{media_file}' has no audio track")
+        return None
+    
+    stream = info.audio_streams[0]
+    if stream.codec_name not in SPLICE_ENCODERS:
+        print(f"❌ Error: Cannot splice {stream.codec_name} audio (use combine_video_audio)")
+        return None
+    encoder, part_format = SPLICE_ENCODERS[stream.codec_name]
+    
+    start = parse_timestamp(start)
+    if end is None:
+        replacement = probe_media_info(replacement_audio)
+        if not replacement or not replacement.duration:
+            return None
+        end = start + replacement.duration
+    end = min(parse_timestamp(end), info.duration or float('inf'))
+    if end <= start:
+        print(f"❌ Error: Range end {end} is not after start {start}")
+        return None
+    
+    print(f"\n{'='*70}")
+    print("SPLICING AUDIO RANGE")
+    print(f"{'='*70}")
+    print(f"Media: {media_file}")
+    print(f"Replacement: {replacement_audio}")
+    print(f"Range: {start:.3f}s - {end:.3f}s")
+    print(f"Output: {output_file}")
+    
+    workdir = tempfile.mkdtemp(prefix="splice_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        # Packet boundaries around the range: re-encode from the packet
+        # containing start to the first packet at or after end
+        first_packet = _first_packet_time(media_file, 'a:0')
+        head_end = max([t for t in packet_times(media_file, 'a:0', start) if t <= start], default=0.0)
+        if head_end <= max(first_packet, 0.0):
+            head_end = 0.0  # range starts in the first packet: nothing to copy before it
+        tail_start = min([t for t in packet_times(media_file, 'a:0', end) if t >= end], default=None)
+        middle_length = (tail_start if tail_start is not None else info.duration) - head_end
+        print(f"Re-encoded audio: {head_end:.3f}s - {head_end + middle_length:.3f}s")
+        
+        audio_format = f"aformat=sample_rates={stream.sample_rate}:channel_layouts={stream.channels}c"
+        graph = (
+            f"[0:a:0]atrim=duration={middle_length:.6f},{audio_format},"
+            f"volume=0:enable='between(t,{start - head_end:.6f},{end - head_end:.6f})'[orig];"
+            f"[1:a:0]atrim=duration={end - start:.6f},{audio_format},"
+            f"adelay={int(round((start - head_end) * 1000))}:all=1[new];"
+            f"[orig][new]amix=inputs=2:normalize=0:duration=first[mid]"
+        )
+        middle = os.path.join(workdir, f"middle.{part_format}")
+        cmd = ['ffmpeg', '-ss', f'{head_end:.6f}', '-i', media_file, '-i', replacement_audio,
+               '-filter_complex', graph, '-map', '[mid]', '-c:a', encoder,
+               '-ar', str(stream.sample_rate), '-ac', str(stream.channels)]
+        if stream.bit_rate and encoder not in ('flac', 'pcm_s16le'):
+            cmd.extend(['-b:a', str(stream.bit_rate)])
+        cmd.extend(['-y', middle])
+        _run_ffmpeg(cmd, [middle])
+        
+        # Untouched audio before and after, copied in one pass
+        parts = []
+        cmd = ['ffmpeg', '-i', media_file]
+        if head_end > 0:
+            parts.append(os.path.join(workdir, f"head.{part_format}"))
+            cmd.extend(['-map', '0:a:0', '-c', 'copy', '-t', f'{head_end:.6f}', '-y', parts[-1]])
+        parts.append(middle)
+        if tail_start is not None:
+            parts.append(os.path.join(workdir, f"tail.{part_format}"))
+            cmd.extend(['-map', '0:a:0', '-c', 'copy', '-ss', f'{tail_start:.6f}', '-y', parts[-1]])
+        copied = [part for part in parts if part != middle]
+        if copied:
+            _run_ffmpeg(cmd, copied)
+        
+        list_file = os.path.join(workdir, "parts.txt")
+        with open(list_file, 'w', encoding='utf-8') as f:
+            for part in parts:
+                escaped = part.replace("'", "'\\''")
+                f.write(f"file '{escaped}'\n")
+                # The concat demuxer ignores edit lists, so drop the encoder
+                # delay packets of the new part explicitly
+                if part == middle:
+                    f.write("inpoint 0\n")
+        
+        # The concat demuxer starts at 0; when the copied head leads, shift
+        # back to where the original audio started (encoder delay gives a
+        # negative first timestamp)
+        offset = first_packet if parts[0] != middle else 0.0
+        cmd = ['ffmpeg', '-itsoffset', f'{offset:.6f}', '-f', 'concat', '-safe', '0', '-i', list_file,
+               '-i', media_file, '-map', '1:v?', '-map', '0:a:0', '-map', '1:s?', '-c', 'copy', '-y', output_file]
+        _run_ffmpeg(cmd, [output_file])
+        
+        print(f"✅ Spliced successfully: {output_file}")
+        print("="*70)
+        return output_file
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error splicing: {e.stderr}")
+        print("="*70)
+        return None
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def _atempo_filters(tempo):
+    """atempo filters for a tempo factor (each atempo is limited to 0.5-2.0)"""
+    filters = []
+    while tempo > 2.0:
+        filters.append('atempo=2.0')
+        tempo /= 2.0
+    while tempo < 0.5:
+        filters.append('atempo=0.5')
+        tempo /= 0.5
+    if abs(tempo - 1.0) > 0.001:
+        filters.append(f'atempo={tempo:.4f}')
+    return filters
+
+# Clips mixed by one ffmpeg run; larger clip sets are pre-mixed in groups of this size
+RENDER_MIX_GROUP = 32
+
+def _clip_mix_graph(clips, first_input, base_ms=0):
+    """
+    Input arguments and filter graph mixing clips into [mix]
+    
+    Each clip is time-stretched with atempo and delayed to start_ms - base_ms;
+    clip inputs are numbered from first_input.
+    """
+    inputs = []
+    graph = []
+    labels = []
+    
+    for idx, (clip_file, start_ms, tempo) in enumerate(clips):
+        inputs.extend(['-i', clip_file])
+        # Rounding absolute times keeps pre-mixed clips on the same millisecond as unmixed ones
+        filters = _atempo_filters(tempo) + [f'adelay={round(start_ms) - round(base_ms)}']
+        graph.append(f"[{first_input + idx}:a]{','.join(filters)}[c{idx}]")
+        labels.append(f"[c{idx}]")
+    
+    # normalize=0 keeps every clip at full level instead of dividing by the input count
+    graph.append(f"{''.join(labels)}amix=inputs={len(clips)}:normalize=0:dropout_transition=0[mix]")
+    return inputs, ';'.join(graph)
+
+def _premix_clips(clips, workdir, group_size=None):
+    """
+    Mix clips in groups until at most group_size inputs are left
+    
+    amix reads every input for the whole mix (adelay pads each clip with
+    silence from the start of its group), so mixing all clips at once costs
+    clips x duration and needs one file descriptor per clip. Groups of
+    consecutive clips are mixed into float WAVs that only span their own
+    clips, and those are mixed again, which keeps every ffmpeg run at
+    group_size inputs and the total work at about group_size x duration per
+    level.
+    
+    Returns (clip_file, start_ms, tempo) entries standing for all clips
+    """
+    group_size = group_size or RENDER_MIX_GROUP
+    level = sorted(clips, key=lambda clip: clip[1])
+    depth = 0
+    
+    while len(level) > group_size:
+        depth += 1
+        mixed = []
+        for group_start in range(0, len(level), group_size):
+            group = level[group_start:group_start + group_size]
+            if len(group) == 1:
+                mixed.append(group[0])
+                continue
+            
+            base_ms = group[0][1]
+            mix_file = os.path.join(workdir, f"mix_{depth}_{group_start // group_size}.wav")
+            inputs, graph = _clip_mix_graph(group, 0, base_ms)
+            cmd = ['ffmpeg'] + inputs + ['-filter_complex', graph, '-map', '[mix]',
+                                         '-c:a', 'pcm_f32le', '-y', mix_file]
+            _run_ffmpeg(cmd, [mix_file])
+            mixed.append((mix_file, base_ms, 1.0))
+        level = mixed
+    
+    return level
+
+def render_dubbed_video(video_file, clips, output_file=None,
+                        audio_codec='aac', audio_bitrate='192k'):
+    """
+    Render a dubbed video from individual speech clips
+    
+    Each clip is time-stretched with atempo, delayed to its start time with
+    adelay and mixed with amix; more than RENDER_MIX_GROUP clips are first
+    pre-mixed in groups (see _premix_clips). The mix is encoded once, and the
+    original video stream is copied straight from the source, so there is no
+    intermediate MP3 timeline or video-only file.
+    
+    Args:
+        video_file (str): Source video (its first video stream is copied as-is)
+        clips (list): (clip_file, start_ms, tempo) tuples, e.g. from tts.plan_dub_clips
+        output_file (str, optional): Output file path
+        audio_codec (str): Audio codec ('aac' or 'mp3')
+        audio_bitrate (str): Audio bitrate
+        
+    Returns:
+        str: Path to output file, or None if error
+    """
+    if not validate_input_file(video_file):
+        return None
+    if not clips:
+        print("❌ Error: No clips to render")
+        return None
+    
+    # Auto-generate output filename
+    if output_file is None:
+        base = Path(video_file).stem
+        output_file = f"{base}_dubbed.mp4"
+    
+    print(f"\n{'='*70}")
+    print("RENDERING DUBBED VIDEO")
+    print(f"{'='*70}")
+    print(f"Video: {video_file}")
+    print(f"Clips: {len(clips)}")
+    print(f"Output: {output_file}")
+    
+    workdir = tempfile.mkdtemp(prefix="render_", dir=os.path.dirname(os.path.abspath(output_file)))
+    try:
+        mixed = _premix_clips(clips, workdir)
+        if len(mixed) < len(clips):
+            print(f"Pre-mixed into {len(mixed)} group(s)")
+        
+        inputs, graph = _clip_mix_graph(mixed, 1)
+        # Pad and trim the mix to the video duration; an endless apad with
+        # -shortest is the fallback (it can fail to stop when the video is copied)
+        duration = _input_duration(['-i', video_file])
+        if duration:
+            graph += f";[mix]apad=whole_dur={duration:.3f},atrim=end={duration:.3f}[dub]"
+        else:
+            graph += ";[mix]apad[dub]"
+        cmd = ['ffmpeg', '-i', video_file] + inputs + [
+            '-filter_complex', graph,
+            '-map', '0:v:0', '-map', '[dub]', '-c:v', 'copy'
+        ]
+        
+        if audio_codec == 'mp3':
+            cmd.extend(['-c:a', 'libmp3lame', '-b:a', audio_bitrate])
+        else:
+            cmd.extend(['-c:a', 'aac', '-b:a', audio_bitrate])
+        
+        if not duration:
+            cmd.append('-shortest')
+        cmd.extend(['-y', output_file])
+        
+        _run_ffmpeg(cmd, [output_file])
+        print(f"✅ Rendered successfully: {output_file}")
+        print("="*70)
+        return output_file
+    except subprocess.CalledProcessError as e:
+        print(f"❌ Error rendering: {e.stderr}")
+        print("="*70)
+        return None
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
 # ============================================================================
 # BATCH PROCESSING FUNCTIONS
 # ============================================================================
 
-def separate_all_streams(input_file, output_dir=None):
+def separate_all_streams(input_file, output_dir=None, streams=('video', 'audio', 'subtitle'),
+                         video_codec='copy', audio_format='mp3', audio_quality='192k'):
     """
     Separate all streams (video, audio, subtitles) into individual files
     
+    The stream list comes from one ffprobe call, and every requested stream
+    is written by a single ffmpeg run with one output per stream, so the
+    input is read once rather than once per stream. If that run fails, each
+    output is retried on its own so one bad stream does not lose the others.
+    A copied video whose codec MP4 cannot hold is written as .mkv.
+    
     Args:
         input_file (str): Path to media file
         output_dir (str, optional): Output directory
+        streams (tuple): Stream types to extract ('video', 'audio', 'subtitle')
+        video_codec (str): 'copy' (fast, no re-encoding) or codec like 'libx264'
+        audio_format (str): Audio track format
+        audio_quality (str): Bitrate for lossy audio formats
         
     Returns:
         dict: Dictionary with paths to all extracted files
@@ -530,23 +1471,40 @@ def separate_all_streams(input_file, output_dir=None):
     print(f"Output directory: {output_dir}")
     print("="*70)
     
-    results = {}
+    info = probe_media_info(input_file)
+    if not info:
+        return {}
+    
+    video_outputs = []
+    if 'video' in streams and info.video_streams:
+        video_outputs.append(_video_output(input_file, info, output_dir, video_codec))
+    audio_outputs = []
+    if 'audio' in streams:
+        audio_outputs = _audio_outputs(input_file, info, output_dir, audio_format, audio_quality)
+    subtitle_outputs = []
+    if 'subtitle' in streams:
+        subtitle_outputs = _subtitle_outputs(input_file, info, output_dir)
     
-    # Extract video
-    video_file = extract_video_no_audio(
-        input_file,
-        os.path.join(output_dir, f"{Path(input_file).stem}_video.mp4")
-    )
-    if video_file:
-        results['video'] = video_file
+    outputs = video_outputs + audio_outputs + subtitle_outputs
+    written = set()
+    if outputs:
+        if demux_streams(input_file, outputs) is not None:
+            written = {output_file for _, _, output_file in outputs}
+        else:
+            print("Retrying each stream separately...")
+            for output in outputs:
+                if demux_streams(input_file, [output]) is not None:
+                    written.add(output[2])
+                elif os.path.exists(output[2]):
+                    os.remove(output[2])
     
-    # Extract audio tracks
-    audio_files = extract_all_audio_tracks(input_file, output_dir)
+    results = {}
+    if video_outputs and video_outputs[0][2] in written:
+        results['video'] = video_outputs[0][2]
+    audio_files = [output_file for _, _, output_file in audio_outputs if output_file in written]
     if audio_files:
         results['audio'] = audio_files
-    
-    # Extract subtitles
-    subtitle_files = extract_all_subtitles(input_file, output_dir)
+    subtitle_files = [output_file for _, _, output_file in subtitle_outputs if output_file in written]
     if subtitle_files:
         results['subtitles'] = subtitle_files
     
@@ -0,0 +1,138 @@
+# ============================================================================
+# PAUSE-AWARE ALIGNMENT
+# ============================================================================
+#
+# Decides where every TTS clip goes and how much it has to be sped up. A clip
+# that does not fit its segment first borrows silence from the pauses around
+# it: it may run on into the following pause and start a little early in the
+# preceding one, always leaving min_pause_ms between clips. Only what still
+# does not fit is time-stretched. Segments are solved in one left-to-right
+# pass (O(1) each), so the solver can run chunk by chunk as clips arrive.
+
+DEFAULT_MAX_ADVANCE_MS = 150
+DEFAULT_MAX_BORROW_MS = 600
+DEFAULT_MIN_PAUSE_MS = 120
+
+def pause_gaps(data, items, slots):
+    """
+    Silence after every segment in milliseconds
+    
+    Taken from the transcription's 'pauses' list (written by STT, keyed by
+    after_segment) and never longer than the gap between the segment slots,
+    which is used when a pause is missing; the last segment has no pause
+    after it.
+    
+    Parameters:
+    - data: transcription JSON
+    - items: the transcription items being dubbed
+    - slots: (start_ms, end_ms) of every item
+    """
+    pauses = {pause['after_segment']: pause['duration_ms'] for pause in data.get('pauses', [])}
+    
+    gaps = []
+    for idx, item in enumerate(items):
+        if idx == len(items) - 1:
+            gaps.append(0)
+        else:
+            gap = max(0, slots[idx + 1][0] - slots[idx][1])
+            gaps.append(min(gap, max(0, int(pauses.get(item['segment'], gap)))))
+    return gaps
+
+class AlignmentSolver:
+    """
+    Places clips segment by segment, borrowing pause time before stretching
+    
+    Parameters:
+    - slots: (start_ms, end_ms) of every segment in the original
+    - gaps: pause after every segment in ms (see pause_gaps)
+    - duration_ms: total timeline length; nothing is placed past it
+    - max_speedup: maximum time-stretch factor
+    - max_advance_ms: how early a clip may start in the preceding pause
+    - max_borrow_ms: how far a clip may run on into the following pause
+    - min_pause_ms: silence always kept between two clips
+    
+    With max_advance_ms = max_borrow_ms = 0 this is the old behaviour: every
+    clip is stretched to its own slot and starts no earlier than its segment.
+    """
+    
+    def __init__(self, slots, gaps, duration_ms, max_speedup=1.5,
+                 max_advance_ms=DEFAULT_MAX_ADVANCE_MS, max_borrow_ms=DEFAULT_MAX_BORROW_MS,
+                 min_pause_ms=DEFAULT_MIN_PAUSE_MS):
+        self.slots = slots
+        self.gaps = gaps
+        self.duration_ms = duration_ms
+        self.max_speedup = max_speedup
+        self.max_advance_ms = max_advance_ms
+        self.max_borrow_ms = max_borrow_ms
+        self.min_pause_ms = min_pause_ms
+        
+        self.cursor = 0  # end of the last placed clip
+        self.placed_any = False
+        self.stretched_ms = 0  # clip audio that had to be time-stretched
+        self.unborrowed_stretched_ms = 0  # same, if every clip had to fit its own slot
+        self.borrowed_ms = 0
+        self.max_drift_ms = 0
+    
+    def earliest_start(self, index):
+        """No clip of segment index or later can start before this"""
+        start, _ = self.slots[index]
+        gap_before = self.gaps[index - 1] if index > 0 else start
+        return max(0, start - min(self.max_advance_ms, max(0, gap_before - self.min_pause_ms)))
+    
+    def place(self, index, clip_ms):
+        """
+        Decide where the clip of segment index goes
+        
+        Segments must be placed in order (failed ones may be skipped).
+        
+        Returns (start_ms, speedup factor); the stretched clip is
+        clip_ms / factor long
+        """
+        start, end = self.slots[index]
+        
+        # Keep min_pause_ms after the previous clip when starting early, but
+        # never start later than the segment because of it
+        breath = self.min_pause_ms if self.placed_any else 0
+        earliest = max(self.cursor, min(start, max(self.earliest_start(index), self.cursor + breath)))
+        nominal = max(start, self.cursor)
+        
+        last = index == len(self.slots) - 1
+        room_after = self.gaps[index] if last else self.gaps[index] - self.min_pause_ms
+        latest_end = min(end + min(self.max_borrow_ms, max(0, room_after)), self.duration_ms)
+        
+        # Stay on the original start if the clip fits; otherwise move it up
+        # as far as needed (and allowed) before stretching
+        if nominal + clip_ms <= latest_end:
+            placed = nominal
+        else:
+            placed = max(earliest, latest_end - clip_ms)
+        
+        window = latest_end - placed
+        if clip_ms <= window:
+            factor = 1.0
+        elif window > 0:
+            factor = min(clip_ms / window, self.max_speedup)
+        else:
+            factor = self.max_speedup
+        
+        placed_end = placed + int(clip_ms / factor)
+        
+        if factor > 1.0:
+            self.stretched_ms += clip_ms
+        if clip_ms > end - start:
+            self.unborrowed_stretched_ms += clip_ms
+        self.borrowed_ms += max(0, start - placed) + max(0, min(placed_end, latest_end) - end)
+        self.max_drift_ms = max(self.max_drift_ms, abs(placed - start))
+        
+        self.cursor = max(self.cursor, placed_end)
+        self.placed_any = True
+        return placed, factor
+    
+    def report(self):
+        """Stretch work, pause time borrowed and largest start offset, in ms"""
+        return {
+            'stretched_ms': self.stretched_ms,
+            'unborrowed_stretched_ms': self.unborrowed_stretched_ms,
+            'borrowed_ms': self.borrowed_ms,
+            'max_drift_ms': self.max_drift_ms
+        }
@@ -0,0 +1,307 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import shutil
+import tempfile
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from TTS import engines
+from TTS import redub
+from TTS import stretch
+from TTS import timeline
+from TTS import tts
+
+# ============================================================================
+# TTS BENCHMARKS
+# ============================================================================
+#
+#   python -m TTS.bench timeline --max-minutes 120
+#   python -m TTS.bench decode --clips 50
+#   python -m TTS.bench stretch --clips 40
+#   python -m TTS.bench synthesis --engine espeak --segments 100
+#   python -m TTS.bench redub --engine espeak --segments 200
+
+def make_clip(duration_ms, frame_rate=timeline.SAMPLE_RATE, seed=0):
+    """Synthetic speech-like clip (noise burst) as a pydub AudioSegment"""
+    rng = np.random.default_rng(seed)
+    samples = (rng.standard_normal(int(duration_ms * frame_rate / 1000)) * 3000).astype(np.int16)
+    return timeline.samples_to_audio(samples, frame_rate)
+
+def build_with_concatenation(duration_ms, clip, slot_ms):
+    """Old approach: grow an AudioSegment with += for every silence and clip"""
+    final_audio = AudioSegment.empty()
+    for start_ms in range(0, duration_ms - slot_ms + 1, slot_ms):
+        final_audio += AudioSegment.silent(duration=start_ms - len(final_audio),
+                                           frame_rate=clip.frame_rate)
+        final_audio += clip
+    return final_audio
+
+def build_with_timeline(duration_ms, clip, slot_ms):
+    """New approach: write every clip into one preallocated buffer"""
+    samples = timeline.audio_to_samples(clip)
+    final_audio = timeline.Timeline(duration_ms)
+    for start_ms in range(0, duration_ms - slot_ms + 1, slot_ms):
+        final_audio.place(samples, start_ms)
+    return final_audio
+
+def benchmark_timeline(max_minutes=120, legacy_max_minutes=20, slot_ms=3000, clip_ms=2000):
+    """
+    Compare timeline assembly cost as the output grows
+    
+    The AudioSegment += path is quadratic, so it only runs up to
+    legacy_max_minutes; the preallocated Timeline runs up to max_minutes.
+    Linear behaviour shows as a constant time per output minute.
+    """
+    clip = make_clip(clip_ms)
+    sizes = [m for m in (5, 10, 20, 30, 60, 90, 120, 180) if m <= max_minutes]
+    
+    print("\n" + "="*70)
+    print("TIMELINE ASSEMBLY BENCHMARK")
+    print("="*70)
+    print(f"{'Minutes':>8}{'Segments':>10}{'+= (s)':>12}{'ms/min':>10}{'Timeline (s)':>14}{'ms/min':>10}")
+    print("-"*70)
+    
+    results = []
+    
+    for minutes in sizes:
+        duration_ms = minutes * 60000
+        segments = duration_ms // slot_ms
+        
+        legacy = None
+        if minutes <= legacy_max_minutes:
+            start = time.perf_counter()
+            build_with_concatenation(duration_ms, clip, slot_ms)
+            legacy = time.perf_counter() - start
+        
+        start = time.perf_counter()
+        build_with_timeline(duration_ms, clip, slot_ms)
+        buffered = time.perf_counter() - start
+        
+        legacy_text = (f"{legacy:>12.2f}{legacy * 1000 / minutes:>10.1f}"
+                       if legacy is not None else f"{'skipped':>12}{'':>10}")
+        print(f"{minutes:>8}{segments:>10}{legacy_text}{buffered:>14.2f}{buffered * 1000 / minutes:>10.1f}")
+        results.append({'minutes': minutes, 'segments': segments,
+                        'concatenation_s': legacy, 'timeline_s': buffered})
+    
+    print("="*70)
+    return results
+
+def encode_mp3(audio):
+    """Encode an AudioSegment to MP3 bytes, as returned by the TTS engines"""
+    buffer = io.BytesIO()
+    audio.export(buffer, format="mp3", bitrate="48k")
+    return buffer.getvalue()
+
+def benchmark_decode(clips=50, clip_ms=3000):
+    """
+    Compare per-segment overhead of getting engine output into PCM
+    
+    Before: write MP3 to temp_tts_sync/seg_N.mp3, read back with
+    AudioSegment.from_mp3 (ffprobe + ffmpeg subprocess per segment).
+    After: decode the in-memory bytes with timeline.decode_audio.
+    """
+    encoded = [encode_mp3(make_clip(clip_ms, seed=idx)) for idx in range(clips)]
+    
+    temp_dir = tempfile.mkdtemp(prefix="temp_tts_sync")
+    try:
+        start = time.perf_counter()
+        for idx, data in enumerate(encoded):
+            temp_file = os.path.join(temp_dir, f"seg_{idx}.mp3")
+            with open(temp_file, 'wb') as f:
+                f.write(data)
+            AudioSegment.from_mp3(temp_file)
+        file_round_trip = time.perf_counter() - start
+    finally:
+        shutil.rmtree(temp_dir, ignore_errors=True)
+    
+    start = time.perf_counter()
+    for data in encoded:
+        timeline.decode_audio(data)
+    in_memory = time.perf_counter() - start
+    
+    try:
+        import miniaudio
+        decoder = "miniaudio (in-process)"
+    except ImportError:
+        decoder = "ffmpeg pipe (install miniaudio for in-process decoding)"
+    
+    print("\n" + "="*70)
+    print("TTS DECODE OVERHEAD")
+    print("="*70)
+    print(f"Clips: {clips} x {clip_ms}ms")
+    print(f"Temp MP3 + from_mp3:  {file_round_trip * 1000 / clips:8.1f} ms/segment")
+    print(f"In-memory decode:     {in_memory * 1000 / clips:8.1f} ms/segment  [{decoder}]")
+    print(f"Speedup: {file_round_trip / in_memory:.1f}x")
+    print("="*70)
+    
+    return {'clips': clips, 'file_ms_per_segment': file_round_trip * 1000 / clips,
+            'memory_ms_per_segment': in_memory * 1000 / clips}
+
+def benchmark_stretch(clips=40, clip_ms=3000, speed=1.3, max_workers=None):
+    """
+    Compare time-stretch throughput in seconds of audio processed per second
+    
+    pydub speedup (chunk-and-crossfade, one clip at a time) against the NumPy
+    WSOLA stretch, in-process and across a process pool.
+    """
+    jobs = [(make_clip(clip_ms, seed=idx), speed) for idx in range(clips)]
+    audio_seconds = clips * clip_ms / 1000
+    
+    runs = [
+        ("pydub speedup", lambda: stretch.stretch_many(jobs, 'pydub', max_workers=1)),
+        ("WSOLA", lambda: stretch.stretch_many(jobs, 'wsola', max_workers=1)),
+        ("WSOLA process pool", lambda: stretch.stretch_many(jobs, 'wsola', max_workers)),
+    ]
+    
+    print("\n" + "="*70)
+    print("TIME-STRETCH THROUGHPUT")
+    print("="*70)
+    print(f"Clips: {clips} x {clip_ms}ms at {speed}x")
+    
+    results = {}
+    for name, run in runs:
+        start = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - start
+        results[name] = audio_seconds / elapsed
+        print(f"{name:<22}{elapsed:8.2f} s  {audio_seconds / elapsed:10.1f} audio-s/s")
+    
+    print("="*70)
+    return results
+
+def benchmark_synthesis(engine='espeak', segments=100, language='en', max_workers=8):
+    """
+    Measure end-to-end synthesis + decode throughput of a TTS engine
+    
+    With the offline espeak engine this runs without network access, so
+    worker counts and the decode path can be tuned on an air-gapped machine.
+    """
+    if not engines.get_engine(engine).available():
+        raise RuntimeError(f"TTS engine '{engine}' is not available on this machine")
+    
+    words = "the quick brown fox jumps over the lazy dog while the band plays on".split()
+    jobs = [(" ".join(words[idx % 5:idx % 5 + 6 + idx % 8]) + f" {idx}", language)
+            for idx in range(segments)]
+    
+    start = time.perf_counter()
+    results = tts.synthesize_clips(jobs, engine, max_workers)
+    elapsed = time.perf_counter() - start
+    
+    failed = sum(isinstance(result, Exception) for result in results)
+    audio_seconds = sum(len(result) for result in results if not isinstance(result, Exception)) / 1000
+    
+    print("\n" + "="*70)
+    print("TTS SYNTHESIS THROUGHPUT")
+    print("="*70)
+    print(f"Engine: {engine}  Segments: {segments}  Workers: {max_workers}")
+    print(f"Elapsed: {elapsed:.2f}s  ({segments / elapsed:.1f} segments/s, failed: {failed})")
+    print(f"Audio: {audio_seconds:.1f}s  ({audio_seconds / elapsed:.1f}x realtime)")
+    print("="*70)
+    
+    return {'engine': engine, 'segments': segments, 'seconds': elapsed,
+            'failed': failed, 'audio_seconds': audio_seconds}
+
+def _timestamp(ms):
+    return f"{ms // 3600000:02d}:{ms // 60000 % 60:02d}:{ms // 1000 % 60:02d}.{ms % 1000:03d}"
+
+def benchmark_redub(engine='espeak', segments=200, language='en', slot_ms=4000):
+    """
+    Time a full incremental render against re-dubbing one edited segment
+    
+    espeak and edge take a speaking rate, so segments get predicted rates
+    stored in the manifest; this is the path redub_changed_segments has to
+    read back. Reports how many output parts each run encoded.
+    """
+    if not engines.get_engine(engine).available():
+        raise RuntimeError(f"TTS engine '{engine}' is not available on this machine")
+    
+    words = "the quick brown fox jumps over the lazy dog while the band plays on".split()
+    transcription = [{'segment': idx + 1,
+                      'start_time': _timestamp(idx * slot_ms),
+                      'end_time': _timestamp(idx * slot_ms + slot_ms * 3 // 4),
+                      'text': " ".join(words[idx % 5:idx % 5 + 4 + idx % 8]) + f" {idx}"}
+                     for idx in range(segments)]
+    
+    workdir = tempfile.mkdtemp(prefix="redub_bench_")
+    try:
+        json_file = os.path.join(workdir, "transcription.json")
+        output_audio = os.path.join(workdir, "dub.mp3")
+        options = dict(language=language, tts_engine=engine, cache_dir=os.path.join(workdir, "cache"))
+        
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({'transcription': transcription}, f)
+        render = {}
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            tts.create_perfectly_synced_tts(json_file, output_audio, incremental=True, report=render, **options)
+        render_seconds = time.perf_counter() - start
+        
+        transcription[segments // 2]['text'] = "this line was rewritten after review"
+        with open(json_file, 'w', encoding='utf-8') as f:
+            json.dump({'transcription': transcription}, f)
+        start = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):
+            report = redub.redub_changed_segments(json_file, output_audio, **options)
+        redub_seconds = time.perf_counter() - start
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+    
+    print("\n" + "="*70)
+    print("INCREMENTAL RE-DUB")
+    print("="*70)
+    print(f"Engine: {engine}  Segments: {segments}")
+    print(f"Full render: {render_seconds:.2f}s  (parts encoded: {render['parts_encoded']} of {render['parts_total']})")
+    print(f"Re-dub of 1 segment: {redub_seconds:.2f}s  (parts encoded: {report['parts_encoded']} of "
+          f"{report['parts_total']}, segments touched: {report['segments_touched']})")
+    print("="*70)
+    
+    return {'render_seconds': render_seconds, 'redub_seconds': redub_seconds,
+            'parts_encoded': report['parts_encoded'], 'parts_total': report['parts_total']}
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS performance benchmarks")
+    subparsers = parser.add_subparsers(dest='benchmark', required=True)
+    
+    timeline_parser = subparsers.add_parser('timeline', help="timeline assembly scaling")
+    timeline_parser.add_argument('--max-minutes', type=int, default=120)
+    timeline_parser.add_argument('--legacy-max-minutes', type=int, default=20)
+    
+    decode_parser = subparsers.add_parser('decode', help="per-segment decode overhead")
+    decode_parser.add_argument('--clips', type=int, default=50)
+    
+    stretch_parser = subparsers.add_parser('stretch', help="time-stretch throughput")
+    stretch_parser.add_argument('--clips', type=int, default=40)
+    stretch_parser.add_argument('--speed', type=float, default=1.3)
+    stretch_parser.add_argument('--workers', type=int, default=None)
+    
+    synthesis_parser = subparsers.add_parser('synthesis', help="engine synthesis throughput")
+    synthesis_parser.add_argument('--engine', choices=list(engines.ENGINES), default='espeak')
+    synthesis_parser.add_argument('--segments', type=int, default=100)
+    synthesis_parser.add_argument('--language', default='en')
+    synthesis_parser.add_argument('--workers', type=int, default=8)
+    
+    redub_parser = subparsers.add_parser('redub', help="incremental re-dub of one edited segment")
+    redub_parser.add_argument('--engine', choices=list(engines.ENGINES), default='espeak')
+    redub_parser.add_argument('--segments', type=int, default=200)
+    redub_parser.add_argument('--language', default='en')
+    
+    args = parser.parse_args()
+    
+    if args.benchmark == 'timeline':
+        benchmark_timeline(args.max_minutes, args.legacy_max_minutes)
+    elif args.benchmark == 'decode':
+        benchmark_decode(args.clips)
+    elif args.benchmark == 'stretch':
+        benchmark_stretch(args.clips, speed=args.speed, max_workers=args.workers)
+    elif args.benchmark == 'synthesis':
+        benchmark_synthesis(args.engine, args.segments, args.language, args.workers)
+    elif args.benchmark == 'redub':
+        benchmark_redub(args.engine, args.segments, args.language)
+
+if __name__ == "__main__":
+    main()
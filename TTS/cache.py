@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+from pydub import AudioSegment
+
+from TTS.duration import count_syllables
+
+DEFAULT_CACHE_DIR = ".tts_cache"
+DEFAULT_MAX_BYTES = 2 * 1024 ** 3  # 2 GB
+
+def cache_key(text, language, engine, voice=None, rate=None):
+    """Content address of a synthesized clip"""
+    payload = json.dumps([text, language, engine, voice, rate], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+class TTSCache:
+    """
+    Persistent on-disk cache of decoded TTS clips
+    
+    Clips are stored as WAV files named by the hash of
+    (text, language, engine, voice, rate). An index.json file keeps size,
+    last access time and synthesis metadata per entry; the least recently
+    used entries are evicted when the cache grows past max_bytes.
+    """
+    
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.index_file = os.path.join(cache_dir, "index.json")
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        
+        os.makedirs(cache_dir, exist_ok=True)
+        try:
+            with open(self.index_file, 'r', encoding='utf-8') as f:
+                self.index = json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            self.index = {}
+    
+    def path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.wav")
+    
+    @property
+    def total_bytes(self):
+        return sum(entry['size'] for entry in self.index.values())
+    
+    def get(self, text, language, engine, voice=None, rate=None):
+        """Return the cached AudioSegment, or None on a miss"""
+        key = cache_key(text, language, engine, voice, rate)
+        
+        with self.lock:
+            entry = self.index.get(key)
+            if entry is None or not os.path.exists(self.path(key)):
+                self.index.pop(key, None)
+                self.misses += 1
+                return None
+            entry['last_access'] = time.time()
+            self.hits += 1
+        
+        return AudioSegment.from_wav(self.path(key))
+    
+    def put(self, text, language, engine, audio, voice=None, rate=None):
+        """Store a decoded clip and return its path"""
+        key = cache_key(text, language, engine, voice, rate)
+        path = self.path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        
+        temp_path = f"{path}.{threading.get_ident()}.tmp"
+        audio.export(temp_path, format="wav")
+        os.replace(temp_path, path)
+        
+        with self.lock:
+            self.index[key] = {
+                'size': os.path.getsize(path),
+                'last_access': time.time(),
+                'text_chars': len(text),
+                'syllables': count_syllables(text),
+                'duration_ms': len(audio),
+                'language': language,
+                'engine': engine,
+                'voice': voice,
+                'rate': rate
+            }
+        
+        return path
+    
+    def evict(self):
+        """Remove least recently used entries until the cache fits max_bytes"""
+        removed = 0
+        with self.lock:
+            total = self.total_bytes
+            for key in sorted(self.index, key=lambda k: self.index[k]['last_access']):
+                if total <= self.max_bytes:
+                    break
+                total -= self.index.pop(key)['size']
+                try:
+                    os.remove(self.path(key))
+                except FileNotFoundError:
+                    pass
+                removed += 1
+        return removed
+    
+    def flush(self):
+        """Evict over-budget entries and write the index to disk"""
+        removed = self.evict()
+        
+        with self.lock:
+            temp_file = f"{self.index_file}.tmp"
+            with open(temp_file, 'w', encoding='utf-8') as f:
+                json.dump(self.index, f)
+            os.replace(temp_file, self.index_file)
+        
+        if removed:
+            print(f"TTS cache: evicted {removed} clip(s), {self.total_bytes / (1024*1024):.1f} MB in use")
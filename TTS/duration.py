@@ -0,0 +1,126 @@
+import math
+import re
+import unicodedata
+
+import numpy as np
+
+from TTS.timeline import audio_to_samples, samples_to_audio
+
+# Fallback model until enough clips of a (language, engine, voice) are cached:
+# duration_ms = DEFAULT_BASE_MS + DEFAULT_MS_PER_SYLLABLE * syllables at rate 1.0
+DEFAULT_BASE_MS = 200.0
+DEFAULT_MS_PER_SYLLABLE = 190.0
+
+# Speaking rates are rounded up to this step so similar segments share cache entries
+RATE_STEP = 0.05
+
+def count_syllables(text):
+    """
+    Rough syllable count of a text
+    
+    Vowel groups in Latin script words; base letters (aksharas) in other
+    scripts, whose vowel signs and viramas are combining marks. Digits count
+    as one syllable each.
+    """
+    count = 0
+    for word in text.split():
+        vowel_groups = re.findall(r'[aeiouy]+', word.lower())
+        if vowel_groups:
+            count += len(vowel_groups)
+        else:
+            count += sum(1 for ch in word if unicodedata.category(ch) == 'Lo' or ch.isdigit())
+    return max(count, 1)
+
+class DurationPredictor:
+    """
+    Predicts TTS clip length from text before synthesis
+    
+    One linear model (duration at rate 1.0 = base + ms_per_syllable * syllables)
+    is fitted per (language, engine, voice) by least squares over past clips in
+    the TTS cache. Keys with fewer than min_samples clips fall back to the
+    engine-wide fit, then to the defaults above.
+    """
+    
+    def __init__(self, min_samples=8):
+        self.min_samples = min_samples
+        self.samples = {}
+        self.models = {}
+    
+    @classmethod
+    def from_cache(cls, cache, min_samples=8):
+        """Calibrate from the metadata of every clip in a TTSCache"""
+        predictor = cls(min_samples)
+        for entry in cache.index.values():
+            if entry.get('syllables'):
+                predictor.observe(entry['syllables'], entry['duration_ms'], entry['language'],
+                                  entry['engine'], entry.get('voice'), entry.get('rate'))
+        predictor.fit()
+        return predictor
+    
+    def observe(self, syllables, duration_ms, language, engine, voice=None, rate=None):
+        """Add one synthesized clip (duration is normalized to rate 1.0)"""
+        normalized = duration_ms * (rate or 1.0)
+        for key in ((language, engine, voice), (None, engine, None)):
+            self.samples.setdefault(key, []).append((syllables, normalized))
+    
+    def fit(self):
+        """Refit every model from the observed clips"""
+        self.models = {}
+        for key, points in self.samples.items():
+            if len(points) < self.min_samples:
+                continue
+            x, y = np.array(points, dtype=np.float64).T
+            if np.ptp(x) == 0:
+                continue
+            slope, base = np.polyfit(x, y, 1)
+            if slope > 0:
+                self.models[key] = (max(float(base), 0.0), float(slope))
+        return self
+    
+    def model(self, language, engine, voice=None):
+        """(base_ms, ms_per_syllable) used for a language/engine/voice"""
+        return self.models.get((language, engine, voice),
+                               self.models.get((None, engine, None),
+                                               (DEFAULT_BASE_MS, DEFAULT_MS_PER_SYLLABLE)))
+    
+    def predict(self, text, language, engine, voice=None, rate=None):
+        """Predicted clip length in milliseconds at the given rate"""
+        base, per_syllable = self.model(language, engine, voice)
+        return (base + per_syllable * count_syllables(text)) / (rate or 1.0)
+
+def choose_rate(predicted_ms, target_ms, max_rate=1.5):
+    """
+    Speaking rate that makes a predicted clip fit target_ms
+    
+    Returns None when the clip already fits at the normal rate, otherwise
+    the required speedup rounded up to RATE_STEP and capped at max_rate.
+    """
+    if target_ms <= 0 or predicted_ms <= target_ms:
+        return None
+    rate = math.ceil(predicted_ms / target_ms / RATE_STEP) * RATE_STEP
+    return round(min(rate, max_rate), 2)
+
+def trim_silence(audio, threshold_db=-45.0, frame_ms=10, padding_ms=30):
+    """
+    Trim leading and trailing silence from a clip
+    
+    Frame RMS levels are computed in one vectorized pass; everything before
+    the first and after the last frame above threshold_db (dBFS) is cut,
+    keeping padding_ms on either side.
+    """
+    samples = audio_to_samples(audio, audio.frame_rate)
+    frame = max(1, int(audio.frame_rate * frame_ms / 1000))
+    n_frames = len(samples) // frame
+    if n_frames == 0:
+        return audio
+    
+    frames = samples[:n_frames * frame].astype(np.float32).reshape(n_frames, frame)
+    rms = np.sqrt(np.mean(frames ** 2, axis=1))
+    loud = np.flatnonzero(rms > 32768 * 10 ** (threshold_db / 20))
+    if len(loud) == 0:
+        return audio
+    
+    pad = int(padding_ms / frame_ms)
+    start = max(0, loud[0] - pad) * frame
+    end = min(len(samples), (loud[-1] + 1 + pad) * frame)
+    return samples_to_audio(samples[start:end], audio.frame_rate)
@@ -0,0 +1,311 @@
+import argparse
+import asyncio
+import io
+import shutil
+import subprocess
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# ============================================================================
+# TTS ENGINES
+# ============================================================================
+#
+# Every engine implements synthesize_batch(texts, language, voice, rate) and
+# returns encoded audio bytes (in engine.output_format) or the exception raised
+# per text. Rates are multipliers of the engine's normal speaking rate
+# (1.0 = normal, 1.2 = 20% faster); None leaves the engine default. With a
+# timeout (seconds), a request that takes longer fails with TimeoutError.
+# Retries and failover between engines are in TTS.resilience.
+#
+#   python -m TTS.engines list
+#   python -m TTS.engines voices edge --language ml
+
+ENGINES = {}
+
+def register_engine(cls):
+    """Class decorator adding an engine to the registry under cls.name"""
+    ENGINES[cls.name] = cls
+    return cls
+
+_instances = {}
+_instances_lock = threading.Lock()
+
+def get_engine(name):
+    """Return the shared instance of a registered engine"""
+    if name not in ENGINES:
+        raise ValueError(f"Unknown TTS engine: {name} (available: {', '.join(ENGINES)})")
+    with _instances_lock:
+        if name not in _instances:
+            _instances[name] = ENGINES[name]()
+        return _instances[name]
+
+def list_engines():
+    """Capabilities of every registered engine"""
+    return [get_engine(name).capabilities() for name in ENGINES]
+
+class TTSEngine:
+    """
+    Base class for TTS engines
+    
+    Subclasses set name and the capability attributes and implement
+    synthesize(); synthesize_batch() runs it on a bounded thread pool unless
+    the engine has a cheaper way to do many requests at once.
+    """
+    
+    name = None
+    output_format = "mp3"
+    offline = False
+    supports_rate = False
+    
+    def available(self):
+        """Whether the engine can be used on this machine"""
+        return True
+    
+    def capabilities(self):
+        return {
+            'name': self.name,
+            'available': self.available(),
+            'offline': self.offline,
+            'supports_rate': self.supports_rate,
+            'output_format': self.output_format
+        }
+    
+    def voices(self, language=None):
+        """List of {'name', 'language', 'description'} dicts, optionally for one language"""
+        return []
+    
+    def default_voice(self, language):
+        """Voice used for a language when none is given (None when the engine has no voices)"""
+        return None
+    
+    def synthesize(self, text, language, voice=None, rate=None, timeout=None):
+        raise NotImplementedError
+    
+    async def stream(self, text, language, voice=None, rate=None):
+        """
+        Async iterator over encoded audio chunks as they become available
+        
+        Engines without a streaming API yield the whole clip as one chunk.
+        """
+        loop = asyncio.get_running_loop()
+        yield await loop.run_in_executor(None, self.synthesize, text, language,
+                                         voice or self.default_voice(language), rate)
+    
+    def synthesize_batch(self, texts, language, voice=None, rate=None, max_workers=8, timeout=None):
+        """
+        Synthesize many texts in one language
+        
+        Returns list in text order with the encoded audio bytes, or the exception raised
+        """
+        if not texts:
+            return []
+        
+        voice = voice or self.default_voice(language)
+        
+        def run(text):
+            try:
+                return self.synthesize(text, language, voice, rate, timeout)
+            except Exception as e:
+                return e
+        
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            return list(executor.map(run, texts))
+
+@register_engine
+class GTTSEngine(TTSEngine):
+    """Google Translate TTS (network); voices are not selectable, rate is fixed"""
+    
+    name = "gtts"
+    
+    def voices(self, language=None):
+        from gtts.lang import tts_langs
+        return [{'name': code, 'language': code, 'description': description}
+                for code, description in sorted(tts_langs().items())
+                if language is None or code == language]
+    
+    def synthesize(self, text, language, voice=None, rate=None, timeout=None):
+        import requests
+        from gtts import gTTS, gTTSError
+        
+        # gTTS applies the timeout to connecting and to every read
+        tts = gTTS(text=text, lang=language, slow=False, timeout=timeout)
+        buffer = io.BytesIO()
+        try:
+            tts.write_to_fp(buffer)
+        except gTTSError as e:
+            if isinstance(e.__context__, requests.exceptions.Timeout):
+                raise TimeoutError(f"gTTS request timed out after {timeout}s") from e
+            raise
+        return buffer.getvalue()
+
+# Edge TTS voice per language
+EDGE_VOICE_MAP = {
+    'ml': 'ml-IN-SobhanaNeural',
+    'en': 'en-US-JennyNeural',
+    'hi': 'hi-IN-SwaraNeural',
+    'ta': 'ta-IN-PallaviNeural',
+    'te': 'te-IN-ShrutiNeural',
+}
+
+_edge_loop = None
+_edge_loop_lock = threading.Lock()
+
+def get_edge_loop():
+    """Return the long-lived event loop used for all edge-tts requests"""
+    global _edge_loop
+    with _edge_loop_lock:
+        if _edge_loop is None:
+            _edge_loop = asyncio.new_event_loop()
+            threading.Thread(target=_edge_loop.run_forever, daemon=True).start()
+    return _edge_loop
+
+def run_on_edge_loop(coro):
+    """Run a coroutine on the shared edge-tts loop and wait for its result"""
+    return asyncio.run_coroutine_threadsafe(coro, get_edge_loop()).result()
+
+def edge_rate(rate):
+    """Rate multiplier as an edge-tts / SSML prosody rate ('+20%')"""
+    return f"{round((rate - 1) * 100):+d}%" if rate else "+0%"
+
+@register_engine
+class EdgeEngine(TTSEngine):
+    """
+    Microsoft Edge neural voices (network)
+    
+    All requests run on one long-lived event loop with at most max_workers
+    in flight.
+    """
+    
+    name = "edge"
+    supports_rate = True
+    
+    def available(self):
+        try:
+            import edge_tts
+        except ImportError:
+            return False
+        return True
+    
+    def voices(self, language=None):
+        import edge_tts
+        
+        voices = run_on_edge_loop(edge_tts.list_voices())
+        return [{'name': v['ShortName'], 'language': v['Locale'], 'description': v.get('Gender', '')}
+                for v in voices
+                if language is None or v['Locale'].split('-')[0] == language]
+    
+    def default_voice(self, language):
+        return EDGE_VOICE_MAP.get(language, f'{language}-Neural')
+    
+    async def stream(self, text, language, voice=None, rate=None):
+        import edge_tts
+        
+        communicate = edge_tts.Communicate(text, voice or self.default_voice(language),
+                                           rate=edge_rate(rate))
+        async for chunk in communicate.stream():
+            if chunk['type'] == 'audio':
+                yield chunk['data']
+    
+    async def _synthesize_all(self, texts, language, voice, rate, max_concurrency, timeout=None):
+        semaphore = asyncio.Semaphore(max_concurrency)
+        
+        async def collect(text):
+            return b''.join([chunk async for chunk in self.stream(text, language, voice, rate)])
+        
+        async def generate(text):
+            async with semaphore:
+                # The deadline starts once the request is let through
+                try:
+                    return await asyncio.wait_for(collect(text), timeout)
+                except asyncio.TimeoutError as e:
+                    raise TimeoutError(f"edge-tts request timed out after {timeout}s") from e
+        
+        return await asyncio.gather(*(generate(text) for text in texts), return_exceptions=True)
+    
+    def synthesize(self, text, language, voice=None, rate=None, timeout=None):
+        result = self.synthesize_batch([text], language, voice, rate, timeout=timeout)[0]
+        if isinstance(result, Exception):
+            raise result
+        return result
+    
+    def synthesize_batch(self, texts, language, voice=None, rate=None, max_workers=8, timeout=None):
+        if not texts:
+            return []
+        voice = voice or self.default_voice(language)
+        return run_on_edge_loop(self._synthesize_all(texts, language, voice, rate, max_workers, timeout))
+
+@register_engine
+class EspeakEngine(TTSEngine):
+    """
+    Local espeak-ng (or espeak) synthesizer
+    
+    Needs no network, so the whole TTS path can be run and load-tested on an
+    air-gapped machine. Output is WAV at 22.05 kHz.
+    """
+    
+    name = "espeak"
+    output_format = "wav"
+    offline = True
+    supports_rate = True
+    
+    # espeak-ng default speaking rate in words per minute
+    BASE_WPM = 175
+    
+    @property
+    def binary(self):
+        return shutil.which('espeak-ng') or shutil.which('espeak')
+    
+    def available(self):
+        return self.binary is not None
+    
+    def voices(self, language=None):
+        cmd = [self.binary, f'--voices={language}' if language else '--voices']
+        result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+        
+        # Pty Language Age/Gender VoiceName File Other Languages
+        voices = []
+        for line in result.stdout.splitlines()[1:]:
+            parts = line.split()
+            if len(parts) >= 4:
+                voices.append({'name': parts[1], 'language': parts[1], 'description': parts[3]})
+        return voices
+    
+    def default_voice(self, language):
+        return language
+    
+    def synthesize(self, text, language, voice=None, rate=None, timeout=None):
+        if self.binary is None:
+            raise RuntimeError("espeak-ng is not installed")
+        
+        cmd = [self.binary, '--stdout', '-v', voice or language,
+               '-s', str(int(self.BASE_WPM * (rate or 1.0))), text]
+        try:
+            result = subprocess.run(cmd, capture_output=True, check=True, timeout=timeout)
+        except subprocess.TimeoutExpired as e:
+            raise TimeoutError(f"espeak timed out after {timeout}s") from e
+        return result.stdout
+
+def main():
+    parser = argparse.ArgumentParser(description="TTS engine and voice discovery")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    
+    subparsers.add_parser('list', help="registered engines and their capabilities")
+    
+    voices_parser = subparsers.add_parser('voices', help="voices offered by an engine")
+    voices_parser.add_argument('engine', choices=list(ENGINES))
+    voices_parser.add_argument('--language', default=None)
+    
+    args = parser.parse_args()
+    
+    if args.command == 'list':
+        print(f"{'Engine':<10}{'Available':>11}{'Offline':>9}{'Rate':>6}{'Format':>8}")
+        for caps in list_engines():
+            print(f"{caps['name']:<10}{str(caps['available']):>11}{str(caps['offline']):>9}"
+                  f"{str(caps['supports_rate']):>6}{caps['output_format']:>8}")
+    
+    elif args.command == 'voices':
+        for voice in get_engine(args.engine).voices(args.language):
+            print(f"{voice['name']:<36}{voice['language']:<10}{voice['description']}")
+
+if __name__ == "__main__":
+    main()
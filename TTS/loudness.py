@@ -0,0 +1,151 @@
+import functools
+import os
+import subprocess
+import tempfile
+
+import numpy as np
+from pydub import AudioSegment
+
+from TTS.timeline import SAMPLE_RATE
+
+# ============================================================================
+# LOUDNESS MATCHING
+# ============================================================================
+#
+# ITU-R BS.1770 style integrated loudness on sample arrays: K-weighting
+# (applied as a frequency response in the FFT domain), 400 ms blocks with 75%
+# overlap, an absolute gate at -70 LUFS and a relative gate 10 LU below the
+# ungated level. Used to bring every TTS clip to a common level while the
+# timeline is assembled, instead of a two-pass ffmpeg loudnorm afterwards.
+
+DEFAULT_TARGET_LUFS = -20.0  # suggested loudness_target; levels are left alone by default
+ABSOLUTE_GATE_LUFS = -70.0
+RELATIVE_GATE_LU = -10.0
+BLOCK_MS = 400
+STEP_MS = 100
+
+# BS.1770 K-weighting stages (high shelf, then high pass) as analog prototypes,
+# discretized with the bilinear transform so they can be built for any sample
+# rate (at 48 kHz this reproduces the coefficients given in the standard)
+SHELF_GAIN_DB = 3.999843853973347
+SHELF_Q = 0.7071752369554196
+SHELF_FC = 1681.974450955533
+SHELF_VB_EXPONENT = 0.4996667741545416
+HIGHPASS_Q = 0.5003270373238773
+HIGHPASS_FC = 38.13547087602444
+
+def k_weighting_coefficients(frame_rate):
+    """(b, a) biquad coefficients of both K-weighting stages at frame_rate"""
+    K = np.tan(np.pi * SHELF_FC / frame_rate)
+    Vh = 10 ** (SHELF_GAIN_DB / 20)
+    Vb = Vh ** SHELF_VB_EXPONENT
+    a0 = 1 + K / SHELF_Q + K * K
+    shelf = (
+        [(Vh + Vb * K / SHELF_Q + K * K) / a0, 2 * (K * K - Vh) / a0,
+         (Vh - Vb * K / SHELF_Q + K * K) / a0],
+        [1.0, 2 * (K * K - 1) / a0, (1 - K / SHELF_Q + K * K) / a0]
+    )
+    
+    K = np.tan(np.pi * HIGHPASS_FC / frame_rate)
+    a0 = 1 + K / HIGHPASS_Q + K * K
+    highpass = (
+        [1.0, -2.0, 1.0],
+        [1.0, 2 * (K * K - 1) / a0, (1 - K / HIGHPASS_Q + K * K) / a0]
+    )
+    
+    return [shelf, highpass]
+
+@functools.lru_cache(maxsize=32)
+def k_weighting_response(n_fft, frame_rate):
+    """Complex K-weighting frequency response on the rfft bins of an n_fft transform"""
+    z_inv = np.exp(-2j * np.pi * np.arange(n_fft // 2 + 1) / n_fft)
+    response = np.ones(n_fft // 2 + 1, dtype=np.complex128)
+    for b, a in k_weighting_coefficients(frame_rate):
+        response *= (b[0] + b[1] * z_inv + b[2] * z_inv ** 2) / (a[0] + a[1] * z_inv + a[2] * z_inv ** 2)
+    return response
+
+def k_weight(samples, frame_rate):
+    """K-weighted float signal (samples scaled to [-1, 1])"""
+    x = np.asarray(samples, dtype=np.float64) / 32768
+    # Zero padding (rounded up to a power of two) keeps the filter tail from wrapping around
+    n_fft = 1 << (len(x) + frame_rate // 10).bit_length()
+    return np.fft.irfft(np.fft.rfft(x, n_fft) * k_weighting_response(n_fft, frame_rate), n_fft)[:len(x)]
+
+def integrated_loudness(samples, frame_rate=SAMPLE_RATE):
+    """Gated integrated loudness of a mono sample array in LUFS (-inf for silence)"""
+    if len(samples) == 0:
+        return float('-inf')
+    
+    y = k_weight(samples, frame_rate)
+    block = int(frame_rate * BLOCK_MS / 1000)
+    step = int(frame_rate * STEP_MS / 1000)
+    
+    # Mean square of every block from one cumulative sum
+    energy = np.concatenate([[0.0], np.cumsum(y ** 2)])
+    if len(y) <= block:
+        powers = np.array([energy[-1] / len(y)])
+    else:
+        starts = np.arange(0, len(y) - block + 1, step)
+        powers = (energy[starts + block] - energy[starts]) / block
+    
+    with np.errstate(divide='ignore'):
+        levels = -0.691 + 10 * np.log10(powers)
+    
+    gated = powers[levels > ABSOLUTE_GATE_LUFS]
+    if len(gated) == 0:
+        return float('-inf')
+    
+    relative_gate = -0.691 + 10 * np.log10(gated.mean()) + RELATIVE_GATE_LU
+    gated = powers[levels > max(relative_gate, ABSOLUTE_GATE_LUFS)]
+    return float(-0.691 + 10 * np.log10(gated.mean()))
+
+def match_gain_db(samples, target_lufs, frame_rate=SAMPLE_RATE, max_gain_db=20.0, peak_dbfs=-1.0):
+    """
+    Gain that brings samples to target_lufs
+    
+    The gain is limited to +/- max_gain_db and so the peak stays below
+    peak_dbfs; silent clips get 0 dB.
+    """
+    loudness = integrated_loudness(samples, frame_rate)
+    if not np.isfinite(loudness):
+        return 0.0
+    
+    gain = float(np.clip(target_lufs - loudness, -max_gain_db, max_gain_db))
+    peak = np.abs(np.asarray(samples, dtype=np.int32)).max() / 32768
+    if peak > 0:
+        gain = min(gain, peak_dbfs - 20 * np.log10(peak))
+    return gain
+
+def apply_gain(samples, gain_db):
+    """Scale an int16 sample array by gain_db with clipping"""
+    if gain_db == 0:
+        return samples
+    scaled = np.asarray(samples, dtype=np.float32) * np.float32(10 ** (gain_db / 20))
+    return np.clip(np.round(scaled), -32768, 32767).astype(np.int16)
+
+class ReferenceAudio:
+    """
+    Original audio decoded once to a memory-mapped mono PCM array, used to
+    measure the level of each segment's time range
+    """
+    
+    def __init__(self, audio_file, frame_rate=SAMPLE_RATE):
+        self.frame_rate = frame_rate
+        
+        fd, raw_file = tempfile.mkstemp(suffix=".pcm")
+        os.close(fd)
+        try:
+            cmd = [AudioSegment.converter, '-y', '-loglevel', 'error', '-i', audio_file,
+                   '-f', 's16le', '-ar', str(frame_rate), '-ac', '1', raw_file]
+            subprocess.run(cmd, capture_output=True, check=True)
+            self.samples = (np.memmap(raw_file, dtype=np.int16, mode='r')
+                            if os.path.getsize(raw_file) else np.zeros(0, dtype=np.int16))
+        finally:
+            # The mapping stays valid after the file is unlinked
+            os.remove(raw_file)
+    
+    def loudness(self, start_ms, end_ms):
+        """Integrated loudness of [start_ms, end_ms) in LUFS"""
+        start = int(start_ms * self.frame_rate / 1000)
+        end = int(end_ms * self.frame_rate / 1000)
+        return integrated_loudness(self.samples[start:end], self.frame_rate)
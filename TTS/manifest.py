@@ -0,0 +1,42 @@
+import json
+import os
+
+# ============================================================================
+# RENDER MANIFEST
+# ============================================================================
+#
+# An incremental render keeps three things next to its output file:
+#   <output>.manifest.json  settings and placement of every segment
+#   <output>.pcm            the whole timeline as raw s16le PCM
+#   <output>.parts/         encoded parts the output is concatenated from
+# See TTS.redub.
+
+MANIFEST_VERSION = 1
+
+def manifest_file(output_audio):
+    return f"{output_audio}.manifest.json"
+
+def sidecar_file(output_audio):
+    return f"{output_audio}.pcm"
+
+def parts_dir(output_audio):
+    return f"{output_audio}.parts"
+
+def load_manifest(output_audio):
+    """Manifest stored with a previous render, or None if there is no usable one"""
+    try:
+        with open(manifest_file(output_audio), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+    
+    if manifest.get('version') != MANIFEST_VERSION or not os.path.exists(sidecar_file(output_audio)):
+        return None
+    return manifest
+
+def save_manifest(output_audio, manifest):
+    manifest = dict(manifest, version=MANIFEST_VERSION)
+    temp_file = f"{manifest_file(output_audio)}.tmp"
+    with open(temp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    os.replace(temp_file, manifest_file(output_audio))
@@ -0,0 +1,370 @@
+import argparse
+import asyncio
+import json
+import struct
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from pydub import AudioSegment
+
+from TTS import resilience
+from TTS import tts
+from TTS import timeline
+from TTS.cache import TTSCache, DEFAULT_CACHE_DIR
+from TTS.engines import get_engine, run_on_edge_loop
+from TTS.resilience import SynthesisPolicy
+
+# ============================================================================
+# STREAMING PREVIEW
+# ============================================================================
+#
+# Plays a dub while it is still being synthesized. Engine audio chunks are
+# decoded as they arrive and appended to a growing WAV file, which is also
+# served as a chunked HTTP stream (open the URL in a browser, mpv or VLC).
+#
+#   python -m TTS.preview Media/transcription_translated_ml.json --serve
+#
+# The preview places segments back to back with the 'shift' overrun policy
+# and does not time-stretch (speaking rates are still predicted up front),
+# so its timing can drift from the final render.
+
+def wav_header(frame_rate, data_bytes=0xFFFFFFFF - 36):
+    """44-byte PCM WAV header for mono int16 audio (default size: open-ended stream)"""
+    return (b'RIFF' + struct.pack('<I', min(data_bytes + 36, 0xFFFFFFFF)) + b'WAVE'
+            + b'fmt ' + struct.pack('<IHHIIHH', 16, 1, 1, frame_rate, frame_rate * 2, 2, 16)
+            + b'data' + struct.pack('<I', data_bytes))
+
+class PreviewWriter:
+    """
+    Appends PCM to a WAV file that can be played while it grows
+    
+    The header is written with an open-ended size and fixed up on close().
+    """
+    
+    def __init__(self, output_file, frame_rate=timeline.SAMPLE_RATE):
+        self.output_file = output_file
+        self.frame_rate = frame_rate
+        self.data_bytes = 0
+        self.finished = threading.Event()
+        self.file = open(output_file, 'wb')
+        self.file.write(wav_header(frame_rate))
+        self.file.flush()
+    
+    @property
+    def position_ms(self):
+        return self.data_bytes // 2 * 1000 // self.frame_rate
+    
+    def write(self, pcm):
+        """Append s16le mono PCM bytes"""
+        self.file.write(pcm)
+        self.file.flush()
+        self.data_bytes += len(pcm)
+    
+    def pad_to(self, position_ms):
+        """Append silence up to position_ms"""
+        samples = int(position_ms * self.frame_rate / 1000) - self.data_bytes // 2
+        if samples > 0:
+            self.write(bytes(2 * samples))
+    
+    def close(self):
+        self.file.seek(0)
+        self.file.write(wav_header(self.frame_rate, self.data_bytes))
+        self.file.close()
+        self.finished.set()
+
+class PreviewHandler(BaseHTTPRequestHandler):
+    """Serves the preview WAV as a chunked stream that follows the file as it grows"""
+    
+    def do_GET(self):
+        writer = self.server.writer
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'audio/wav')
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        
+        try:
+            with open(writer.output_file, 'rb') as f:
+                while True:
+                    # Check before reading so the last bytes are sent after close()
+                    finished = writer.finished.is_set()
+                    data = f.read(65536)
+                    if data:
+                        self.wfile.write(f"{len(data):X}\r\n".encode() + data + b"\r\n")
+                        self.wfile.flush()
+                    elif finished:
+                        break
+                    else:
+                        time.sleep(0.05)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    
+    def log_message(self, format, *args):
+        pass
+
+def serve_preview(writer, port=8765):
+    """Start a local HTTP server streaming the preview; returns (server, url)"""
+    server = ThreadingHTTPServer(('127.0.0.1', port), PreviewHandler)
+    server.daemon_threads = True
+    server.writer = writer
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/preview.wav"
+
+async def decode_stream(chunks, format, frame_rate=timeline.SAMPLE_RATE):
+    """Decode an async iterator of encoded audio chunks to s16le PCM blocks as they arrive"""
+    process = await asyncio.create_subprocess_exec(
+        AudioSegment.converter, '-loglevel', 'error',
+        '-f', format, '-i', 'pipe:0',
+        '-f', 's16le', '-ar', str(frame_rate), '-ac', '1', 'pipe:1',
+        stdin=asyncio.subprocess.PIPE, stdout=asyncio.subprocess.PIPE)
+    
+    async def feed():
+        try:
+            async for chunk in chunks:
+                process.stdin.write(chunk)
+                await process.stdin.drain()
+        finally:
+            process.stdin.close()
+    
+    feeder = asyncio.ensure_future(feed())
+    try:
+        while True:
+            pcm = await process.stdout.read(8192)
+            if not pcm:
+                break
+            yield pcm
+        await feeder
+    finally:
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+
+async def _stream_clip(queue, text, language, rate, tts_engine, policy):
+    """
+    Stream one clip's PCM blocks onto its queue under the policy's deadline,
+    retries and fallback engines; returns (engine name, PCM blocks)
+    
+    A request is only retried or failed over while none of its audio has been
+    queued, so no part of a segment is played twice.
+    """
+    error = None
+    for position, name in enumerate([tts_engine] + policy.fallbacks):
+        engine = get_engine(name)
+        breaker = resilience.get_breaker(name)
+        if position > 0:
+            print(f"  Failing over to {name}: {error}")
+            policy.count('failovers')
+        
+        for attempt in range(policy.retries + 1):
+            if not breaker.allow():
+                error = resilience.CircuitOpenError(f"Circuit breaker open for TTS engine {name}")
+                break
+            if attempt > 0:
+                policy.count('retries')
+                await asyncio.sleep(resilience.backoff_delay(attempt))
+            
+            blocks = []
+            
+            async def consume():
+                async for pcm in decode_stream(engine.stream(text, language, engine.default_voice(language), rate),
+                                               engine.output_format):
+                    blocks.append(pcm)
+                    await queue.put(pcm)
+            
+            try:
+                await asyncio.wait_for(consume(), policy.timeout)
+                breaker.record_success()
+                return name, blocks
+            except asyncio.TimeoutError:
+                policy.count('timeouts')
+                breaker.record_failure()
+                error = TimeoutError(f"{name} stream timed out after {policy.timeout}s")
+            except resilience.PERMANENT_ERRORS as e:
+                error = e
+                break
+            except Exception as e:
+                breaker.record_failure()
+                error = e
+            
+            if blocks:
+                # Part of the clip is already queued for playback
+                policy.count('failures')
+                raise error
+    
+    policy.count('failures')
+    raise error
+
+async def _produce(queue, text, language, rate, cache, tts_engine, policy):
+    """
+    Put PCM blocks of one segment on its queue, then None (or the exception raised)
+    
+    A fully streamed clip is stored in the TTS cache (under the engine that
+    made it), so a later render does not synthesize it again. Cache reads and
+    writes touch the disk and run on the default executor, off the event loop
+    shared with the engines.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+        audio = None
+        if cache is not None:
+            voice = get_engine(tts_engine).default_voice(language)
+            audio = await loop.run_in_executor(None, cache.get, text, language, tts_engine, voice, rate)
+        
+        if audio is not None:
+            await queue.put(timeline.audio_to_samples(audio).tobytes())
+        else:
+            name, blocks = await _stream_clip(queue, text, language, rate, tts_engine, policy)
+            if cache is not None and blocks:
+                clip = AudioSegment(data=b''.join(blocks), sample_width=2,
+                                    frame_rate=timeline.SAMPLE_RATE, channels=1)
+                await loop.run_in_executor(None, cache.put, text, language, name, clip,
+                                           get_engine(name).default_voice(language), rate)
+        await queue.put(None)
+    except Exception as e:
+        await queue.put(e)
+
+async def _run_preview(writer, jobs, items, tts_engine, cache, policy, lookahead, end_ms):
+    start = time.monotonic()
+    metrics = {'time_to_first_audio_s': None, 'segments': 0, 'failed': 0}
+    
+    queues = [asyncio.Queue() for _ in jobs]
+    tasks = {}
+    
+    def launch(idx):
+        if idx < len(jobs) and idx not in tasks:
+            text, language, rate = tts._unpack_job(jobs[idx])
+            tasks[idx] = asyncio.ensure_future(
+                _produce(queues[idx], text, language, rate, cache, tts_engine, policy))
+    
+    for idx in range(lookahead):
+        launch(idx)
+    
+    for idx, item in enumerate(items):
+        launch(idx + lookahead)
+        writer.pad_to(tts.parse_timestamp_to_ms(item['start_time']))
+        
+        while True:
+            block = await queues[idx].get()
+            if block is None:
+                metrics['segments'] += 1
+                print(f"  ✓ Segment {item['segment']} streamed ({writer.position_ms/1000:.1f}s of audio "
+                      f"after {time.monotonic() - start:.1f}s)")
+                break
+            if isinstance(block, Exception):
+                print(f"  ✗ Error on segment {item['segment']}: {block}")
+                metrics['failed'] += 1
+                break
+            
+            if metrics['time_to_first_audio_s'] is None:
+                metrics['time_to_first_audio_s'] = time.monotonic() - start
+                print(f"  First audio after {metrics['time_to_first_audio_s']:.2f}s")
+            writer.write(block)
+        
+        tasks.pop(idx).cancel()
+    
+    writer.pad_to(end_ms)
+    metrics['seconds'] = time.monotonic() - start
+    metrics['audio_seconds'] = writer.position_ms / 1000
+    return metrics
+
+def create_preview(json_file, output_file="preview.wav", language='ml', tts_engine='edge',
+                   use_original=False, max_speedup=1.5, lookahead=8, serve=False, port=8765,
+                   cache_dir=DEFAULT_CACHE_DIR, request_timeout=resilience.DEFAULT_TIMEOUT,
+                   retries=resilience.DEFAULT_RETRIES, fallback_engines=()):
+    """
+    Stream a dub preview into a growing WAV file (and optionally over HTTP)
+    
+    Segments are synthesized lookahead at a time; their chunks are decoded and
+    appended as soon as they arrive, so playback can start right after the
+    first segment begins streaming. Clips already in the TTS cache are used
+    directly, and newly streamed clips are added to it for the final render.
+    
+    Parameters:
+    - json_file: path to transcription JSON
+    - output_file: preview WAV path
+    - language, tts_engine, use_original, max_speedup: as for
+      tts.create_perfectly_synced_tts
+    - lookahead: segments synthesized ahead of playback order
+    - serve: also stream the preview at http://127.0.0.1:port/preview.wav
+    - cache_dir: TTS clip cache directory (None disables caching)
+    - request_timeout, retries, fallback_engines: as for
+      tts.create_perfectly_synced_tts; request_timeout is the deadline for
+      streaming a whole clip, and a clip is only retried or failed over
+      while none of its audio has been played
+    
+    With serve=True the HTTP server keeps running on a daemon thread after the
+    preview is complete, so listeners can finish; its URL is returned as 'url'.
+    
+    Returns dict with time_to_first_audio_s, seconds, audio_seconds, segments,
+    failed and the synthesis counters retries, timeouts and failovers
+    """
+    print(f"Loading transcription from {json_file}")
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    end_ms = tts.parse_timestamp_to_ms(data['transcription'][-1]['end_time'])
+    cache = TTSCache(cache_dir) if cache_dir else None
+    policy = SynthesisPolicy(request_timeout, retries, fallback_engines)
+    
+    jobs, items = tts.transcription_jobs(data, language, use_original)
+    jobs = tts.predict_rates(jobs, items, tts_engine, cache, max_speedup)
+    
+    writer = PreviewWriter(output_file)
+    url = None
+    if serve:
+        _, url = serve_preview(writer, port)
+        print(f"Streaming preview at {url}")
+    print(f"Writing preview to {output_file}")
+    
+    try:
+        metrics = run_on_edge_loop(_run_preview(writer, jobs, items, tts_engine, cache, policy,
+                                                lookahead, end_ms))
+    finally:
+        writer.close()
+        if cache is not None:
+            cache.flush()
+    
+    print(f"\n{'='*70}")
+    print("PREVIEW COMPLETE")
+    print(f"{'='*70}")
+    if metrics['time_to_first_audio_s'] is not None:
+        print(f"Time to first audio: {metrics['time_to_first_audio_s']:.2f}s")
+    print(f"Streamed {metrics['audio_seconds']:.1f}s of audio in {metrics['seconds']:.1f}s "
+          f"({metrics['segments']} segments, {metrics['failed']} failed)")
+    counters = policy.counters
+    print(f"TTS requests: {counters['retries']} retried, {counters['timeouts']} timed out, "
+          f"{counters['failovers']} failed over")
+    print(f"{'='*70}")
+    
+    metrics.update({key: policy.counters[key] for key in ('retries', 'timeouts', 'failovers')})
+    metrics['url'] = url
+    return metrics
+
+def main():
+    parser = argparse.ArgumentParser(description="Stream a dub preview while it is synthesized")
+    parser.add_argument('json_file')
+    parser.add_argument('--output', default="preview.wav")
+    parser.add_argument('--language', default='ml')
+    parser.add_argument('--engine', default='edge')
+    parser.add_argument('--use-original', action='store_true')
+    parser.add_argument('--lookahead', type=int, default=8)
+    parser.add_argument('--serve', action='store_true', help="stream over HTTP as well")
+    parser.add_argument('--port', type=int, default=8765)
+    args = parser.parse_args()
+    
+    metrics = create_preview(args.json_file, args.output, args.language, args.engine,
+                             args.use_original, lookahead=args.lookahead, serve=args.serve,
+                             port=args.port)
+    
+    if metrics['url']:
+        print(f"Still serving {metrics['url']}, press Ctrl+C to stop")
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+
+if __name__ == "__main__":
+    main()
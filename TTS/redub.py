@@ -0,0 +1,363 @@
+import json
+import os
+import shutil
+import subprocess
+import time
+
+import numpy as np
+from pydub import AudioSegment
+
+from TTS import alignment
+from TTS import loudness
+from TTS import manifest
+from TTS import resilience
+from TTS import tts
+from TTS.cache import TTSCache, DEFAULT_CACHE_DIR
+from TTS.resilience import SynthesisPolicy
+
+# ============================================================================
+# INCREMENTAL RE-DUB
+# ============================================================================
+#
+# After a render with create_perfectly_synced_tts(..., incremental=True), an
+# edited transcription can be patched into the existing output:
+#
+#   tts.create_perfectly_synced_tts(json_file, output, incremental=True)
+#   # ... fix a line in json_file ...
+#   redub.redub_changed_segments(json_file, output)
+#
+# Only changed segments are synthesized. Their time ranges are rewritten in
+# the PCM sidecar (np.memmap), and only the output parts that overlap those
+# ranges are encoded again. The output is the stream-copy concatenation of
+# the parts. Part boundaries are put in silent gaps between segments.
+
+# Target length of one encoded part
+PART_MS = 30000
+
+# libmp3lame primes every part with MP3_ENCODER_DELAY samples, and every part
+# after the first keeps its Xing info frame, which decodes as one frame of
+# silence once stream-copied into the joined file. Parts are cut on frame
+# boundaries and drop that many samples of their own silent edges, so the
+# joined output keeps the exact timeline length and timing.
+MP3_ENCODER_DELAY = 1105
+
+def mp3_frame_samples(frame_rate):
+    """Samples per MP3 frame (MPEG-1 at 32 kHz and above, MPEG-2 below)"""
+    return 1152 if frame_rate >= 32000 else 576
+
+# Settings that must match the manifest for a patch to be valid
+MANIFEST_SETTINGS = ['language', 'tts_engine', 'use_original', 'max_speedup', 'stretch_method',
+                     'loudness_target', 'loudness_reference', 'alignment']
+
+# An unchanged segment whose solved start is within this of where it was
+# placed before (stretched clip lengths are only ms-accurate) stays put
+PLACEMENT_TOLERANCE_MS = 2
+
+def split_parts(segments, total_samples, frame_rate, part_ms=PART_MS):
+    """
+    Choose part boundaries (sample offsets) in the gaps between placed segments
+    
+    Boundaries sit on MP3 frame boundaries, with enough silence on either
+    side for the samples encode_part drops.
+    
+    Returns list of (start, end) covering [0, total_samples)
+    """
+    part_samples = int(part_ms * frame_rate / 1000)
+    frame = mp3_frame_samples(frame_rate)
+    parts = []
+    start = 0
+    
+    for prev, nxt in zip(segments, segments[1:]):
+        gap_start, gap_end = prev['placed'][1], nxt['placed'][0]
+        boundary = (gap_start + gap_end) // 2 // frame * frame
+        if (gap_start + MP3_ENCODER_DELAY <= boundary <= gap_end - frame
+                and boundary - start >= part_samples):
+            parts.append((start, boundary))
+            start = boundary
+    
+    parts.append((start, total_samples))
+    return parts
+
+def encode_part(pcm, start, end, part_file, frame_rate, bitrate="192k", first=True, last=True):
+    """
+    Encode samples [start, end) of the sidecar into one part file
+    
+    All but the first part drop one frame at the start and all but the last
+    drop MP3_ENCODER_DELAY samples at the end, so the part occupies exactly
+    end - start samples of the joined output.
+    """
+    if not first:
+        start += mp3_frame_samples(frame_rate)
+    if not last:
+        end -= MP3_ENCODER_DELAY
+    
+    cmd = [
+        AudioSegment.converter, '-y', '-loglevel', 'error',
+        '-f', 's16le', '-ar', str(frame_rate), '-ac', '1', '-i', 'pipe:0',
+        '-f', 'mp3', '-b:a', bitrate,
+        part_file
+    ]
+    subprocess.run(cmd, input=np.asarray(pcm[start:end]).tobytes(), capture_output=True, check=True)
+
+def concat_parts(part_files, output_file):
+    """Join encoded parts into output_file without re-encoding"""
+    list_file = f"{output_file}.parts.txt"
+    temp_file = f"{output_file}.tmp.mp3"
+    
+    with open(list_file, 'w', encoding='utf-8') as f:
+        for part_file in part_files:
+            f.write(f"file '{os.path.abspath(part_file)}'\n")
+    
+    cmd = [
+        AudioSegment.converter, '-y', '-loglevel', 'error',
+        '-f', 'concat', '-safe', '0', '-i', list_file,
+        '-c', 'copy', temp_file
+    ]
+    try:
+        subprocess.run(cmd, capture_output=True, check=True)
+        os.replace(temp_file, output_file)
+    finally:
+        os.remove(list_file)
+        if os.path.exists(temp_file):
+            os.remove(temp_file)
+
+def overlaps(span, ranges):
+    return any(span[0] < end and start < span[1] for start, end in ranges)
+
+def redub_changed_segments(json_file, output_audio="synced_output.mp3", language='ml',
+                           tts_engine='gtts', max_speedup=1.5, use_original=False,
+                           max_workers=8, cache_dir=DEFAULT_CACHE_DIR, stretch_method='wsola',
+                           part_ms=PART_MS, loudness_target=None,
+                           loudness_reference=None, max_advance_ms=alignment.DEFAULT_MAX_ADVANCE_MS,
+                           max_borrow_ms=alignment.DEFAULT_MAX_BORROW_MS,
+                           min_pause_ms=alignment.DEFAULT_MIN_PAUSE_MS,
+                           request_timeout=resilience.DEFAULT_TIMEOUT,
+                           retries=resilience.DEFAULT_RETRIES, fallback_engines=()):
+    """
+    Patch edited segments of a transcription into an existing synced TTS output
+    
+    Segments are matched by segment number and count as changed when their
+    text or timing differs from the manifest. Every segment is placed again
+    with alignment.AlignmentSolver; unchanged segments keep their audio and
+    speaking rate, and ones that end up somewhere else because of a changed
+    clip are moved using the TTS cache. Without a usable manifest
+    (or with different settings) the whole output is rendered instead.
+    
+    Parameters:
+    - json_file: path to the edited transcription JSON
+    - output_audio: output rendered earlier with incremental=True
+    - other parameters: as for tts.create_perfectly_synced_tts
+    - part_ms: target length of the encoded parts the output is built from
+    
+    Returns dict with segments changed/moved/removed/touched and parts re-encoded
+    """
+    start_time = time.monotonic()
+    previous = manifest.load_manifest(output_audio)
+    
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    duration_ms = tts.parse_timestamp_to_ms(data['transcription'][-1]['end_time'])
+    
+    settings = {'language': language, 'tts_engine': tts_engine, 'use_original': use_original,
+                'max_speedup': max_speedup, 'stretch_method': stretch_method,
+                'loudness_target': loudness_target, 'loudness_reference': loudness_reference,
+                'alignment': {'max_advance_ms': max_advance_ms, 'max_borrow_ms': max_borrow_ms,
+                              'min_pause_ms': min_pause_ms}}
+    
+    if (previous is None or previous['overrun'] != 'shift' or previous['duration_ms'] != duration_ms
+            or any(previous.get(key) != settings[key] for key in MANIFEST_SETTINGS)):
+        print("No matching render manifest, rendering every segment")
+        result = {}
+        tts.create_perfectly_synced_tts(json_file, output_audio, language, tts_engine, max_speedup,
+                                        use_original, max_workers, cache_dir=cache_dir,
+                                        stretch_method=stretch_method, incremental=True, part_ms=part_ms,
+                                        loudness_target=loudness_target,
+                                        loudness_reference=loudness_reference,
+                                        max_advance_ms=max_advance_ms, max_borrow_ms=max_borrow_ms,
+                                        min_pause_ms=min_pause_ms, request_timeout=request_timeout,
+                                        retries=retries, fallback_engines=fallback_engines,
+                                        report=result)
+        report = {'full_render': True, 'segments_touched': result['segments_processed']}
+        report.update({key: result[key] for key in ('parts_encoded', 'parts_total', 'encoded_seconds')})
+        return report
+    
+    frame_rate = previous['frame_rate']
+    
+    def ms_to_samples(ms):
+        return int(round(ms * frame_rate / 1000))
+    
+    def samples_to_ms(samples):
+        return int(round(samples * 1000 / frame_rate))
+    
+    total = ms_to_samples(duration_ms)
+    old = {seg['segment']: seg for seg in previous['segments']}
+    
+    # Diff the transcription against the manifest
+    jobs, items = tts.transcription_jobs(data, language, use_original)
+    changed = []
+    
+    for idx, (job, item) in enumerate(zip(jobs, items)):
+        text = tts._unpack_job(job)[0]
+        seg = old.get(item['segment'])
+        if (seg is None or seg['text'] != text
+                or seg['start_ms'] != tts.parse_timestamp_to_ms(item['start_time'])
+                or seg['end_ms'] != tts.parse_timestamp_to_ms(item['end_time'])):
+            changed.append(idx)
+        elif seg['rate']:
+            jobs[idx] = (text, language, seg['rate'])
+    
+    changed_set = set(changed)
+    current = {item['segment'] for item in items}
+    removed = [seg for number, seg in old.items() if number not in current]
+    
+    print(f"Changed segments: {len(changed)}, removed: {len(removed)}")
+    
+    cache = TTSCache(cache_dir) if cache_dir else None
+    reference = loudness.ReferenceAudio(loudness_reference, frame_rate) if loudness_reference else None
+    policy = SynthesisPolicy(request_timeout, retries, fallback_engines)
+    changed_jobs = tts.predict_rates([jobs[idx] for idx in changed], [items[idx] for idx in changed],
+                                     tts_engine, cache, max_speedup)
+    for idx, job in zip(changed, changed_jobs):
+        jobs[idx] = job
+    
+    def synthesize(indices):
+        results = tts.synthesize_clips([jobs[idx] for idx in indices], tts_engine, max_workers, cache,
+                                       policy=policy)
+        for idx, result in zip(indices, results):
+            if isinstance(result, Exception):
+                print(f"  ✗ Error on segment {items[idx]['segment']}: {result}")
+        return {idx: result for idx, result in zip(indices, results) if not isinstance(result, Exception)}
+    
+    def fit(raw, targets):
+        indices = list(raw)
+        fitted, _ = tts.fit_clips([(raw[idx], targets[idx]) for idx in indices],
+                                  max_speedup, stretch_method)
+        leveled, _ = tts.level_clips(fitted, [slots[idx] for idx in indices],
+                                     loudness_target, reference, frame_rate)
+        return dict(zip(indices, leveled))
+    
+    raw = synthesize(changed)
+    
+    # Solve placement again for every segment; unchanged ones only move when
+    # a changed clip now takes different room
+    slots = [(tts.parse_timestamp_to_ms(item['start_time']), tts.parse_timestamp_to_ms(item['end_time']))
+             for item in items]
+    solver = alignment.AlignmentSolver(slots, alignment.pause_gaps(data, items, slots), duration_ms,
+                                       max_speedup, max_advance_ms, max_borrow_ms, min_pause_ms)
+    placements = []
+    moved = []
+    targets = {}
+    
+    for idx, (job, item) in enumerate(zip(jobs, items)):
+        text = tts._unpack_job(job)[0]
+        seg = old.get(item['segment'])
+        
+        if idx in raw:
+            length_ms = len(raw[idx])
+        elif idx in changed_set:
+            continue  # synthesis failed
+        else:
+            length_ms = samples_to_ms(seg['placed'][1] - seg['placed'][0])
+        
+        start_ms, factor = solver.place(idx, length_ms)
+        start = min(ms_to_samples(start_ms), total)
+        
+        if idx not in changed_set and abs(start - seg['placed'][0]) <= ms_to_samples(PLACEMENT_TOLERANCE_MS):
+            start, end = seg['placed']
+            solver.cursor = samples_to_ms(end)
+        else:
+            if idx not in changed_set:
+                moved.append(idx)
+            targets[idx] = int(length_ms / factor)
+            end = min(start + ms_to_samples(targets[idx]), total)
+        
+        placements.append({
+            'segment': item['segment'],
+            'text': text,
+            'rate': tts._unpack_job(jobs[idx])[2],
+            'start_ms': slots[idx][0],
+            'end_ms': slots[idx][1],
+            'placed': [start, end],
+            'index': idx
+        })
+    
+    raw.update(synthesize(moved))
+    clips = fit(raw, targets)
+    
+    # Patch the PCM sidecar in place
+    pcm = np.memmap(manifest.sidecar_file(output_audio), dtype=np.int16, mode='r+')
+    touched = {items[idx]['segment'] for idx in changed + moved}
+    dirty = []
+    
+    for seg in removed + [old[number] for number in touched if number in old]:
+        pcm[seg['placed'][0]:seg['placed'][1]] = 0
+        dirty.append(tuple(seg['placed']))
+    
+    for placement in placements:
+        idx = placement.pop('index')
+        if idx in clips:
+            start, end = placement['placed']
+            pcm[start:end] = clips[idx][:end - start]
+            placement['placed'] = [start, start + min(len(clips[idx]), end - start)]
+            dirty.append(tuple(placement['placed']))
+    pcm.flush()
+    del pcm
+    
+    updated = dict(previous, source=json_file, segments=placements)
+    report = {
+        'full_render': False,
+        'segments_changed': len(changed),
+        'segments_moved': len(moved),
+        'segments_removed': len(removed),
+        'segments_touched': len(touched) + len(removed)
+    }
+    report.update(write_parts(output_audio, updated, dirty, part_ms))
+    report['seconds'] = time.monotonic() - start_time
+    
+    print(f"\n{'='*70}")
+    print("INCREMENTAL RE-DUB COMPLETE")
+    print(f"{'='*70}")
+    print(f"Segments touched: {report['segments_touched']} "
+          f"(changed {report['segments_changed']}, moved {report['segments_moved']}, "
+          f"removed {report['segments_removed']}) of {len(items)}")
+    print(f"Parts re-encoded: {report['parts_encoded']} of {report['parts_total']} "
+          f"({report['encoded_seconds']:.1f}s of audio)")
+    print(f"Time: {report['seconds']:.1f}s")
+    print(f"{'='*70}")
+    
+    return report
+
+def write_parts(output_audio, render, dirty, part_ms):
+    """
+    Re-encode the parts overlapping dirty sample ranges (all of them when the
+    render has no parts yet or dirty is None), rebuild the output by
+    concatenation and save the manifest
+    """
+    frame_rate = render['frame_rate']
+    pcm = np.memmap(manifest.sidecar_file(output_audio), dtype=np.int16, mode='r')
+    directory = manifest.parts_dir(output_audio)
+    
+    if render.get('parts') is None or dirty is None:
+        shutil.rmtree(directory, ignore_errors=True)
+        parts = [{'file': f"part_{idx:04d}.mp3", 'span': [start, end]}
+                 for idx, (start, end) in enumerate(split_parts(render['segments'], len(pcm),
+                                                                frame_rate, part_ms))]
+        to_encode = parts
+    else:
+        parts = render['parts']
+        to_encode = [part for part in parts if overlaps(part['span'], dirty)]
+    
+    os.makedirs(directory, exist_ok=True)
+    for part in to_encode:
+        encode_part(pcm, part['span'][0], part['span'][1], os.path.join(directory, part['file']),
+                    frame_rate, render['bitrate'], first=part is parts[0], last=part is parts[-1])
+    del pcm
+    
+    concat_parts([os.path.join(directory, part['file']) for part in parts], output_audio)
+    manifest.save_manifest(output_audio, dict(render, parts=parts))
+    
+    return {
+        'parts_encoded': len(to_encode),
+        'parts_total': len(parts),
+        'encoded_seconds': sum(part['span'][1] - part['span'][0] for part in to_encode) / frame_rate
+    }
@@ -0,0 +1,166 @@
+import random
+import threading
+import time
+
+from TTS.engines import get_engine
+
+# ============================================================================
+# REQUEST DEADLINES, RETRIES AND FAILOVER
+# ============================================================================
+#
+# Network engines time out, rate-limit and drop connections. Every request
+# gets a deadline; failed requests are retried a bounded number of times
+# with jittered exponential backoff; and each engine has a circuit breaker
+# that stops sending it requests after repeated failures, so the remaining
+# texts go straight to the next fallback engine instead of waiting out
+# timeouts one by one.
+
+DEFAULT_TIMEOUT = 30.0
+DEFAULT_RETRIES = 2
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 8.0
+
+# Errors a retry cannot fix (unsupported language, bad arguments)
+PERMANENT_ERRORS = (ValueError, TypeError, NotImplementedError)
+
+def backoff_delay(attempt, base=BACKOFF_BASE, maximum=BACKOFF_MAX):
+    """Seconds to wait before retry number attempt (exponential, full jitter)"""
+    return random.uniform(0, min(maximum, base * 2 ** (attempt - 1)))
+
+class CircuitOpenError(RuntimeError):
+    """Raised for requests not sent because the engine's circuit breaker is open"""
+
+class CircuitBreaker:
+    """
+    Per-engine failure switch
+    
+    Opens after failure_threshold consecutive failures; while open, no
+    requests are sent. After reset_after seconds one trial batch is let
+    through (half-open): a success closes the breaker, a failure opens it
+    again.
+    """
+    
+    def __init__(self, failure_threshold=5, reset_after=30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_after = reset_after
+        self.state = 'closed'
+        self.failures = 0
+        self.opened_at = None
+        self.lock = threading.Lock()
+    
+    def allow(self):
+        """Whether requests may be sent now"""
+        with self.lock:
+            if self.state == 'open' and time.monotonic() - self.opened_at >= self.reset_after:
+                self.state = 'half-open'
+            return self.state != 'open'
+    
+    def record_success(self):
+        with self.lock:
+            self.state = 'closed'
+            self.failures = 0
+    
+    def record_failure(self):
+        with self.lock:
+            self.failures += 1
+            if self.state == 'half-open' or self.failures >= self.failure_threshold:
+                self.state = 'open'
+                self.opened_at = time.monotonic()
+
+_breakers = {}
+_breakers_lock = threading.Lock()
+
+def get_breaker(name):
+    """Shared circuit breaker of an engine (state carries over between runs)"""
+    with _breakers_lock:
+        if name not in _breakers:
+            _breakers[name] = CircuitBreaker()
+        return _breakers[name]
+
+class SynthesisPolicy:
+    """
+    Deadline, retry and failover settings for synthesis, plus run counters
+    
+    Parameters:
+    - timeout: seconds per request (None waits indefinitely)
+    - retries: extra attempts per text on the same engine
+    - fallbacks: engine names tried in order for texts the engine could not
+                 synthesize (retries exhausted or circuit open)
+    
+    counters holds retries, timeouts, failovers and failures (texts no
+    engine could synthesize) accumulated over every batch.
+    """
+    
+    def __init__(self, timeout=DEFAULT_TIMEOUT, retries=DEFAULT_RETRIES, fallbacks=()):
+        self.timeout = timeout
+        self.retries = retries
+        self.fallbacks = list(fallbacks)
+        self.counters = {'retries': 0, 'timeouts': 0, 'failovers': 0, 'failures': 0}
+        self.lock = threading.Lock()
+    
+    def count(self, name, n=1):
+        with self.lock:
+            self.counters[name] += n
+    
+    def _attempt(self, name, texts, indices, language, rate, max_workers, results):
+        """Synthesize texts[indices] on one engine with retries; returns indices still failing"""
+        engine = get_engine(name)
+        breaker = get_breaker(name)
+        failed = []
+        attempt = 0
+        
+        while indices:
+            if not breaker.allow():
+                for idx in indices:
+                    results[idx] = CircuitOpenError(f"Circuit breaker open for TTS engine {name}")
+                return sorted(failed + indices)
+            
+            encoded = engine.synthesize_batch([texts[idx] for idx in indices], language, rate=rate,
+                                              max_workers=max_workers, timeout=self.timeout)
+            
+            retry = []
+            for idx, result in zip(indices, encoded):
+                if not isinstance(result, Exception):
+                    breaker.record_success()
+                    results[idx] = (name, result)
+                    continue
+                
+                results[idx] = result
+                if isinstance(result, TimeoutError):
+                    self.count('timeouts')
+                if isinstance(result, PERMANENT_ERRORS):
+                    failed.append(idx)
+                else:
+                    breaker.record_failure()
+                    retry.append(idx)
+            
+            if not retry or attempt >= self.retries:
+                return sorted(failed + retry)
+            
+            attempt += 1
+            self.count('retries', len(retry))
+            time.sleep(backoff_delay(attempt))
+            indices = retry
+        
+        return failed
+    
+    def synthesize_batch(self, tts_engine, texts, language, rate=None, max_workers=8):
+        """
+        Synthesize texts in one language, retrying and failing over as configured
+        
+        Returns list in text order with (engine name, encoded audio bytes), or
+        the last exception raised
+        """
+        results = [None] * len(texts)
+        pending = list(range(len(texts)))
+        
+        for position, name in enumerate([tts_engine] + self.fallbacks):
+            if not pending:
+                break
+            if position > 0:
+                print(f"  Failing over {len(pending)} clip(s) to {name}")
+                self.count('failovers', len(pending))
+            pending = self._attempt(name, texts, pending, language, rate, max_workers, results)
+        
+        self.count('failures', len(pending))
+        return results
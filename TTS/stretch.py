@@ -0,0 +1,120 @@
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from pydub.effects import speedup
+
+from TTS.timeline import audio_to_samples, samples_to_audio
+
+STRETCH_METHODS = ['wsola', 'pydub']
+
+def wsola_stretch(samples, speed, frame_rate, frame_ms=30, search_ms=8):
+    """
+    Pitch-preserving time-stretch with WSOLA (waveform similarity overlap-add)
+    
+    Frames are read every frame/2 * speed input samples and overlap-added
+    every frame/2 output samples with a Hann window. Each frame is shifted by
+    up to search_ms to best match the natural continuation of the previous
+    frame, which avoids the phase jumps of plain chunk-and-crossfade.
+    
+    Parameters:
+    - samples: mono sample array
+    - speed: playback speed (> 1 shortens the audio)
+    - frame_rate: sample rate of samples
+    - frame_ms: analysis frame length
+    - search_ms: maximum alignment shift in either direction
+    
+    Returns int16 sample array of length len(samples) / speed
+    """
+    x = np.asarray(samples, dtype=np.float32)
+    frame = max(2, int(frame_rate * frame_ms / 1000) // 2 * 2)
+    hop_out = frame // 2
+    hop_in = hop_out * speed
+    search = int(frame_rate * search_ms / 1000)
+    
+    out_len = int(len(x) / speed)
+    n_frames = out_len // hop_out + 2
+    
+    # Periodic Hann window: overlapping halves sum to exactly 1
+    window = (0.5 - 0.5 * np.cos(2 * np.pi * np.arange(frame) / frame)).astype(np.float32)
+    
+    # Padded so every candidate and template slice stays in range;
+    # input index i lives at xp[i + search]
+    xp = np.pad(x, (search, 2 * frame + 2 * search + int(2 * hop_in) + 1))
+    y = np.zeros(n_frames * hop_out + frame, dtype=np.float32)
+    
+    pos = 0
+    for k in range(n_frames):
+        nominal = int(round(k * hop_in))
+        if nominal + search + frame >= len(xp):
+            break
+        
+        if k > 0:
+            # Best match to where the previous frame would naturally continue
+            template = xp[search + pos + hop_out:search + pos + hop_out + frame]
+            scores = np.correlate(xp[nominal:nominal + 2 * search + frame], template, 'valid')
+            pos = nominal - search + int(np.argmax(scores))
+        
+        y[k * hop_out:k * hop_out + frame] += xp[search + pos:search + pos + frame] * window
+    
+    return np.clip(y[:out_len], -32768, 32767).astype(np.int16)
+
+def stretch_samples(samples, speed, frame_rate, method='wsola'):
+    """Time-stretch a mono int16 sample array by speed with the given method"""
+    if method == 'wsola':
+        return wsola_stretch(samples, speed, frame_rate)
+    elif method == 'pydub':
+        stretched = speedup(samples_to_audio(samples, frame_rate), playback_speed=speed)
+        return audio_to_samples(stretched, frame_rate)
+    raise ValueError(f"Unknown stretch method: {method}")
+
+def stretch_audio(audio, speed, method='wsola'):
+    """Time-stretch a pydub AudioSegment by speed (> 1 is faster)"""
+    samples = audio_to_samples(audio, audio.frame_rate)
+    return samples_to_audio(stretch_samples(samples, speed, audio.frame_rate, method), audio.frame_rate)
+
+def _stretch_job(job):
+    samples, speed, frame_rate, method = job
+    return stretch_samples(samples, speed, frame_rate, method)
+
+def stretch_pool(max_workers=None):
+    """
+    Process pool for stretch_many
+    
+    Workers are spawned rather than forked: callers run synthesis threads
+    (and the edge-tts event loop) alongside stretching, and a forked child
+    can inherit their locks in a held state.
+    """
+    return ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+
+def stretch_many(jobs, method='wsola', max_workers=1, executor=None):
+    """
+    Time-stretch many clips, in-process or across a process pool
+    
+    WSOLA runs at hundreds of times real time, so a pool only pays off for
+    large bulk jobs; pass a long-lived executor (see stretch_pool) when
+    calling this repeatedly.
+    
+    Parameters:
+    - jobs: list of (AudioSegment, speed)
+    - method: 'wsola' or 'pydub'
+    - max_workers: processes of a pool created for this call (1 = in-process)
+    - executor: existing process pool to use instead
+    
+    Returns list of stretched AudioSegments in job order
+    """
+    if not jobs:
+        return []
+    
+    work = [(audio_to_samples(audio, audio.frame_rate), speed, audio.frame_rate, method)
+            for audio, speed in jobs]
+    
+    if executor is not None and len(jobs) > 1:
+        stretched = list(executor.map(_stretch_job, work, chunksize=4))
+    elif max_workers == 1 or len(jobs) == 1:
+        stretched = [_stretch_job(job) for job in work]
+    else:
+        with stretch_pool(max_workers) as pool:
+            stretched = list(pool.map(_stretch_job, work, chunksize=4))
+    
+    return [samples_to_audio(samples, job[2]) for samples, job in zip(stretched, work)]
@@ -0,0 +1,256 @@
+import io
+import os
+import subprocess
+
+import numpy as np
+from pydub import AudioSegment
+
+# gTTS and edge-tts both produce 24 kHz mono audio
+SAMPLE_RATE = 24000
+
+# How a clip that starts before the end of the previous clip is placed
+OVERRUN_POLICIES = ['shift', 'overlap', 'truncate']
+
+def audio_to_samples(audio, frame_rate=SAMPLE_RATE):
+    """Convert a pydub AudioSegment to a mono int16 sample array at frame_rate"""
+    audio = audio.set_frame_rate(frame_rate).set_channels(1).set_sample_width(2)
+    return np.frombuffer(audio.raw_data, dtype=np.int16)
+
+def samples_to_audio(samples, frame_rate=SAMPLE_RATE):
+    """Wrap a mono int16 sample array in a pydub AudioSegment"""
+    return AudioSegment(data=np.ascontiguousarray(samples, dtype=np.int16).tobytes(),
+                        sample_width=2, frame_rate=frame_rate, channels=1)
+
+def decode_audio(data, format="mp3", frame_rate=SAMPLE_RATE):
+    """
+    Decode encoded audio bytes (mp3, wav, flac) to a mono AudioSegment at frame_rate
+    
+    Uses miniaudio to decode in-process when it is installed; otherwise
+    pipes the bytes through ffmpeg (no temp file).
+    """
+    try:
+        import miniaudio
+    except ImportError:
+        audio = AudioSegment.from_file(io.BytesIO(data), format=format)
+        return audio.set_frame_rate(frame_rate).set_channels(1).set_sample_width(2)
+    
+    decoded = miniaudio.decode(data, output_format=miniaudio.SampleFormat.SIGNED16,
+                               nchannels=1, sample_rate=frame_rate)
+    return samples_to_audio(np.frombuffer(decoded.samples, dtype=np.int16), frame_rate)
+
+class BaseTimeline:
+    """
+    Clip placement shared by Timeline and StreamingTimeline
+    
+    Overrun policy for a clip starting before the previous clip has ended:
+    - 'shift': start it where the previous clip ended (timeline drifts later)
+    - 'overlap': mix it in at its own start time
+    - 'truncate': cut the previous clip off at the new clip's start time
+    Audio past the end of the timeline is always dropped and counted in overrun_ms.
+    
+    Subclasses store the samples and provide _region(start, end), a writable
+    view of timeline samples [start, end).
+    """
+    
+    def __init__(self, duration_ms, frame_rate=SAMPLE_RATE, overrun='shift'):
+        if overrun not in OVERRUN_POLICIES:
+            raise ValueError(f"Unknown overrun policy: {overrun}")
+        
+        self.frame_rate = frame_rate
+        self.overrun = overrun
+        self.length = self.ms_to_samples(duration_ms)
+        self.cursor = 0
+        self.overrun_ms = 0
+        self.last_placed = None  # (start, end) sample offsets of the last placed clip
+    
+    def ms_to_samples(self, ms):
+        return int(round(ms * self.frame_rate / 1000))
+    
+    def samples_to_ms(self, samples):
+        return int(round(samples * 1000 / self.frame_rate))
+    
+    @property
+    def duration_ms(self):
+        return self.samples_to_ms(self.length)
+    
+    @property
+    def position_ms(self):
+        """End of the last placed clip"""
+        return self.samples_to_ms(self.cursor)
+    
+    def place(self, clip, start_ms):
+        """
+        Write a clip into the timeline
+        
+        Parameters:
+        - clip: pydub AudioSegment or int16 sample array at the timeline rate
+        - start_ms: requested start time
+        
+        Returns (start_ms, end_ms) where the clip was actually placed
+        """
+        samples = clip if isinstance(clip, np.ndarray) else audio_to_samples(clip, self.frame_rate)
+        start = self.ms_to_samples(start_ms)
+        
+        if start < self.cursor and self.overrun == 'shift':
+            start = self.cursor
+        elif start < self.cursor and self.overrun == 'truncate':
+            self._region(start, self.cursor)[:] = 0
+        start = min(start, self.length)
+        
+        end = start + len(samples)
+        if end > self.length:
+            self.overrun_ms += self.samples_to_ms(end - self.length)
+            samples = samples[:max(0, self.length - start)]
+            end = start + len(samples)
+        
+        region = self._region(start, end)
+        if self.overrun == 'overlap' and start < self.cursor:
+            region[:] = np.clip(region.astype(np.int32) + samples, -32768, 32767)
+        else:
+            region[:] = samples
+        
+        self.cursor = max(self.cursor, end)
+        self.last_placed = (start, end)
+        return self.samples_to_ms(start), self.samples_to_ms(end)
+    
+    def advance(self, position_ms):
+        """Move the cursor forward to position_ms, leaving silence behind"""
+        self.cursor = max(self.cursor, min(self.ms_to_samples(position_ms), self.length))
+
+class Timeline(BaseTimeline):
+    """
+    Fixed-length output buffer that clips are written into at their offsets
+    
+    The buffer is allocated once from the target duration, so building a
+    timeline is linear in its length (AudioSegment += copies the whole
+    accumulated audio on every append). See BaseTimeline for overrun policies.
+    """
+    
+    def __init__(self, duration_ms, frame_rate=SAMPLE_RATE, overrun='shift'):
+        super().__init__(duration_ms, frame_rate, overrun)
+        self.buffer = np.zeros(self.length, dtype=np.int16)
+    
+    def _region(self, start, end):
+        return self.buffer[start:end]
+    
+    def to_audio_segment(self):
+        return samples_to_audio(self.buffer, self.frame_rate)
+    
+    def export(self, output_file, format="mp3", bitrate="192k"):
+        """Encode the whole buffer once"""
+        return self.to_audio_segment().export(output_file, format=format, bitrate=bitrate)
+
+class StreamingTimeline(BaseTimeline):
+    """
+    Timeline that streams finished audio into one long-lived ffmpeg encoder
+    
+    Only the window between the last flush point and the end of the last
+    placed clip is kept in memory; everything before it has already been
+    written to the encoder as s16le PCM, so encoding runs alongside whatever
+    produces the later clips. Call flush(ms) once no later clip can start
+    before ms (e.g. with the next segment's start time) and close() to pad
+    the remaining duration with silence and finish the file.
+    
+    With sidecar_file set, the same PCM is also written there (raw s16le) so
+    the output can later be patched in place (see TTS.redub); with
+    output_file None only the sidecar is written and no encoder is started.
+    """
+    
+    def __init__(self, duration_ms, output_file, frame_rate=SAMPLE_RATE, overrun='shift',
+                 format="mp3", bitrate="192k", sidecar_file=None):
+        super().__init__(duration_ms, frame_rate, overrun)
+        self.buffer = np.zeros(0, dtype=np.int16)
+        self.output_file = output_file
+        self.written = 0  # buffer holds samples [written, written + len(buffer))
+        self.sidecar = open(sidecar_file, 'wb') if sidecar_file else None
+        
+        self.encoder = None
+        if output_file is not None:
+            cmd = [
+                AudioSegment.converter, '-y', '-loglevel', 'error',
+                '-f', 's16le', '-ar', str(frame_rate), '-ac', '1', '-i', 'pipe:0',
+                '-f', format, '-b:a', bitrate,
+                output_file
+            ]
+            self.encoder = subprocess.Popen(cmd, stdin=subprocess.PIPE, stderr=subprocess.PIPE)
+    
+    def _region(self, start, end):
+        if start < self.written:
+            raise ValueError(f"Cannot write at {self.samples_to_ms(start)}ms, audio up to "
+                             f"{self.samples_to_ms(self.written)}ms is already encoded")
+        
+        # Grow the window with silence
+        needed = end - self.written
+        if needed > len(self.buffer):
+            self.buffer = np.concatenate([self.buffer, np.zeros(needed - len(self.buffer), dtype=np.int16)])
+        
+        return self.buffer[start - self.written:end - self.written]
+    
+    def _write(self, end):
+        if end <= self.written:
+            return
+        
+        chunk = self._region(self.written, end)
+        if self.encoder is not None:
+            try:
+                self.encoder.stdin.write(chunk.tobytes())
+            except BrokenPipeError:
+                self._wait()
+                raise
+        if self.sidecar is not None:
+            self.sidecar.write(chunk.tobytes())
+        
+        self.buffer = self.buffer[end - self.written:].copy()
+        self.written = end
+    
+    def _wait(self):
+        if self.encoder is None:
+            return
+        stderr = self.encoder.stderr.read()
+        returncode = self.encoder.wait()
+        if returncode != 0:
+            raise subprocess.CalledProcessError(returncode, self.encoder.args,
+                                                stderr=stderr.decode('utf-8', errors='replace'))
+    
+    @property
+    def window_ms(self):
+        """Audio currently held in memory"""
+        return self.samples_to_ms(len(self.buffer))
+    
+    def flush(self, position_ms):
+        """Encode everything before position_ms; later clips must not start before it"""
+        self._write(min(self.ms_to_samples(position_ms), self.length))
+    
+    def close(self):
+        """Encode the rest of the timeline and wait for the encoder to finish"""
+        self._write(self.length)
+        if self.encoder is not None:
+            self.encoder.stdin.close()
+        if self.sidecar is not None:
+            self.sidecar.close()
+        self._wait()
+        return self.output_file
+    
+    def abort(self):
+        """Stop the encoder and remove the partial output file"""
+        if self.encoder is not None:
+            self.encoder.kill()
+            try:
+                self.encoder.stdin.close()
+            except BrokenPipeError:
+                pass
+            self.encoder.wait()
+        if self.sidecar is not None:
+            self.sidecar.close()
+            os.remove(self.sidecar.name)
+        if self.output_file is not None and os.path.exists(self.output_file):
+            os.remove(self.output_file)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
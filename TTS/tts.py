@@ -14,6 +14,19 @@ from gtts import gTTS
 from pydub import AudioSegment
 from pydub.effects import speedup
 import os
+import math
+import contextlib
+from concurrent.futures import ThreadPoolExecutor
+from TTS import timeline
+from TTS import stretch
+from TTS import duration
+from TTS import manifest
+from TTS import loudness
+from TTS import alignment
+from TTS.cache import TTSCache, DEFAULT_CACHE_DIR, cache_key
+from TTS.engines import get_engine
+from TTS import resilience
+from TTS.resilience import SynthesisPolicy
 
 def parse_timestamp_to_ms(timestamp_str):
     """Convert '00:00:00.000' format to milliseconds"""
@@ -21,7 +34,13 @@ def parse_timestamp_to_ms(timestamp_str):
     s, ms = s.split('.')
     return (int(h) * 3600000) + (int(m) * 60000) + (int(s) * 1000) + int(ms)
 
-def time_stretch_audio(audio_segment, target_duration_ms, max_speedup=1.5):
+def stretch_factor(current_duration, target_duration_ms, max_speedup=1.5):
+    """Speedup needed to fit target_duration_ms, capped at max_speedup (1.0 if it already fits)"""
+    if current_duration <= target_duration_ms:
+        return 1.0
+    return min(current_duration / target_duration_ms, max_speedup)
+
+def time_stretch_audio(audio_segment, target_duration_ms, max_speedup=1.5, method='wsola'):
     """
     Time-stretch audio to fit target duration
     
@@ -29,6 +48,7 @@ def time_stretch_audio(audio_segment, target_duration_ms, max_speedup=1.5):
     - audio_segment: pydub AudioSegment
     - target_duration_ms: desired duration in milliseconds
     - max_speedup: maximum speedup factor (1.5 = 50% faster)
+    - method: 'wsola' (NumPy, pitch-preserving) or 'pydub' (pydub.effects.speedup)
     
     Returns stretched audio segment
     """
@@ -47,31 +67,319 @@ def time_stretch_audio(audio_segment, target_duration_ms, max_speedup=1.5):
         speedup_factor = max_speedup
     
     # Apply speedup
-    stretched = speedup(audio_segment, playback_speed=speedup_factor)
+    stretched = stretch.stretch_audio(audio_segment, speedup_factor, method)
     
     print(f"    Stretched from {current_duration}ms to {len(stretched)}ms (factor: {speedup_factor:.2f}x)")
     
     return stretched
 
+def fit_clips(jobs, max_speedup=1.5, method='wsola', executor=None):
+    """
+    Time-stretch every clip that is longer than its target
+    
+    Parameters:
+    - jobs: list of (AudioSegment, target_duration_ms)
+    - max_speedup: maximum speedup factor
+    - method: 'wsola' or 'pydub'
+    - executor: process pool to stretch on (see stretch.stretch_pool);
+                None stretches in-process
+    
+    Returns (fitted clips, speedup factors) in job order
+    """
+    factors = [stretch_factor(len(audio), target, max_speedup) for audio, target in jobs]
+    to_stretch = [idx for idx, factor in enumerate(factors) if factor > 1.0]
+    
+    stretched = stretch.stretch_many([(jobs[idx][0], factors[idx]) for idx in to_stretch],
+                                     method, executor=executor)
+    
+    fitted = [audio for audio, _ in jobs]
+    for idx, audio in zip(to_stretch, stretched):
+        fitted[idx] = audio
+    
+    return fitted, factors
+
+def level_clips(clips, slots, loudness_target=None, reference=None,
+                frame_rate=timeline.SAMPLE_RATE):
+    """
+    Bring clips to a common loudness before they are placed
+    
+    Parameters:
+    - clips: list of AudioSegments
+    - slots: (start_ms, end_ms) of each clip's segment in the original
+    - loudness_target: integrated loudness in LUFS (None leaves levels alone)
+    - reference: loudness.ReferenceAudio of the original; each clip is matched
+                 to its segment's level there, falling back to loudness_target
+                 for silent segments
+    - frame_rate: sample rate of the returned arrays
+    
+    Returns (int16 sample arrays, applied gains in dB) in clip order
+    """
+    samples = [timeline.audio_to_samples(audio, frame_rate) for audio in clips]
+    if loudness_target is None and reference is None:
+        return samples, [0.0] * len(samples)
+    
+    leveled = []
+    gains = []
+    for clip, (start_ms, end_ms) in zip(samples, slots):
+        target = reference.loudness(start_ms, end_ms) if reference is not None else float('-inf')
+        if not math.isfinite(target):
+            target = loudness_target
+        gain = loudness.match_gain_db(clip, target, frame_rate) if target is not None else 0.0
+        leveled.append(loudness.apply_gain(clip, gain))
+        gains.append(gain)
+    
+    return leveled, gains
+
+def _unpack_job(job):
+    """(text, language) or (text, language, rate) -> (text, language, rate)"""
+    text, language, *rest = job
+    return text, language, rest[0] if rest else None
+
+def synthesize_segments(jobs, tts_engine='gtts', max_workers=8, policy=None):
+    """
+    Synthesize many TTS clips concurrently, keeping the encoded audio in memory
+    
+    Jobs are grouped by language and rate and handed to the engine's
+    synthesize_batch (see TTS.engines), which keeps at most max_workers
+    requests in flight.
+    
+    Parameters:
+    - jobs: list of (text, language) or (text, language, rate)
+    - tts_engine: registered engine name ('gtts', 'edge', 'espeak', ...)
+    - max_workers: maximum concurrent requests
+    - policy: resilience.SynthesisPolicy with the request deadline, retries
+              and fallback engines (default: SynthesisPolicy())
+    
+    Returns list in job order with (engine name, encoded audio bytes), or the
+    exception raised
+    """
+    policy = policy or SynthesisPolicy()
+    
+    groups = {}
+    for idx, job in enumerate(jobs):
+        text, language, rate = _unpack_job(job)
+        groups.setdefault((language, rate), []).append(idx)
+    
+    results = [None] * len(jobs)
+    for (language, rate), indices in groups.items():
+        encoded = policy.synthesize_batch(tts_engine, [jobs[idx][0] for idx in indices], language,
+                                          rate=rate, max_workers=max_workers)
+        for idx, result in zip(indices, encoded):
+            results[idx] = result
+    
+    return results
+
+def synthesize_clips(jobs, tts_engine='gtts', max_workers=8, cache=None, trim=True, policy=None):
+    """
+    Synthesize and decode TTS clips, reusing cached audio where possible
+    
+    Parameters:
+    - jobs: list of (text, language) or (text, language, rate)
+    - tts_engine: registered engine name ('gtts', 'edge', 'espeak', ...)
+    - max_workers: maximum concurrent requests
+    - cache: TTSCache to read from and fill, or None to always synthesize
+    - trim: trim leading/trailing silence from new clips before caching them
+    - policy: resilience.SynthesisPolicy (see synthesize_segments)
+    
+    Engine output is decoded in memory (see timeline.decode_audio); nothing is
+    written to disk except cache entries. Clips made by a fallback engine are
+    cached under that engine.
+    
+    Returns list in job order with a decoded AudioSegment, or the exception raised
+    """
+    engine = get_engine(tts_engine)
+    results = [None] * len(jobs)
+    
+    # Look up every clip first; identical misses are synthesized once
+    misses = {}
+    for idx, job in enumerate(jobs):
+        text, language, rate = _unpack_job(job)
+        voice = engine.default_voice(language)
+        audio = cache.get(text, language, tts_engine, voice, rate) if cache is not None else None
+        if audio is not None:
+            results[idx] = audio
+        else:
+            misses.setdefault(cache_key(text, language, tts_engine, voice, rate), []).append(idx)
+    
+    if cache is not None:
+        print(f"TTS cache: {len(jobs) - sum(len(v) for v in misses.values())} hit(s), "
+              f"{len(misses)} clip(s) to synthesize")
+    
+    encoded = synthesize_segments([jobs[indices[0]] for indices in misses.values()],
+                                  tts_engine, max_workers, policy)
+    
+    for indices, result in zip(misses.values(), encoded):
+        text, language, rate = _unpack_job(jobs[indices[0]])
+        
+        if not isinstance(result, Exception):
+            name, data = result
+            producer = get_engine(name)
+            try:
+                audio = timeline.decode_audio(data, producer.output_format)
+                if trim:
+                    audio = duration.trim_silence(audio)
+                if cache is not None:
+                    cache.put(text, language, name, audio, producer.default_voice(language), rate)
+                result = audio
+            except Exception as e:
+                result = e
+        
+        for idx in indices:
+            results[idx] = result
+    
+    if cache is not None:
+        cache.flush()
+    
+    return results
+
+def iter_clip_chunks(jobs, tts_engine='gtts', max_workers=8, cache=None, lookahead=32, policy=None):
+    """
+    Yield synthesize_clips results for successive chunks of lookahead jobs
+    
+    The next chunk is synthesized in the background while the caller works
+    on the current one, so at most two chunks of decoded clips are in memory.
+    
+    Yields (offset, results) where results[i] belongs to jobs[offset + i]
+    """
+    with ThreadPoolExecutor(max_workers=1) as prefetch:
+        pending = None
+        for offset in range(0, len(jobs), lookahead):
+            if pending is None:
+                pending = prefetch.submit(synthesize_clips, jobs[offset:offset + lookahead],
+                                          tts_engine, max_workers, cache, policy=policy)
+            results = pending.result()
+            
+            next_offset = offset + lookahead
+            pending = None
+            if next_offset < len(jobs):
+                pending = prefetch.submit(synthesize_clips, jobs[next_offset:next_offset + lookahead],
+                                          tts_engine, max_workers, cache, policy=policy)
+            
+            yield offset, results
+
+def transcription_jobs(data, language, use_original=False):
+    """
+    Synthesis jobs for every speakable segment of a transcription
+    
+    Returns (jobs, items): (text, language) jobs and the transcription items they belong to
+    """
+    jobs = []
+    items = []
+    
+    for item in data['transcription']:
+        text_key = 'original_text' if use_original else 'text'
+        text = item.get(text_key, item.get('text', ''))
+        
+        if not text or text in ['[UNINTELLIGIBLE]', '[ERROR]', '']:
+            continue
+        
+        jobs.append((text, language))
+        items.append(item)
+    
+    return jobs, items
+
+def predict_rates(jobs, items, tts_engine, cache=None, max_speedup=1.5):
+    """
+    Add a speaking rate to jobs whose predicted clip overruns its segment
+    
+    Only engines that support a rate are asked for one; clip lengths are
+    predicted with duration.DurationPredictor calibrated from the cache.
+    
+    Returns the updated job list
+    """
+    engine = get_engine(tts_engine)
+    if not engine.supports_rate:
+        return jobs
+    
+    predictor = duration.DurationPredictor.from_cache(cache) if cache else duration.DurationPredictor()
+    jobs = list(jobs)
+    
+    for idx, ((text, language), item) in enumerate(zip(jobs, items)):
+        target = parse_timestamp_to_ms(item['end_time']) - parse_timestamp_to_ms(item['start_time'])
+        predicted = predictor.predict(text, language, tts_engine, engine.default_voice(language))
+        rate = duration.choose_rate(predicted, target, max_speedup)
+        if rate:
+            jobs[idx] = (text, language, rate)
+    
+    print(f"Speaking rate raised up front for {sum(len(job) == 3 for job in jobs)} segment(s)")
+    return jobs
+
 def create_perfectly_synced_tts(json_file, output_audio="synced_output.mp3", 
                                 language='ml', tts_engine='gtts', 
-                                max_speedup=1.5, use_original=False):
+                                max_speedup=1.5, use_original=False, max_workers=8,
+                                overrun='shift', cache_dir=DEFAULT_CACHE_DIR,
+                                stretch_method='wsola', stretch_workers=None, lookahead=32,
+                                predict_rate=True, incremental=False, part_ms=None,
+                                loudness_target=None, loudness_reference=None,
+                                max_advance_ms=alignment.DEFAULT_MAX_ADVANCE_MS,
+                                max_borrow_ms=alignment.DEFAULT_MAX_BORROW_MS,
+                                min_pause_ms=alignment.DEFAULT_MIN_PAUSE_MS,
+                                request_timeout=resilience.DEFAULT_TIMEOUT,
+                                retries=resilience.DEFAULT_RETRIES, fallback_engines=(),
+                                report=None):
     """
     Generate TTS that EXACTLY matches the original audio duration.
     
     Features:
-    - Every segment starts at the exact original timestamp
-    - Audio is time-stretched if too long to fit
+    - Every segment starts at its original timestamp, or slightly earlier
+      when its clip needs the room
+    - Clips too long for their segment borrow time from the pauses around it
+      (see alignment.AlignmentSolver) and are time-stretched only for the rest
     - Dynamic silence fills gaps perfectly
     - Final output duration = original audio duration
     
+    Segments are synthesized lookahead at a time and streamed into a single
+    ffmpeg encoder as they are placed (see timeline.StreamingTimeline), so
+    memory stays bounded by the look-ahead window and encoding overlaps with
+    synthesis of later segments.
+    
     Parameters:
     - json_file: path to transcription JSON
     - output_audio: output file path
     - language: TTS language code ('ml', 'en', etc.)
-    - tts_engine: 'gtts' or 'edge'
+    - tts_engine: registered engine name ('gtts', 'edge', 'espeak', ...)
     - max_speedup: maximum speedup factor (1.5 = 50% faster max)
     - use_original: use original_text instead of translated text
+    - max_workers: number of segments synthesized concurrently
+    - overrun: placement of a clip that starts before the previous one ends
+               ('shift', 'overlap' or 'truncate', see timeline.BaseTimeline)
+    - cache_dir: persistent TTS clip cache directory (None disables caching)
+    - stretch_method: 'wsola' (NumPy, pitch-preserving) or 'pydub'
+    - stretch_workers: processes used for time-stretching (default: in-process;
+                       a pool is started once per run when > 1)
+    - lookahead: segments synthesized ahead of the encoder
+    - predict_rate: predict each clip's length (see duration.DurationPredictor)
+                    and ask engines that support it for a faster speaking rate
+                    up front, so fewer clips need time-stretching
+    - incremental: keep a PCM sidecar and a manifest of every segment's
+                   placement, and build the output from separately encoded
+                   parts, so later edits can be patched in with
+                   TTS.redub.redub_changed_segments
+    - part_ms: target length of those parts (default: TTS.redub.PART_MS)
+    - loudness_target: integrated loudness (LUFS) every clip is gain-matched to
+                       while the timeline is assembled, e.g.
+                       loudness.DEFAULT_TARGET_LUFS (default None keeps the
+                       engines' own levels)
+    - loudness_reference: original audio file; when given, each clip is matched
+                          to the level of its segment there instead
+    - max_advance_ms: how early a clip may start in the pause before it
+    - max_borrow_ms: how far a clip may run on into the pause after it
+    - min_pause_ms: silence always kept between two clips when borrowing
+                    (max_advance_ms = max_borrow_ms = 0 fits every clip to
+                    its own segment)
+    - request_timeout: deadline in seconds for each TTS request
+    - retries: extra attempts for a failed request, with jittered backoff
+    - fallback_engines: engines tried in order for clips tts_engine could not
+                        synthesize, e.g. ['edge', 'espeak'] (see TTS.resilience)
+    
+    - report: optional dict that is filled with segments_processed,
+              segments_stretched, failed_segments (segment numbers left
+              silent), the synthesis counters retries, timeouts and
+              failovers, the alignment totals (see
+              alignment.AlignmentSolver.report) and, for an incremental
+              render, parts_encoded, parts_total and encoded_seconds
+    
+    Returns the output file path
     """
     
     print(f"Loading transcription from {json_file}")
@@ -86,155 +394,297 @@ def create_perfectly_synced_tts(json_file, output_audio="synced_output.mp3",
     print(f"Total segments: {len(data['transcription'])}")
     print(f"Generating synchronized TTS...")
     
-    # Step 1: Generate all TTS segments
-    temp_dir = "temp_tts_sync"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    segments_data = []
-    
-    for item in data['transcription']:
-        text_key = 'original_text' if use_original else 'text'
-        text = item.get(text_key, item.get('text', ''))
+    cache = TTSCache(cache_dir) if cache_dir else None
+    reference = loudness.ReferenceAudio(loudness_reference) if loudness_reference else None
+    policy = SynthesisPolicy(request_timeout, retries, fallback_engines)
+    
+    jobs, items = transcription_jobs(data, language, use_original)
+    
+    if predict_rate:
+        jobs = predict_rates(jobs, items, tts_engine, cache, max_speedup)
+    
+    slots = [(parse_timestamp_to_ms(item['start_time']), parse_timestamp_to_ms(item['end_time']))
+             for item in items]
+    solver = alignment.AlignmentSolver(slots, alignment.pause_gaps(data, items, slots),
+                                       original_duration_ms, max_speedup,
+                                       max_advance_ms, max_borrow_ms, min_pause_ms)
+    
+    print(f"\nStreaming to {output_audio}...")
+    segments_processed = 0
+    segments_stretched = 0
+    failed_segments = []
+    gains = []
+    max_window_ms = 0
+    placements = []
+    
+    # An incremental render only writes the sidecar here; the output is
+    # encoded from it in parts afterwards (see TTS.redub.write_parts)
+    sidecar = manifest.sidecar_file(output_audio) if incremental else None
+    stretch_pool = stretch.stretch_pool(stretch_workers) if stretch_workers and stretch_workers > 1 else None
+    with stretch_pool or contextlib.nullcontext(), \
+            timeline.StreamingTimeline(original_duration_ms, None if incremental else output_audio,
+                                       overrun=overrun, format="mp3", bitrate="192k",
+                                       sidecar_file=sidecar) as final_audio:
         
-        if not text or text in ['[UNINTELLIGIBLE]', '[ERROR]', '']:
-            continue
-        
-        segment_num = item['segment']
-        temp_file = os.path.join(temp_dir, f"seg_{segment_num}.mp3")
-        
-        try:
-            if tts_engine == 'gtts':
-                tts = gTTS(text=text, lang=language, slow=False)
-                tts.save(temp_file)
+        for offset, results in iter_clip_chunks(jobs, tts_engine, max_workers, cache, lookahead, policy):
             
-            elif tts_engine == 'edge':
-                import edge_tts
-                import asyncio
+            # Step 1: Collect this chunk of TTS segments
+            segments_data = []
+            
+            for idx, result in enumerate(results, start=offset):
+                item = items[idx]
+                text, _, rate = _unpack_job(jobs[idx])
+                segment_num = item['segment']
                 
-                voice_map = {
-                    'ml': 'ml-IN-SobhanaNeural',
-                    'en': 'en-US-JennyNeural',
-                    'hi': 'hi-IN-SwaraNeural',
-                    'ta': 'ta-IN-PallaviNeural',
-                    'te': 'te-IN-ShrutiNeural',
-                }
-                voice = voice_map.get(language, f'{language}-Neural')
+                if isinstance(result, Exception):
+                    print(f"  ✗ Error on segment {segment_num}: {result}")
+                    failed_segments.append(segment_num)
+                    continue
                 
-                async def generate_edge():
-                    communicate = edge_tts.Communicate(text, voice)
-                    await communicate.save(temp_file)
+                segments_data.append({
+                    'index': idx,
+                    'segment_num': segment_num,
+                    'start_ms': parse_timestamp_to_ms(item['start_time']),
+                    'end_ms': parse_timestamp_to_ms(item['end_time']),
+                    'target_duration': parse_timestamp_to_ms(item['end_time']) - parse_timestamp_to_ms(item['start_time']),
+                    'audio': result,
+                    'text': text[:50] + '...' if len(text) > 50 else text
+                })
                 
-                asyncio.run(generate_edge())
+                print(f"  ✓ Segment {segment_num}: {text[:50]}..." + (f" (rate {rate:.2f}x)" if rate else ""))
             
-            segments_data.append({
-                'segment_num': segment_num,
-                'start_ms': parse_timestamp_to_ms(item['start_time']),
-                'end_ms': parse_timestamp_to_ms(item['end_time']),
-                'target_duration': parse_timestamp_to_ms(item['end_time']) - parse_timestamp_to_ms(item['start_time']),
-                'file': temp_file,
-                'text': text[:50] + '...' if len(text) > 50 else text
-            })
+            # Decide placement in order, then time-stretch what still overruns, in parallel
+            for seg in segments_data:
+                seg['placed_ms'], factor = solver.place(seg['index'], len(seg['audio']))
+                seg['fit_duration'] = int(len(seg['audio']) / factor)
             
-            print(f"  ✓ Segment {segment_num}: {text[:50]}...")
+            fitted, factors = fit_clips([(seg['audio'], seg['fit_duration']) for seg in segments_data],
+                                        max_speedup, stretch_method, stretch_pool)
             
-        except Exception as e:
-            print(f"  ✗ Error on segment {segment_num}: {e}")
+            # Match levels on the sample arrays, so there is no loudnorm pass after encoding
+            leveled, chunk_gains = level_clips(fitted, [(seg['start_ms'], seg['end_ms']) for seg in segments_data],
+                                               loudness_target, reference, final_audio.frame_rate)
+            
+            # Step 2: Place the chunk on the timeline and stream out finished audio
+            for seg, seg_audio, samples, gain, factor in zip(segments_data, fitted, leveled,
+                                                             chunk_gains, factors):
+                current_position = final_audio.position_ms
+                target_start = seg['start_ms']
+                target_end = seg['end_ms']
+                target_duration = seg['target_duration']
+                
+                print(f"\nSegment {seg['segment_num']}:")
+                print(f"  Current position: {current_position}ms")
+                print(f"  Target start: {target_start}ms")
+                print(f"  Target duration: {target_duration}ms")
+                
+                # Silence up to the start is filled in by the timeline
+                silence_needed = seg['placed_ms'] - current_position
+                if silence_needed > 0:
+                    print(f"  Added silence: {silence_needed}ms")
+                
+                drift = seg['placed_ms'] - target_start
+                if drift > 0:
+                    print(f"  Warning: Behind schedule by {drift}ms")
+                elif drift < 0:
+                    print(f"  Starting {-drift}ms early (borrowed from the previous pause)")
+                
+                # Process TTS audio
+                original_tts_duration = len(seg['audio'])
+                
+                print(f"  TTS duration: {original_tts_duration}ms (target: {target_duration}ms)")
+                
+                # Time-stretched above if borrowing pause time was not enough
+                if factor > 1.0:
+                    if original_tts_duration / seg['fit_duration'] > max_speedup:
+                        print(f"    Warning: Required speedup {original_tts_duration / seg['fit_duration']:.2f}x exceeds max {max_speedup}x")
+                    print(f"    Stretched from {original_tts_duration}ms to {len(seg_audio)}ms (factor: {factor:.2f}x)")
+                    segments_stretched += 1
+                elif original_tts_duration > target_duration:
+                    print(f"    Fits in {original_tts_duration - target_duration}ms borrowed from the pauses around it")
+                
+                if gain:
+                    print(f"  Loudness gain: {gain:+.1f} dB")
+                gains.append(gain)
+                
+                # Add the audio
+                final_audio.place(samples, seg['placed_ms'])
+                
+                placements.append({
+                    'segment': seg['segment_num'],
+                    'text': jobs[seg['index']][0],
+                    'rate': _unpack_job(jobs[seg['index']])[2],
+                    'start_ms': target_start,
+                    'end_ms': target_end,
+                    'placed': list(final_audio.last_placed)
+                })
+                
+                max_window_ms = max(max_window_ms, final_audio.window_ms)
+                next_index = seg['index'] + 1
+                final_audio.flush(solver.earliest_start(next_index) if next_index < len(items)
+                                  else original_duration_ms)
+                segments_processed += 1
+    
+    parts_report = {}
+    if incremental:
+        from TTS import redub
+        parts_report = redub.write_parts(output_audio, {
+            'source': json_file,
+            'language': language,
+            'tts_engine': tts_engine,
+            'use_original': use_original,
+            'max_speedup': max_speedup,
+            'stretch_method': stretch_method,
+            'overrun': overrun,
+            'frame_rate': final_audio.frame_rate,
+            'duration_ms': original_duration_ms,
+            'bitrate': "192k",
+            'loudness_target': loudness_target,
+            'loudness_reference': loudness_reference,
+            'alignment': {'max_advance_ms': max_advance_ms, 'max_borrow_ms': max_borrow_ms,
+                          'min_pause_ms': min_pause_ms},
+            'segments': placements,
+            'parts': None
+        }, None, part_ms or redub.PART_MS)
+    
+    # Step 3: Final duration matches original exactly (timeline length is fixed)
+    print(f"\n{'='*70}")
+    print(f"Final duration: {final_audio.duration_ms/1000:.2f}s")
+    print(f"Original duration: {original_duration_ms/1000:.2f}s")
+    print(f"Largest in-memory window: {max_window_ms/1000:.2f}s")
+    
+    if final_audio.overrun_ms > 0:
+        # Audio past the end is dropped (shouldn't happen with proper time stretching)
+        print(f"Trimmed excess: {final_audio.overrun_ms}ms")
     
     print(f"\n{'='*70}")
-    print("Building synchronized timeline...")
+    print(f"✓ PERFECTLY SYNCHRONIZED TTS COMPLETE!")
+    print(f"{'='*70}")
+    print(f"Output file: {output_audio}")
+    print(f"Duration: {final_audio.duration_ms/1000:.2f}s (matches original exactly)")
+    print(f"Segments processed: {segments_processed}")
+    print(f"Segments time-stretched: {segments_stretched}")
+    solver_report = solver.report()
+    print(f"Stretch work: {solver_report['stretched_ms']/1000:.1f}s of audio "
+          f"({solver_report['unborrowed_stretched_ms']/1000:.1f}s if every clip had to fit its own segment)")
+    print(f"Pause time borrowed: {solver_report['borrowed_ms']/1000:.1f}s, "
+          f"max drift: {solver_report['max_drift_ms']}ms")
+    if gains and (loudness_target is not None or reference is not None):
+        print(f"Loudness gain: {min(gains):+.1f} to {max(gains):+.1f} dB "
+              f"(target: {'original segments' if reference is not None else f'{loudness_target} LUFS'})")
+    counters = policy.counters
+    print(f"TTS requests: {counters['retries']} retried, {counters['timeouts']} timed out, "
+          f"{counters['failovers']} failed over")
+    if failed_segments:
+        print(f"⚠ Segments left silent: {', '.join(str(number) for number in failed_segments)}")
     print(f"{'='*70}")
     
-    # Step 2: Build perfectly synchronized timeline
-    final_audio = AudioSegment.empty()
+    if report is not None:
+        report.update({
+            'segments_processed': segments_processed,
+            'segments_stretched': segments_stretched,
+            'failed_segments': failed_segments,
+            'retries': counters['retries'],
+            'timeouts': counters['timeouts'],
+            'failovers': counters['failovers'],
+            **solver_report,
+            **parts_report
+        })
     
-    for idx, seg in enumerate(segments_data):
-        current_position = len(final_audio)
-        target_start = seg['start_ms']
-        target_end = seg['end_ms']
-        target_duration = seg['target_duration']
-        
-        print(f"\nSegment {seg['segment_num']}:")
-        print(f"  Current position: {current_position}ms")
-        print(f"  Target start: {target_start}ms")
-        print(f"  Target duration: {target_duration}ms")
-        
-        # Add silence to reach target start time
-        silence_needed = target_start - current_position
-        
-        if silence_needed > 0:
-            final_audio += AudioSegment.silent(duration=silence_needed)
-            print(f"  Added silence: {silence_needed}ms")
-        elif silence_needed < 0:
-            print(f"  Warning: Behind schedule by {-silence_needed}ms")
-        
-        # Load and process TTS audio
-        seg_audio = AudioSegment.from_mp3(seg['file'])
-        original_tts_duration = len(seg_audio)
-        
-        print(f"  TTS duration: {original_tts_duration}ms (target: {target_duration}ms)")
-        
-        # Time-stretch if needed to fit exactly
-        if original_tts_duration > target_duration:
-            seg_audio = time_stretch_audio(seg_audio, target_duration, max_speedup)
-        
-        # Add the audio
-        final_audio += seg_audio
-        
-        # If TTS is shorter than target, pad with silence at the end
-        actual_duration = len(seg_audio)
-        if actual_duration < target_duration:
-            padding = target_duration - actual_duration
-            final_audio += AudioSegment.silent(duration=padding)
-            print(f"  Added padding: {padding}ms")
+    return output_audio
+
+def plan_dub_clips(json_file, language='ml', tts_engine='gtts', max_speedup=1.5,
+                   use_original=False, max_workers=8, cache_dir=DEFAULT_CACHE_DIR,
+                   predict_rate=True, lookahead=32,
+                   max_advance_ms=alignment.DEFAULT_MAX_ADVANCE_MS,
+                   max_borrow_ms=alignment.DEFAULT_MAX_BORROW_MS,
+                   min_pause_ms=alignment.DEFAULT_MIN_PAUSE_MS,
+                   request_timeout=resilience.DEFAULT_TIMEOUT,
+                   retries=resilience.DEFAULT_RETRIES, fallback_engines=()):
+    """
+    Synthesize every segment into the TTS cache and plan where each clip plays
     
-    # Step 3: Ensure final duration matches original exactly
-    final_duration = len(final_audio)
-    duration_diff = original_duration_ms - final_duration
+    Instead of building and encoding an audio timeline, this returns the clip
+    files with their start times and tempo, for seperator.render_dubbed_video
+    to stretch, position and mix in a single ffmpeg run. Placement and tempo
+    come from the same alignment.AlignmentSolver as create_perfectly_synced_tts.
     
-    print(f"\n{'='*70}")
-    print(f"Final duration: {final_duration/1000:.2f}s")
-    print(f"Original duration: {original_duration_ms/1000:.2f}s")
-    print(f"Difference: {duration_diff}ms")
+    Parameters:
+    - json_file: path to transcription JSON
+    - language, tts_engine, max_speedup, use_original, max_workers,
+      predict_rate, lookahead, max_advance_ms, max_borrow_ms, min_pause_ms,
+      request_timeout, retries, fallback_engines: as for create_perfectly_synced_tts
+    - cache_dir: TTS clip cache directory; clip files are read from it
     
-    if duration_diff > 0:
-        # Add silence to reach exact original duration
-        final_audio += AudioSegment.silent(duration=duration_diff)
-        print(f"Added final padding: {duration_diff}ms")
-    elif duration_diff < 0:
-        # Trim excess (shouldn't happen with proper time stretching)
-        final_audio = final_audio[:original_duration_ms]
-        print(f"Trimmed excess: {-duration_diff}ms")
+    Returns list of (clip_file, start_ms, tempo) in timeline order
+    """
+    if not cache_dir:
+        raise ValueError("plan_dub_clips needs a cache_dir to keep clip files in")
     
-    print(f"{'='*70}")
+    print(f"Loading transcription from {json_file}")
+    with open(json_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
     
-    # Step 4: Export
-    print(f"\nExporting to {output_audio}...")
-    final_audio.export(output_audio, format="mp3", bitrate="192k")
+    cache = TTSCache(cache_dir)
+    policy = SynthesisPolicy(request_timeout, retries, fallback_engines)
     
-    # Cleanup
-    import shutil
-    shutil.rmtree(temp_dir, ignore_errors=True)
+    jobs, items = transcription_jobs(data, language, use_original)
+    if predict_rate:
+        jobs = predict_rates(jobs, items, tts_engine, cache, max_speedup)
     
-    print(f"\n{'='*70}")
-    print(f"✓ PERFECTLY SYNCHRONIZED TTS COMPLETE!")
-    print(f"{'='*70}")
-    print(f"Output file: {output_audio}")
-    print(f"Duration: {len(final_audio)/1000:.2f}s (matches original exactly)")
-    print(f"Segments processed: {len(segments_data)}")
-    print(f"{'='*70}")
+    slots = [(parse_timestamp_to_ms(item['start_time']), parse_timestamp_to_ms(item['end_time']))
+             for item in items]
+    solver = alignment.AlignmentSolver(slots, alignment.pause_gaps(data, items, slots),
+                                       slots[-1][1], max_speedup,
+                                       max_advance_ms, max_borrow_ms, min_pause_ms)
+    clips = []
     
-    return output_audio
+    for offset, results in iter_clip_chunks(jobs, tts_engine, max_workers, cache, lookahead, policy):
+        for idx, result in enumerate(results, start=offset):
+            item = items[idx]
+            
+            if isinstance(result, Exception):
+                print(f"  ✗ Error on segment {item['segment']}: {result}")
+                continue
+            
+            text, language, rate = _unpack_job(jobs[idx])
+            
+            # Failed-over clips are cached under the engine that made them
+            for name in [tts_engine] + policy.fallbacks:
+                clip_file = cache.path(cache_key(text, language, name,
+                                                 get_engine(name).default_voice(language), rate))
+                if os.path.exists(clip_file):
+                    break
+            else:
+                print(f"  ✗ Error on segment {item['segment']}: no clip file in {cache_dir}")
+                continue
+            
+            start_ms, tempo = solver.place(idx, len(result))
+            clips.append((clip_file, start_ms, tempo))
+    
+    report = solver.report()
+    print(f"Planned {len(clips)} clip(s), {sum(tempo > 1.0 for _, _, tempo in clips)} with atempo")
+    print(f"Pause time borrowed: {report['borrowed_ms']/1000:.1f}s, max drift: {report['max_drift_ms']}ms")
+    return clips
 
 def create_synced_bilingual_tts(json_file, output_audio="bilingual_synced.mp3",
                                 original_lang='en', translated_lang='ml',
-                                max_speedup=1.5):
+                                max_speedup=1.5, tts_engine='gtts', max_workers=8,
+                                cache_dir=DEFAULT_CACHE_DIR, stretch_method='wsola',
+                                request_timeout=resilience.DEFAULT_TIMEOUT,
+                                retries=resilience.DEFAULT_RETRIES, fallback_engines=()):
     """
     Create bilingual synchronized TTS where total duration matches original
     
     Format per segment:
     [Original Audio] -> [Short Pause] -> [Translated Audio] -> [Next Segment Start]
     
-    Each pair is time-stretched to fit within the original segment's timeframe
+    Each pair is time-stretched to fit within the original segment's timeframe.
+    All clips are synthesized concurrently (max_workers in flight) with
+    tts_engine (any engine registered in TTS.engines) before the timeline is built in order;
+    clips already in the TTS cache at cache_dir (None disables it) are reused.
+    request_timeout, retries and fallback_engines are as for
+    create_perfectly_synced_tts.
     """
     
     print(f"Loading transcription from {json_file}")
@@ -248,11 +698,9 @@ def create_synced_bilingual_tts(json_file, output_audio="bilingual_synced.mp3",
     print(f"\nOriginal duration: {original_duration_ms/1000:.2f}s")
     print(f"Generating bilingual synchronized TTS...")
     
-    temp_dir = "temp_bilingual_sync"
-    os.makedirs(temp_dir, exist_ok=True)
-    
-    final_audio = AudioSegment.empty()
-    inter_language_pause = 300  # 300ms pause between languages
+    # Synthesize every original/translated pair concurrently, in segment order
+    pairs = []
+    jobs = []
     
     for item in data['transcription']:
         original_text = item.get('original_text', '')
@@ -261,6 +709,18 @@ def create_synced_bilingual_tts(json_file, output_audio="bilingual_synced.mp3",
         if not original_text or not translated_text:
             continue
         
+        pairs.append(item)
+        jobs.append((original_text, original_lang))
+        jobs.append((translated_text, translated_lang))
+    
+    cache = TTSCache(cache_dir) if cache_dir else None
+    policy = SynthesisPolicy(request_timeout, retries, fallback_engines)
+    results = synthesize_clips(jobs, tts_engine, max_workers, cache, policy=policy)
+    
+    final_audio = timeline.Timeline(original_duration_ms)
+    inter_language_pause = 300  # 300ms pause between languages
+    
+    for pair_idx, item in enumerate(pairs):
         segment_num = item['segment']
         start_ms = parse_timestamp_to_ms(item['start_time'])
         end_ms = parse_timestamp_to_ms(item['end_time'])
@@ -268,20 +728,13 @@ def create_synced_bilingual_tts(json_file, output_audio="bilingual_synced.mp3",
         
         print(f"\nSegment {segment_num}: {available_duration}ms available")
         
-        # Generate both TTS
-        orig_file = os.path.join(temp_dir, f"orig_{segment_num}.mp3")
-        trans_file = os.path.join(temp_dir, f"trans_{segment_num}.mp3")
+        orig_audio = results[2 * pair_idx]
+        trans_audio = results[2 * pair_idx + 1]
         
         try:
-            # Original
-            tts_orig = gTTS(text=original_text, lang=original_lang, slow=False)
-            tts_orig.save(orig_file)
-            orig_audio = AudioSegment.from_mp3(orig_file)
-            
-            # Translated
-            tts_trans = gTTS(text=translated_text, lang=translated_lang, slow=False)
-            tts_trans.save(trans_file)
-            trans_audio = AudioSegment.from_mp3(trans_file)
+            for result in (orig_audio, trans_audio):
+                if isinstance(result, Exception):
+                    raise result
             
             # Calculate combined duration
             combined_duration = len(orig_audio) + inter_language_pause + len(trans_audio)
@@ -290,52 +743,39 @@ def create_synced_bilingual_tts(json_file, output_audio="bilingual_synced.mp3",
             print(f"  Translated: {len(trans_audio)}ms")
             print(f"  Combined: {combined_duration}ms (target: {available_duration}ms)")
             
-            # Add silence to reach segment start
-            current_pos = len(final_audio)
-            if current_pos < start_ms:
-                final_audio += AudioSegment.silent(duration=start_ms - current_pos)
-            
             # Time-stretch if combined audio is too long
             if combined_duration > available_duration:
                 speedup_factor = combined_duration / available_duration
                 speedup_factor = min(speedup_factor, max_speedup)
                 
-                orig_audio = speedup(orig_audio, playback_speed=speedup_factor)
-                trans_audio = speedup(trans_audio, playback_speed=speedup_factor)
+                orig_audio = stretch.stretch_audio(orig_audio, speedup_factor, stretch_method)
+                trans_audio = stretch.stretch_audio(trans_audio, speedup_factor, stretch_method)
                 
                 print(f"  Applied speedup: {speedup_factor:.2f}x")
             
-            # Add the audio
-            final_audio += orig_audio
-            final_audio += AudioSegment.silent(duration=inter_language_pause)
-            final_audio += trans_audio
+            # Add the audio at the segment start (or where the previous pair ended)
+            _, orig_end = final_audio.place(orig_audio, start_ms)
+            _, trans_end = final_audio.place(trans_audio, orig_end + inter_language_pause)
             
             # Pad to reach next segment if needed
-            current_length = len(final_audio)
-            if current_length < end_ms:
-                padding = end_ms - current_length
-                final_audio += AudioSegment.silent(duration=padding)
+            if trans_end < end_ms:
+                padding = end_ms - trans_end
+                final_audio.advance(end_ms)
                 print(f"  Added padding: {padding}ms")
             
         except Exception as e:
             print(f"  Error: {e}")
     
-    # Match original duration exactly
-    if len(final_audio) < original_duration_ms:
-        final_audio += AudioSegment.silent(duration=original_duration_ms - len(final_audio))
-    elif len(final_audio) > original_duration_ms:
-        final_audio = final_audio[:original_duration_ms]
+    # Buffer already matches original duration exactly; report anything cut off
+    if final_audio.overrun_ms > 0:
+        print(f"\nTrimmed excess: {final_audio.overrun_ms}ms")
     
     # Export
     print(f"\nExporting to {output_audio}...")
     final_audio.export(output_audio, format="mp3", bitrate="192k")
     
-    # Cleanup
-    import shutil
-    shutil.rmtree(temp_dir, ignore_errors=True)
-    
     print(f"\n✓ Bilingual synchronized TTS complete!")
-    print(f"✓ Duration: {len(final_audio)/1000:.2f}s (matches original)")
+    print(f"✓ Duration: {final_audio.duration_ms/1000:.2f}s (matches original)")
     
     return output_audio
 # def create_tts_with_pauses(json_file, output_audio="output_tts.mp3", language='ml', 
@@ -0,0 +1,253 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import random
+import tempfile
+import time
+
+from Translation import stub_servers
+from Translation import translate
+from Translation.translate import TranslatorType
+
+# ============================================================================
+# TRANSLATION LOAD TEST
+# ============================================================================
+#
+# Drives translate_transcription and friends against local stub servers
+# standing in for LibreTranslate and the Anthropic API, so concurrency,
+# batching and retry settings can be tuned without touching real endpoints.
+#
+#   python -m Translation.loadtest --segments 300 --latency-ms 120 --throttle-rate 0.05
+
+MODES = ['libre', 'anthropic', 'multi-libre', 'multi-anthropic', 'router', 'batch']
+
+MULTI_LANGUAGES = ['ml', 'ta', 'hi', 'te']
+
+WORDS = ("the a man walks into room looks at clock waits for train she laughs "
+         "and then runs away from police while crowd watches quietly").split()
+
+def make_transcription(output_file, segments=200, seed=0):
+    """Write a synthetic transcription JSON with the given number of segments"""
+    rng = random.Random(seed)
+    transcription = []
+    
+    for idx in range(segments):
+        start_ms = idx * 3000
+        end_ms = start_ms + 2500
+        transcription.append({
+            "segment": idx + 1,
+            "start_time": f"00:{start_ms // 60000 % 60:02d}:{start_ms // 1000 % 60:02d}.000",
+            "end_time": f"00:{end_ms // 60000 % 60:02d}:{end_ms // 1000 % 60:02d}.500",
+            "duration_ms": end_ms - start_ms,
+            "text": " ".join(rng.choice(WORDS) for _ in range(rng.randint(3, 15))),
+            "language": "en"
+        })
+    
+    data = {
+        "transcription": transcription,
+        "pauses": [],
+        "total_segments": segments,
+        "total_pauses": 0,
+        "model_used": "synthetic"
+    }
+    
+    with open(output_file, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2)
+    
+    return output_file
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+def summarize_requests(servers):
+    """Combine and clear the request records of all stub servers"""
+    latencies = []
+    throttled = 0
+    errors = 0
+    
+    for server in servers:
+        with server.lock:
+            records = list(server.records)
+            server.records.clear()
+        
+        for latency, status in records:
+            if status == 200:
+                latencies.append(latency)
+            elif status == 429:
+                throttled += 1
+            else:
+                errors += 1
+    
+    return {
+        'requests': len(latencies) + throttled + errors,
+        'p50_ms': percentile(latencies, 0.50) * 1000,
+        'p95_ms': percentile(latencies, 0.95) * 1000,
+        'p99_ms': percentile(latencies, 0.99) * 1000,
+        'throttled': throttled,
+        'server_errors': errors
+    }
+
+def run_mode(mode, input_file, work_dir, workers):
+    """Run one execution mode and return the list of translated data dicts"""
+    output_file = os.path.join(work_dir, f"{mode}.json")
+    
+    if mode == 'libre':
+        return [translate.translate_transcription(input_file, output_file, 'ml',
+                                                  translator_type=TranslatorType.LIBRE)]
+    
+    elif mode == 'anthropic':
+        return [translate.translate_transcription(input_file, output_file, 'ml',
+                                                  translator_type=TranslatorType.ANTHROPIC)]
+    
+    elif mode in ('multi-libre', 'multi-anthropic'):
+        translator_type = TranslatorType.LIBRE if mode == 'multi-libre' else TranslatorType.ANTHROPIC
+        results = translate.translate_transcription_multi(
+            input_file, os.path.join(work_dir, f"{mode}_{{lang}}.json"), MULTI_LANGUAGES,
+            translator_type=translator_type, max_workers=workers)
+        return list(results.values())
+    
+    elif mode == 'router':
+        with translate.TranslatorRouter([TranslatorType.LIBRE, TranslatorType.ANTHROPIC],
+                                        max_workers=workers) as router:
+            return [translate.translate_transcription(input_file, output_file, 'ml', router=router)]
+    
+    elif mode == 'batch':
+        return translate.translate_transcriptions_batch([(input_file, output_file)], 'ml',
+                                                        poll_interval=0.2)
+    
+    raise ValueError(f"Unknown mode: {mode}")
+
+def run_loadtest(segments=200, modes=None, workers=8, request_delay=None,
+                 libre_faults=None, anthropic_faults=None, quiet=True):
+    """
+    Run translation modes against local stub servers and collect metrics
+    
+    Parameters:
+    - segments: number of synthetic segments to translate
+    - modes: list of modes from MODES (default: all)
+    - workers: concurrency for multi and router modes
+    - request_delay: override REQUEST_DELAYS for every backend (seconds), None keeps defaults
+    - libre_faults: latency/error options for the LibreTranslate stub (see start_stub_server)
+    - anthropic_faults: latency/error options for the Anthropic stub
+    - quiet: suppress per-segment output from the translation functions
+    
+    Returns list of per-mode result dicts
+    """
+    modes = modes or MODES
+    libre_server, libre_url = stub_servers.start_libre_stub(**(libre_faults or {}))
+    anthropic_server, anthropic_url = stub_servers.start_anthropic_stub(**(anthropic_faults or {}))
+    servers = [libre_server, anthropic_server]
+    
+    saved_env = {key: os.environ.get(key)
+                 for key in ('LIBRETRANSLATE_URL', 'ANTHROPIC_BASE_URL', 'ANTHROPIC_API_KEY')}
+    saved_delays = dict(translate.REQUEST_DELAYS)
+    
+    os.environ['LIBRETRANSLATE_URL'] = libre_url + '/'
+    os.environ['ANTHROPIC_BASE_URL'] = anthropic_url
+    os.environ['ANTHROPIC_API_KEY'] = 'stub'
+    if request_delay is not None:
+        for translator_type in TranslatorType:
+            translate.REQUEST_DELAYS[translator_type] = request_delay
+    
+    results = []
+    
+    try:
+        with tempfile.TemporaryDirectory() as work_dir:
+            input_file = make_transcription(os.path.join(work_dir, 'input.json'), segments)
+            
+            for mode in modes:
+                print(f"Running {mode}...")
+                start = time.monotonic()
+                
+                output = io.StringIO()
+                with contextlib.redirect_stdout(output) if quiet else contextlib.nullcontext():
+                    try:
+                        translated = run_mode(mode, input_file, work_dir, workers)
+                        error = None
+                    except Exception as e:
+                        translated = []
+                        error = str(e)
+                
+                elapsed = time.monotonic() - start
+                successful = sum(d['translation_info']['successful_translations'] for d in translated)
+                failed = sum(d['translation_info']['failed_translations'] for d in translated)
+                
+                result = {
+                    'mode': mode,
+                    'seconds': elapsed,
+                    'translations': successful,
+                    'failed': failed,
+                    'throughput': successful / elapsed if elapsed > 0 else 0.0,
+                    'error': error
+                }
+                result.update(summarize_requests(servers))
+                results.append(result)
+    finally:
+        for server in servers:
+            server.shutdown()
+        for key, value in saved_env.items():
+            if value is None:
+                os.environ.pop(key, None)
+            else:
+                os.environ[key] = value
+        translate.REQUEST_DELAYS.clear()
+        translate.REQUEST_DELAYS.update(saved_delays)
+    
+    return results
+
+def print_report(results):
+    """Print load test results as a table"""
+    print("\n" + "="*100)
+    print("TRANSLATION LOAD TEST")
+    print("="*100)
+    print(f"{'Mode':<16}{'Time (s)':>10}{'Done':>8}{'Failed':>8}{'Seg/s':>9}"
+          f"{'Requests':>10}{'p50 ms':>9}{'p95 ms':>9}{'p99 ms':>9}{'429s':>7}{'5xx':>6}")
+    print("-"*100)
+    
+    for r in results:
+        print(f"{r['mode']:<16}{r['seconds']:>10.2f}{r['translations']:>8}{r['failed']:>8}"
+              f"{r['throughput']:>9.1f}{r['requests']:>10}{r['p50_ms']:>9.0f}{r['p95_ms']:>9.0f}"
+              f"{r['p99_ms']:>9.0f}{r['throttled']:>7}{r['server_errors']:>6}")
+        if r['error']:
+            print(f"  Error: {r['error']}")
+    
+    print("="*100)
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test translation backends against local stubs")
+    parser.add_argument('--segments', type=int, default=200)
+    parser.add_argument('--modes', nargs='+', choices=MODES, default=MODES)
+    parser.add_argument('--workers', type=int, default=8)
+    parser.add_argument('--request-delay', type=float, default=None,
+                        help="override per-backend request spacing in seconds")
+    parser.add_argument('--latency', choices=['fixed', 'uniform', 'exponential', 'lognormal'],
+                        default='lognormal')
+    parser.add_argument('--latency-ms', type=float, default=100)
+    parser.add_argument('--latency-sigma', type=float, default=0.5)
+    parser.add_argument('--error-rate', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=float, default=0.0)
+    parser.add_argument('--rate-cap', type=float, default=None, help="requests per second per stub")
+    parser.add_argument('--verbose', action='store_true', help="show per-segment translation output")
+    args = parser.parse_args()
+    
+    faults = {
+        'latency': args.latency,
+        'latency_ms': args.latency_ms,
+        'latency_sigma': args.latency_sigma,
+        'error_rate': args.error_rate,
+        'throttle_rate': args.throttle_rate,
+        'rate_cap': args.rate_cap
+    }
+    
+    results = run_loadtest(segments=args.segments, modes=args.modes, workers=args.workers,
+                           request_delay=args.request_delay, libre_faults=faults,
+                           anthropic_faults=faults, quiet=not args.verbose)
+    print_report(results)
+
+if __name__ == "__main__":
+    main()
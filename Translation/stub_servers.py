@@ -0,0 +1,339 @@
+import json
+import random
+import threading
+import time
+import uuid
+from datetime import datetime, timezone, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+# ============================================================================
+# LOCAL STUB SERVERS
+# ============================================================================
+#
+# Stand-ins for translation APIs so the translation code can be exercised
+# without network access or API keys. Point the client at the returned
+# base_url, e.g.:
+#
+#   server, base_url = start_anthropic_stub()
+#   translate.translate_transcriptions_batch(jobs, 'ml', base_url=base_url)
+#   server.shutdown()
+#
+# Every stub can inject latency, errors, 429s and a request rate cap (see
+# StubHandler) and records per-request service times in server.records.
+
+def stub_translation(text, target=None):
+    """Fake translation returned by the stub servers"""
+    return f"[{target or 'stub'}] {text}"
+
+def _target_codes(system):
+    """Language codes requested by a multi-target translation prompt"""
+    text = system if isinstance(system, str) else "".join(block.get('text', '') for block in system)
+    for line in text.splitlines():
+        if line.startswith("Target language codes:"):
+            return [code.strip() for code in line.split(":", 1)[1].split(",")]
+    return []
+
+def _utc_now():
+    return datetime.now(timezone.utc)
+
+class StubHandler(BaseHTTPRequestHandler):
+    """
+    Base handler with fault injection, configured through server attributes:
+    - latency: 'fixed', 'uniform', 'exponential' or 'lognormal'
+    - latency_ms: mean (median for lognormal) added latency in milliseconds
+    - latency_sigma: shape of the lognormal distribution
+    - error_rate: fraction of requests answered with HTTP 500
+    - throttle_rate: fraction of requests answered with HTTP 429
+    - rate_cap: maximum requests per second before answering 429 (None = unlimited)
+    """
+    
+    def log_message(self, format, *args):
+        pass
+    
+    def _send_json(self, status, body, content_type='application/json'):
+        payload = body if isinstance(body, bytes) else json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+        self._record(status)
+    
+    def _read_json(self):
+        length = int(self.headers.get('Content-Length', 0))
+        return json.loads(self.rfile.read(length) or b'{}')
+    
+    def _record(self, status):
+        started = getattr(self, '_started', None)
+        if started is not None:
+            with self.server.lock:
+                self.server.records.append((time.monotonic() - started, status))
+            self._started = None
+    
+    def _sample_latency(self):
+        server = self.server
+        mean = server.latency_ms / 1000
+        if server.latency == 'uniform':
+            return random.uniform(0, 2 * mean)
+        elif server.latency == 'exponential':
+            return random.expovariate(1 / mean) if mean > 0 else 0.0
+        elif server.latency == 'lognormal':
+            return random.lognormvariate(0, server.latency_sigma) * mean
+        return mean
+    
+    def _take_token(self):
+        """Token bucket holding up to rate_cap requests, refilled at rate_cap per second"""
+        server = self.server
+        if server.rate_cap is None:
+            return True
+        
+        with server.lock:
+            now = time.monotonic()
+            server.tokens = min(server.rate_cap,
+                                server.tokens + (now - server.last_refill) * server.rate_cap)
+            server.last_refill = now
+            if server.tokens < 1:
+                return False
+            server.tokens -= 1
+            return True
+    
+    def _inject_faults(self):
+        """
+        Apply latency and fault injection to a request
+        
+        Returns True if an error response was already sent
+        """
+        self._started = time.monotonic()
+        
+        if not self._take_token():
+            self._send_json(429, self._error_body('rate_limit_error', "rate cap exceeded"))
+            return True
+        
+        time.sleep(self._sample_latency())
+        
+        roll = random.random()
+        if roll < self.server.throttle_rate:
+            self._send_json(429, self._error_body('rate_limit_error', "injected 429"))
+            return True
+        if roll < self.server.throttle_rate + self.server.error_rate:
+            self._send_json(500, self._error_body('api_error', "injected error"))
+            return True
+        return False
+    
+    def _error_body(self, error_type, message):
+        return {"error": message}
+
+class AnthropicStubHandler(StubHandler):
+    """
+    Minimal Anthropic Messages API:
+    - POST /v1/messages
+    - POST /v1/messages/batches
+    - GET  /v1/messages/batches/{id}
+    - GET  /v1/messages/batches/{id}/results
+    """
+    
+    def _error_body(self, error_type, message):
+        return {"type": "error", "error": {"type": error_type, "message": message}}
+    
+    def _base_url(self):
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def _message(self, params):
+        """Build a Message response for one set of request params"""
+        content = params['messages'][-1]['content']
+        if isinstance(content, list):
+            content = "".join(block.get('text', '') for block in content)
+        
+        system = params.get('system', [])
+        cached = isinstance(system, list) and any('cache_control' in block for block in system)
+        
+        targets = _target_codes(system)
+        if targets:
+            reply = json.dumps({code: stub_translation(content, code) for code in targets},
+                               ensure_ascii=False)
+        else:
+            reply = stub_translation(content)
+        
+        return {
+            "id": f"msg_{uuid.uuid4().hex[:24]}",
+            "type": "message",
+            "role": "assistant",
+            "model": params.get('model', 'stub'),
+            "content": [{"type": "text", "text": reply}],
+            "stop_reason": "end_turn",
+            "stop_sequence": None,
+            "usage": {
+                "input_tokens": len(content.split()),
+                "output_tokens": len(content.split()) + 1,
+                "cache_creation_input_tokens": 0,
+                "cache_read_input_tokens": 1 if cached else 0
+            }
+        }
+    
+    def _batch(self, batch):
+        """Batch object as returned by the API, ended once its delay has passed"""
+        ended = time.time() >= batch['ready_at']
+        total = len(batch['requests'])
+        created_at = batch['created_at']
+        
+        return {
+            "id": batch['id'],
+            "type": "message_batch",
+            "processing_status": "ended" if ended else "in_progress",
+            "request_counts": {
+                "processing": 0 if ended else total,
+                "succeeded": total if ended else 0,
+                "errored": 0,
+                "canceled": 0,
+                "expired": 0
+            },
+            "created_at": created_at.isoformat(),
+            "expires_at": (created_at + timedelta(hours=24)).isoformat(),
+            "ended_at": _utc_now().isoformat() if ended else None,
+            "cancel_initiated_at": None,
+            "archived_at": None,
+            "results_url": (f"{self._base_url()}/v1/messages/batches/{batch['id']}/results"
+                            if ended else None)
+        }
+    
+    def do_POST(self):
+        if self._inject_faults():
+            return
+        
+        if self.path == '/v1/messages':
+            self._send_json(200, self._message(self._read_json()))
+        
+        elif self.path == '/v1/messages/batches':
+            body = self._read_json()
+            batch = {
+                'id': f"msgbatch_{uuid.uuid4().hex[:24]}",
+                'requests': body['requests'],
+                'created_at': _utc_now(),
+                'ready_at': time.time() + self.server.batch_delay
+            }
+            with self.server.lock:
+                self.server.batches[batch['id']] = batch
+            self._send_json(200, self._batch(batch))
+        
+        else:
+            self._send_json(404, self._error_body('not_found_error', self.path))
+    
+    def do_GET(self):
+        parts = self.path.strip('/').split('/')
+        
+        if parts[:3] != ['v1', 'messages', 'batches'] or len(parts) < 4:
+            self._send_json(404, self._error_body('not_found_error', self.path))
+            return
+        
+        with self.server.lock:
+            batch = self.server.batches.get(parts[3])
+        
+        if batch is None:
+            self._send_json(404, self._error_body('not_found_error', parts[3]))
+        elif len(parts) == 4:
+            self._send_json(200, self._batch(batch))
+        else:
+            lines = [
+                json.dumps({
+                    "custom_id": request['custom_id'],
+                    "result": {"type": "succeeded", "message": self._message(request['params'])}
+                })
+                for request in batch['requests']
+            ]
+            self._send_json(200, ("\n".join(lines) + "\n").encode('utf-8'),
+                            content_type='application/binary')
+
+class LibreStubHandler(StubHandler):
+    """
+    Minimal LibreTranslate API:
+    - GET  /languages
+    - POST /translate (query string, form or JSON parameters)
+    """
+    
+    def do_GET(self):
+        if urlparse(self.path).path.rstrip('/') == '/languages':
+            codes = ['en', 'ml', 'hi', 'ta', 'te', 'bn', 'es', 'fr', 'de', 'zh']
+            self._send_json(200, [{"code": code, "name": code, "targets": codes} for code in codes])
+        else:
+            self._send_json(404, self._error_body('not_found_error', self.path))
+    
+    def do_POST(self):
+        if self._inject_faults():
+            return
+        
+        url = urlparse(self.path)
+        if url.path.rstrip('/') != '/translate':
+            self._send_json(404, self._error_body('not_found_error', self.path))
+            return
+        
+        params = {key: values[0] for key, values in parse_qs(url.query).items()}
+        length = int(self.headers.get('Content-Length', 0))
+        if length:
+            body = self.rfile.read(length)
+            if self.headers.get('Content-Type', '').startswith('application/json'):
+                params.update(json.loads(body))
+            else:
+                params.update({key: values[0] for key, values in parse_qs(body.decode('utf-8')).items()})
+        
+        self._send_json(200, {"translatedText": stub_translation(params.get('q', ''),
+                                                                 params.get('target'))})
+
+def start_stub_server(handler_class, port=0, latency='fixed', latency_ms=0, latency_sigma=0.5,
+                      error_rate=0.0, throttle_rate=0.0, rate_cap=None, **attributes):
+    """
+    Start a stub server on a background thread
+    
+    Parameters:
+    - handler_class: request handler class
+    - port: port to bind on 127.0.0.1 (0 picks a free port)
+    - latency, latency_ms, latency_sigma: added latency distribution (see StubHandler)
+    - error_rate: fraction of requests answered with HTTP 500
+    - throttle_rate: fraction of requests answered with HTTP 429
+    - rate_cap: maximum requests per second before answering 429 (None = unlimited)
+    - attributes: extra attributes set on the server for the handler to read
+    
+    Returns (server, base_url); call server.shutdown() when done
+    """
+    server = ThreadingHTTPServer(('127.0.0.1', port), handler_class)
+    server.daemon_threads = True
+    server.lock = threading.Lock()
+    server.records = []
+    server.latency = latency
+    server.latency_ms = latency_ms
+    server.latency_sigma = latency_sigma
+    server.error_rate = error_rate
+    server.throttle_rate = throttle_rate
+    server.rate_cap = rate_cap
+    server.tokens = rate_cap or 0
+    server.last_refill = time.monotonic()
+    for name, value in attributes.items():
+        setattr(server, name, value)
+    
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    
+    host, port = server.server_address[:2]
+    return server, f"http://{host}:{port}"
+
+def start_anthropic_stub(port=0, batch_delay=0.0, **faults):
+    """
+    Start a local Anthropic API stub
+    
+    Parameters:
+    - port: port to bind (0 picks a free port)
+    - batch_delay: seconds before a submitted batch reports 'ended'
+    - faults: latency/error options accepted by start_stub_server
+    """
+    return start_stub_server(AnthropicStubHandler, port, batches={}, batch_delay=batch_delay, **faults)
+
+def start_libre_stub(port=0, **faults):
+    """
+    Start a local LibreTranslate stub
+    
+    Parameters:
+    - port: port to bind (0 picks a free port)
+    - faults: latency/error options accepted by start_stub_server
+    """
+    return start_stub_server(LibreStubHandler, port, **faults)
@@ -1,5 +1,10 @@
+import copy
 import json
+import os
+import threading
 import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, as_completed, wait
 from enum import Enum
 
 # Translation backends
@@ -28,12 +33,15 @@ def translate_with_mymemory(text, source_lang, target_lang):
 def translate_with_libre(text, source_lang, target_lang, api_key=None):
     """Translate using LibreTranslate (open source, self-hostable)"""
     from deep_translator import LibreTranslator
+    # Self-hosted or local instance, e.g. LIBRETRANSLATE_URL=http://localhost:5000/
+    base_url = os.environ.get('LIBRETRANSLATE_URL')
     if api_key:
-        translator = LibreTranslator(source=source_lang, target=target_lang, api_key=api_key)
+        translator = LibreTranslator(source=source_lang, target=target_lang, api_key=api_key,
+                                     custom_url=base_url)
     else:
         # Using public instance
         translator = LibreTranslator(source=source_lang, target=target_lang, 
-                                     base_url='https://libretranslate.com/')
+                                     custom_url=base_url or 'https://libretranslate.com/')
     return translator.translate(text)
 
 def translate_with_deepl(text, source_lang, target_lang, api_key):
@@ -44,45 +52,347 @@ def translate_with_deepl(text, source_lang, target_lang, api_key):
                                        target_lang=target_lang.upper())
     return result.text
 
-def translate_with_anthropic(text, source_lang, target_lang):
-    """Translate using Claude API (highest quality, requires API access)"""
-    import anthropic
-    
-    client = anthropic.Anthropic()
-    
-    # Language name mapping
-    lang_names = {
-        'ml': 'Malayalam',
-        'en': 'English',
-        'hi': 'Hindi',
-        'ta': 'Tamil',
-        'te': 'Telugu',
-        'bn': 'Bengali',
-        'es': 'Spanish',
-        'fr': 'French',
-        'de': 'German',
-        'zh': 'Chinese'
-    }
+# Language names used in Claude prompts
+LANGUAGE_NAMES = {
+    'ml': 'Malayalam',
+    'en': 'English',
+    'hi': 'Hindi',
+    'ta': 'Tamil',
+    'te': 'Telugu',
+    'bn': 'Bengali',
+    'es': 'Spanish',
+    'fr': 'French',
+    'de': 'German',
+    'zh': 'Chinese'
+}
+
+ANTHROPIC_MODEL = "claude-sonnet-4-20250514"
+
+# Segments that carry no speech and are never sent to a translator
+SKIP_TEXTS = ['[UNINTELLIGIBLE]', '[ERROR]', '']
+
+def anthropic_instructions(source_lang, target_lang, glossary=None):
+    """Build the instruction prefix shared by every Claude translation request"""
+    source_name = LANGUAGE_NAMES.get(source_lang, source_lang)
+    target_name = LANGUAGE_NAMES.get(target_lang, target_lang)
+    
+    instructions = (f"You translate {source_name} film dialogue to {target_name}. "
+                    f"Each user message is one subtitle segment. "
+                    f"Provide ONLY the translation, no explanations.")
+    
+    if glossary:
+        terms = "\n".join(f"- {src} => {dst}" for src, dst in glossary.items())
+        instructions += f"\n\nAlways use these translations for the following terms:\n{terms}"
+    
+    return instructions
+
+# Prompt caching only applies to prefixes of at least this many tokens
+# (1024 for Sonnet); shorter prefixes are processed in full on every request.
+ANTHROPIC_MIN_CACHE_TOKENS = 1024
+
+def estimate_tokens(text):
+    """Rough token count of a prompt (about 4 characters per token)"""
+    return len(text) // 4
+
+def system_blocks(instructions):
+    """
+    System prompt as a single text block
     
-    source_name = lang_names.get(source_lang, source_lang)
-    target_name = lang_names.get(target_lang, target_lang)
+    The block is marked cacheable only when it is long enough to be cached,
+    which in practice means a large glossary; the bare instructions are a few
+    dozen tokens and gain nothing from caching.
+    """
+    block = {"type": "text", "text": instructions}
+    if estimate_tokens(instructions) >= ANTHROPIC_MIN_CACHE_TOKENS:
+        block["cache_control"] = {"type": "ephemeral"}
+    return [block]
+
+def anthropic_system_blocks(source_lang, target_lang, glossary=None):
+    """System prompt blocks of a translation request (see system_blocks)"""
+    return system_blocks(anthropic_instructions(source_lang, target_lang, glossary))
+
+def translate_with_anthropic(text, source_lang, target_lang, glossary=None, client=None):
+    """Translate using Claude API (highest quality, requires API access)"""
+    if client is None:
+        import anthropic
+        client = anthropic.Anthropic()
     
     message = client.messages.create(
-        model="claude-sonnet-4-20250514",
+        model=ANTHROPIC_MODEL,
         max_tokens=1000,
+        system=anthropic_system_blocks(source_lang, target_lang, glossary),
         messages=[
             {
                 "role": "user",
-                "content": f"Translate this {source_name} text to {target_name}. Provide ONLY the translation, no explanations:\n\n{text}"
+                "content": text
             }
         ]
     )
     
     return message.content[0].text.strip()
 
+def translate_with_anthropic_multi(text, source_lang, target_langs, glossary=None, client=None):
+    """
+    Translate one text into several languages with a single Claude request
+    
+    Returns dict of {language code: translated text}
+    """
+    if client is None:
+        import anthropic
+        client = anthropic.Anthropic()
+    
+    source_name = LANGUAGE_NAMES.get(source_lang, source_lang)
+    target_names = ", ".join(f"{code} ({LANGUAGE_NAMES.get(code, code)})" for code in target_langs)
+    
+    instructions = (f"You translate {source_name} film dialogue into several languages. "
+                    f"Each user message is one subtitle segment. "
+                    f"Respond with ONLY a JSON object mapping each language code to its translation, "
+                    f"no explanations.\nTarget language codes: {', '.join(target_langs)}\n"
+                    f"Languages: {target_names}")
+    
+    if glossary:
+        terms = "\n".join(f"- {src} => {dst}" for src, dst in glossary.items())
+        instructions += f"\n\nAlways use these translations for the following terms:\n{terms}"
+    
+    message = client.messages.create(
+        model=ANTHROPIC_MODEL,
+        max_tokens=1000 * len(target_langs),
+        system=system_blocks(instructions),
+        messages=[
+            {
+                "role": "user",
+                "content": text
+            }
+        ]
+    )
+    
+    reply = message.content[0].text.strip()
+    if reply.startswith("```"):
+        reply = reply.strip("`").removeprefix("json").strip()
+    
+    translations = json.loads(reply)
+    return {code: translations[code].strip() for code in target_langs if code in translations}
+
+# Minimum seconds between requests to each backend to avoid rate limiting
+REQUEST_DELAYS = {
+    TranslatorType.GOOGLE: 0.5,
+    TranslatorType.MYMEMORY: 0.5,
+    TranslatorType.ANTHROPIC: 0.3,
+}
+
+def translate_text(text, source_lang, target_lang, translator_type, api_key=None):
+    """Translate a single text with the selected backend"""
+    if translator_type == TranslatorType.GOOGLE:
+        return translate_with_google(text, source_lang, target_lang)
+    
+    elif translator_type == TranslatorType.MYMEMORY:
+        return translate_with_mymemory(text, source_lang, target_lang)
+    
+    elif translator_type == TranslatorType.LIBRE:
+        return translate_with_libre(text, source_lang, target_lang, api_key)
+    
+    elif translator_type == TranslatorType.DEEPL:
+        if not api_key:
+            raise ValueError("DeepL requires an API key")
+        return translate_with_deepl(text, source_lang, target_lang, api_key)
+    
+    elif translator_type == TranslatorType.ANTHROPIC:
+        return translate_with_anthropic(text, source_lang, target_lang)
+    
+    else:
+        raise ValueError(f"Unknown translator type: {translator_type}")
+
+class RateLimiter:
+    """Spaces out request starts across threads by a minimum interval"""
+    
+    def __init__(self, min_interval):
+        self.min_interval = min_interval
+        self.lock = threading.Lock()
+        self.next_slot = 0.0
+    
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.min_interval
+        
+        if slot > now:
+            time.sleep(slot - now)
+
+class BackendStats:
+    """Rolling latency and error statistics for one translation backend"""
+    
+    def __init__(self, window=50):
+        self.latencies = deque(maxlen=window)
+        self.outcomes = deque(maxlen=window)
+        self.lock = threading.Lock()
+    
+    def record(self, latency, success):
+        with self.lock:
+            if success:
+                self.latencies.append(latency)
+            self.outcomes.append(success)
+    
+    def percentile(self, q):
+        """Latency percentile in seconds, or None before the first success"""
+        with self.lock:
+            if not self.latencies:
+                return None
+            ordered = sorted(self.latencies)
+        return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+    
+    @property
+    def p50(self):
+        return self.percentile(0.50)
+    
+    @property
+    def p95(self):
+        return self.percentile(0.95)
+    
+    @property
+    def error_rate(self):
+        with self.lock:
+            if not self.outcomes:
+                return 0.0
+            return self.outcomes.count(False) / len(self.outcomes)
+    
+    @property
+    def samples(self):
+        return len(self.outcomes)
+
+class TranslatorRouter:
+    """
+    Routes each request to the fastest healthy backend and hedges slow ones
+    
+    A request goes to the backend with the lowest rolling p50 latency among
+    healthy backends (error rate at most max_error_rate). If it has not
+    answered within that backend's p95 latency, a duplicate request is sent
+    to the next backend and whichever succeeds first wins. Failed requests
+    fall through to the next backend immediately.
+    
+    Parameters:
+    - translator_types: list of TranslatorType to route between
+    - api_key: API key passed to backends that need one
+    - window: number of recent requests kept per backend
+    - max_error_rate: error rate above which a backend is considered unhealthy
+    - min_samples: requests needed before a backend can be marked unhealthy
+    - default_hedge_delay: hedge timeout (seconds) before a backend has latency data
+    - min_hedge_delay: lower bound on the p95-based hedge timeout (seconds)
+    - max_workers: size of the shared request thread pool
+    
+    Use it as a context manager (or call close()) to stop the pool.
+    """
+    
+    def __init__(self, translator_types, api_key=None, window=50, max_error_rate=0.5,
+                 min_samples=5, default_hedge_delay=5.0, min_hedge_delay=0.2, max_workers=8):
+        self.translator_types = list(translator_types)
+        self.api_key = api_key
+        self.max_error_rate = max_error_rate
+        self.min_samples = min_samples
+        self.default_hedge_delay = default_hedge_delay
+        self.min_hedge_delay = min_hedge_delay
+        self.stats = {t: BackendStats(window) for t in self.translator_types}
+        self.limiters = {t: RateLimiter(REQUEST_DELAYS.get(t, 0)) for t in self.translator_types}
+        self.hedges = 0
+        self.executor = ThreadPoolExecutor(max_workers=max_workers)
+    
+    def is_healthy(self, translator_type):
+        stats = self.stats[translator_type]
+        return stats.samples < self.min_samples or stats.error_rate <= self.max_error_rate
+    
+    def ranked(self):
+        """Backends in routing order: healthy by p50 latency, then unhealthy by error rate"""
+        healthy = [t for t in self.translator_types if self.is_healthy(t)]
+        unhealthy = [t for t in self.translator_types if not self.is_healthy(t)]
+        
+        # Backends without latency data sort first so they get measured
+        healthy.sort(key=lambda t: self.stats[t].p50 or 0.0)
+        unhealthy.sort(key=lambda t: self.stats[t].error_rate)
+        return healthy + unhealthy
+    
+    def hedge_delay(self, translator_type):
+        p95 = self.stats[translator_type].p95
+        if p95 is None:
+            return self.default_hedge_delay
+        return max(p95, self.min_hedge_delay)
+    
+    def _call(self, translator_type, text, source_lang, target_lang):
+        self.limiters[translator_type].wait()
+        start = time.monotonic()
+        try:
+            result = translate_text(text, source_lang, target_lang, translator_type, self.api_key)
+        except Exception:
+            self.stats[translator_type].record(time.monotonic() - start, False)
+            raise
+        self.stats[translator_type].record(time.monotonic() - start, True)
+        return result
+    
+    def translate(self, text, source_lang, target_lang):
+        """
+        Translate text through the router
+        
+        Returns (translated_text, TranslatorType that served the request)
+        """
+        candidates = self.ranked()
+        pending = {}
+        errors = []
+        
+        def launch():
+            translator_type = candidates[len(pending) + len(errors)]
+            future = self.executor.submit(self._call, translator_type, text, source_lang, target_lang)
+            pending[future] = translator_type
+            return translator_type
+        
+        last_launched = launch()
+        
+        while pending:
+            can_hedge = len(pending) + len(errors) < len(candidates)
+            timeout = self.hedge_delay(last_launched) if can_hedge else None
+            done, _ = wait(pending, timeout=timeout, return_when=FIRST_COMPLETED)
+            
+            if not done:
+                # Slow response: send a hedged duplicate to the next backend
+                self.hedges += 1
+                last_launched = launch()
+                continue
+            
+            for future in done:
+                translator_type = pending.pop(future)
+                try:
+                    return future.result(), translator_type
+                except Exception as e:
+                    errors.append(f"{translator_type.value}: {e}")
+            
+            if not pending and len(errors) < len(candidates):
+                last_launched = launch()
+        
+        raise RuntimeError("All backends failed: " + "; ".join(errors))
+    
+    def close(self):
+        """Stop the request pool without waiting for losing hedged requests"""
+        self.executor.shutdown(wait=False, cancel_futures=True)
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+    
+    def print_stats(self):
+        """Print rolling latency and error statistics per backend"""
+        print(f"\nRouter statistics (hedged requests: {self.hedges}):")
+        for translator_type in self.translator_types:
+            stats = self.stats[translator_type]
+            p50, p95 = stats.p50, stats.p95
+            print(f"  {translator_type.value}: "
+                  f"p50={p50 * 1000 if p50 is not None else 0:.0f}ms "
+                  f"p95={p95 * 1000 if p95 is not None else 0:.0f}ms "
+                  f"errors={stats.error_rate:.0%} "
+                  f"({'healthy' if self.is_healthy(translator_type) else 'unhealthy'})")
+
 def translate_transcription(input_file, output_file, target_language, 
                            source_language='en', translator_type=TranslatorType.MYMEMORY,
-                           api_key=None):
+                           api_key=None, router=None):
     """
     Translate transcription JSON while preserving timing and pause information
     
@@ -93,6 +403,8 @@ def translate_transcription(input_file, output_file, target_language,
     - source_language: source language code (default: 'en')
     - translator_type: TranslatorType enum (GOOGLE, MYMEMORY, LIBRE, DEEPL, ANTHROPIC)
     - api_key: API key for DeepL or LibreTranslate (if required)
+    - router: optional TranslatorRouter; when given, translator_type is ignored and
+              each segment records the backend that actually served it
     
     Recommended for Malayalam:
     - TranslatorType.MYMEMORY (free, good for Indian languages)
@@ -118,7 +430,10 @@ def translate_transcription(input_file, output_file, target_language,
         data = json.load(f)
     
     # Select translator
-    print(f"\nUsing translator: {translator_type.value}")
+    if router is not None:
+        print(f"\nUsing translator router: {', '.join(t.value for t in router.translator_types)}")
+    else:
+        print(f"\nUsing translator: {translator_type.value}")
     print(f"Translating from {source_language} to {target_language}...")
     print(f"Total segments to translate: {len(data['transcription'])}")
     
@@ -126,6 +441,7 @@ def translate_transcription(input_file, output_file, target_language,
     translated_data = data.copy()
     successful_translations = 0
     failed_translations = 0
+    backends_used = {}
     
     for idx, segment in enumerate(translated_data['transcription']):
         print(f"\nTranslating segment {idx + 1}/{len(data['transcription'])}")
@@ -133,45 +449,26 @@ def translate_transcription(input_file, output_file, target_language,
         
         try:
             # Skip empty or error segments
-            if segment['text'] in ['[UNINTELLIGIBLE]', '[ERROR]', '']:
+            if segment['text'] in SKIP_TEXTS:
                 print(f"  Skipping (no content)")
                 continue
             
-            # Translate based on selected translator
-            if translator_type == TranslatorType.GOOGLE:
-                translated_text = translate_with_google(segment['text'], source_language, target_language)
-            
-            elif translator_type == TranslatorType.MYMEMORY:
-                translated_text = translate_with_mymemory(segment['text'], source_language, target_language)
-            
-            elif translator_type == TranslatorType.LIBRE:
-                translated_text = translate_with_libre(segment['text'], source_language, target_language, api_key)
-            
-            elif translator_type == TranslatorType.DEEPL:
-                if not api_key:
-                    raise ValueError("DeepL requires an API key")
-                translated_text = translate_with_deepl(segment['text'], source_language, target_language, api_key)
-            
-            elif translator_type == TranslatorType.ANTHROPIC:
-                translated_text = translate_with_anthropic(segment['text'], source_language, target_language)
-            
+            if router is not None:
+                translated_text, used = router.translate(segment['text'], source_language, target_language)
             else:
-                raise ValueError(f"Unknown translator type: {translator_type}")
+                translated_text = translate_text(segment['text'], source_language, target_language,
+                                                 translator_type, api_key)
+                used = translator_type
             
-            # Store both original and translated text
-            segment['original_text'] = segment['text']
-            segment['text'] = translated_text
-            segment['translated_language'] = target_language
-            segment['translator_used'] = translator_type.value
+            apply_translation(segment, translated_text, target_language, used.value)
+            backends_used[used.value] = backends_used.get(used.value, 0) + 1
             
             print(f"  Translated: {translated_text[:100]}...")
             successful_translations += 1
             
-            # Delay to avoid rate limiting
-            if translator_type in [TranslatorType.GOOGLE, TranslatorType.MYMEMORY]:
-                time.sleep(0.5)
-            elif translator_type == TranslatorType.ANTHROPIC:
-                time.sleep(0.3)
+            # Delay to avoid rate limiting (the router spaces requests itself)
+            if router is None:
+                time.sleep(REQUEST_DELAYS.get(translator_type, 0))
             
         except Exception as e:
             print(f"  Error translating: {e}")
@@ -182,23 +479,271 @@ def translate_transcription(input_file, output_file, target_language,
     translated_data['translation_info'] = {
         'source_language': source_language,
         'target_language': target_language,
-        'translator': translator_type.value,
+        'translator': 'router' if router is not None else translator_type.value,
         'successful_translations': successful_translations,
         'failed_translations': failed_translations
     }
     
-    # Save translated version
+    if router is not None:
+        translated_data['translation_info']['backends_used'] = backends_used
+        router.print_stats()
+    
+    save_translation(translated_data, output_file)
+    
+    return translated_data
+
+def apply_translation(segment, translated_text, target_language, translator):
+    """Store both original and translated text on a transcription segment"""
+    segment['original_text'] = segment['text']
+    segment['text'] = translated_text
+    segment['translated_language'] = target_language
+    segment['translator_used'] = translator
+
+def save_translation(translated_data, output_file):
+    """Save translated transcription JSON and print the run summary"""
     with open(output_file, 'w', encoding='utf-8') as f:
         json.dump(translated_data, f, indent=2, ensure_ascii=False)
     
+    info = translated_data['translation_info']
     print(f"\n{'='*70}")
     print(f"Translation complete!")
-    print(f"Successful: {successful_translations}")
-    print(f"Failed: {failed_translations}")
+    print(f"Successful: {info['successful_translations']}")
+    print(f"Failed: {info['failed_translations']}")
     print(f"Saved to: {output_file}")
     print(f"{'='*70}")
+
+# Backends that translate into several target languages in one request
+MULTI_TARGET_TRANSLATORS = {
+    TranslatorType.ANTHROPIC: translate_with_anthropic_multi,
+}
+
+def translate_transcription_multi(input_file, output_file, target_languages,
+                                  source_language='en', translator_type=TranslatorType.MYMEMORY,
+                                  api_key=None, max_workers=4):
+    """
+    Translate transcription JSON into several languages in one run
     
-    return translated_data
+    The input is loaded and filtered once; every (segment, language) job goes
+    through one shared thread pool and rate limiter. Backends in
+    MULTI_TARGET_TRANSLATORS get one request per segment for all languages.
+    
+    Parameters:
+    - input_file: path to transcription JSON file
+    - output_file: output path template containing '{lang}',
+                   e.g. 'Media/transcription_translated_{lang}.json'
+    - target_languages: list of target language codes (e.g., ['ml', 'ta', 'hi', 'te'])
+    - source_language: source language code (default: 'en')
+    - translator_type: TranslatorType enum
+    - api_key: API key for DeepL or LibreTranslate (if required)
+    - max_workers: number of concurrent requests
+    
+    Returns dict of {language code: translated data}
+    """
+    if '{lang}' not in output_file:
+        raise ValueError("output_file must contain '{lang}'")
+    
+    print(f"Loading transcription from {input_file}")
+    
+    with open(input_file, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    
+    # Skip logic runs once for all languages
+    pending = [(idx, segment['text']) for idx, segment in enumerate(data['transcription'])
+               if segment['text'] not in SKIP_TEXTS]
+    
+    translated = {lang: copy.deepcopy(data) for lang in target_languages}
+    counts = {lang: {'successful': 0, 'failed': 0} for lang in target_languages}
+    
+    multi_translate = MULTI_TARGET_TRANSLATORS.get(translator_type)
+    limiter = RateLimiter(REQUEST_DELAYS.get(translator_type, 0))
+    
+    print(f"\nUsing translator: {translator_type.value}")
+    print(f"Translating from {source_language} to {', '.join(target_languages)}...")
+    print(f"Segments to translate: {len(pending)} of {len(data['transcription'])}")
+    print(f"Requests: {len(pending) if multi_translate else len(pending) * len(target_languages)} "
+          f"({max_workers} workers)")
+    
+    client = None
+    if multi_translate is not None and translator_type == TranslatorType.ANTHROPIC:
+        import anthropic
+        client = anthropic.Anthropic()
+    
+    def run_single(text, lang):
+        limiter.wait()
+        return {lang: translate_text(text, source_language, lang, translator_type, api_key)}
+    
+    def run_multi(text):
+        limiter.wait()
+        return multi_translate(text, source_language, target_languages, client=client)
+    
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {}
+        for idx, text in pending:
+            if multi_translate is not None:
+                futures[executor.submit(run_multi, text)] = (idx, target_languages)
+            else:
+                for lang in target_languages:
+                    futures[executor.submit(run_single, text, lang)] = (idx, [lang])
+        
+        for done, future in enumerate(as_completed(futures), 1):
+            idx, langs = futures[future]
+            
+            try:
+                results = future.result()
+                error = None
+            except Exception as e:
+                results = {}
+                error = str(e)
+            
+            for lang in langs:
+                segment = translated[lang]['transcription'][idx]
+                
+                if lang in results:
+                    apply_translation(segment, results[lang], lang, translator_type.value)
+                    counts[lang]['successful'] += 1
+                else:
+                    segment['translation_error'] = error or f"no translation returned for '{lang}'"
+                    counts[lang]['failed'] += 1
+            
+            if error:
+                print(f"  [{done}/{len(futures)}] Error on segment {idx + 1} ({', '.join(langs)}): {error}")
+            else:
+                print(f"  [{done}/{len(futures)}] Segment {idx + 1} ({', '.join(langs)})")
+    
+    for lang in target_languages:
+        translated[lang]['translation_info'] = {
+            'source_language': source_language,
+            'target_language': lang,
+            'translator': translator_type.value,
+            'successful_translations': counts[lang]['successful'],
+            'failed_translations': counts[lang]['failed']
+        }
+        save_translation(translated[lang], output_file.format(lang=lang))
+    
+    return translated
+
+# Message Batches API limit on requests per batch
+MAX_BATCH_REQUESTS = 100000
+
+def translate_transcriptions_batch(jobs, target_language, source_language='en',
+                                   glossary=None, poll_interval=30, client=None,
+                                   base_url=None):
+    """
+    Translate one or many transcription files through a single Claude
+    Message Batch (asynchronous, half the price of synchronous calls)
+    
+    The instruction/glossary prefix is shared by every request; when it is
+    long enough to be cached (ANTHROPIC_MIN_CACHE_TOKENS, i.e. a large
+    glossary) it is marked cacheable so the batch reads it from the prompt
+    cache instead of processing it once per segment.
+    Output JSON has the same format as translate_transcription.
+    
+    Parameters:
+    - jobs: list of (input_file, output_file) pairs
+    - target_language: target language code (e.g., 'ml' for Malayalam)
+    - source_language: source language code (default: 'en')
+    - glossary: optional dict of {source term: target term} added to the prompt
+    - poll_interval: seconds between batch status checks
+    - client: anthropic.Anthropic instance (created if None)
+    - base_url: API base URL, e.g. a local mock server (default: Anthropic API)
+    
+    Returns list of translated data dicts, one per job
+    """
+    if client is None:
+        import anthropic
+        client = anthropic.Anthropic(base_url=base_url) if base_url else anthropic.Anthropic()
+    
+    system = anthropic_system_blocks(source_language, target_language, glossary)
+    
+    # Load every file and build one request per translatable segment
+    all_data = []
+    requests = []
+    
+    for file_idx, (input_file, output_file) in enumerate(jobs):
+        print(f"Loading transcription from {input_file}")
+        with open(input_file, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        all_data.append(data)
+        
+        for seg_idx, segment in enumerate(data['transcription']):
+            if segment['text'] in SKIP_TEXTS:
+                continue
+            
+            requests.append({
+                "custom_id": f"f{file_idx}-s{seg_idx}",
+                "params": {
+                    "model": ANTHROPIC_MODEL,
+                    "max_tokens": 1000,
+                    "system": system,
+                    "messages": [{"role": "user", "content": segment['text']}]
+                }
+            })
+    
+    print(f"\nUsing translator: {TranslatorType.ANTHROPIC.value} (message batch)")
+    print(f"Translating from {source_language} to {target_language}...")
+    print(f"Files: {len(jobs)}, segments to translate: {len(requests)}")
+    
+    # Submit in chunks that fit the batch limit, then poll each until it ends
+    results = {}
+    
+    for chunk_start in range(0, len(requests), MAX_BATCH_REQUESTS):
+        chunk = requests[chunk_start:chunk_start + MAX_BATCH_REQUESTS]
+        batch = client.messages.batches.create(requests=chunk)
+        print(f"\nSubmitted batch {batch.id} ({len(chunk)} requests)")
+        
+        while batch.processing_status != "ended":
+            time.sleep(poll_interval)
+            batch = client.messages.batches.retrieve(batch.id)
+            counts = batch.request_counts
+            print(f"  {batch.id}: {batch.processing_status} "
+                  f"(processing: {counts.processing}, succeeded: {counts.succeeded}, "
+                  f"errored: {counts.errored})")
+        
+        for entry in client.messages.batches.results(batch.id):
+            results[entry.custom_id] = entry.result
+    
+    # Write results back into the original segments
+    translated_files = []
+    
+    for file_idx, (input_file, output_file) in enumerate(jobs):
+        translated_data = all_data[file_idx].copy()
+        successful_translations = 0
+        failed_translations = 0
+        
+        for seg_idx, segment in enumerate(translated_data['transcription']):
+            if segment['text'] in SKIP_TEXTS:
+                continue
+            
+            result = results.get(f"f{file_idx}-s{seg_idx}")
+            
+            if result is not None and result.type == "succeeded":
+                translated_text = result.message.content[0].text.strip()
+                apply_translation(segment, translated_text, target_language,
+                                  TranslatorType.ANTHROPIC.value)
+                successful_translations += 1
+            else:
+                if result is None:
+                    error = "missing from batch results"
+                elif result.type == "errored":
+                    error = str(result.error)
+                else:
+                    error = f"request {result.type}"
+                print(f"  Error translating segment {segment.get('segment', seg_idx + 1)}: {error}")
+                segment['translation_error'] = error
+                failed_translations += 1
+        
+        translated_data['translation_info'] = {
+            'source_language': source_language,
+            'target_language': target_language,
+            'translator': TranslatorType.ANTHROPIC.value,
+            'successful_translations': successful_translations,
+            'failed_translations': failed_translations
+        }
+        
+        save_translation(translated_data, output_file)
+        translated_files.append(translated_data)
+    
+    return translated_files
 
 def export_translated_srt(translated_data, output_file):
     """Export translated transcription to SRT subtitle format"""
@@ -16,8 +16,8 @@ def main():
     # Example 1: Get media info
     seperator.print_media_info(input_video)
     
-    # Example 2: Extract audio only
-    audio = seperator.extract_audio(input_video, "Media/extracted_audio.wav")
+    # Example 2: Extract audio only (16 kHz mono, ready for Whisper)
+    audio = seperator.extract_audio(input_video, "Media/extracted_audio.npy", preset='whisper')
     
     # Example 3: Extract video without audio
     # video = extract_video_no_audio(input_video, "video_only.mp4")
@@ -29,13 +29,15 @@ def main():
     # all_streams = separate_all_streams(input_video)
     
     # Example 6: Combine video with new audio (for dubbing)
-    # combined = combine_video_audio(
-    #     video_file="video_only.mp4",
-    #     audio_file="malayalam_synced.mp3",
-    #     output_file="dubbed_video.mp4"
+    # The original video is used directly (no video-only file needed); streams
+    # the output container can hold are copied instead of re-encoded
+    # combined = seperator.combine_video_audio(
+    #     video_file=input_video,
+    #     audio_file="Media/malayalam_perfect_sync.mp3",
+    #     output_file="Media/dubbed_video.mp4"
     # )
     # Replace with your audio file path
-    audio_file = "Media/extracted_audio.wav"
+    audio_file = "Media/extracted_audio.npy"
     
     # Transcribe with Whisper
     # Model sizes: "tiny", "base", "small", "medium", "large"
@@ -104,6 +106,16 @@ def main():
         api_key=api_key
     )
     
+    # Or translate into several languages in one run (one output file per language)
+    # translated_by_lang = translate.translate_transcription_multi(
+    #     input_file=input_file,
+    #     output_file="Media/transcription_translated_{lang}.json",
+    #     target_languages=['ml', 'ta', 'hi', 'te'],
+    #     source_language='en',
+    #     translator_type=translator,
+    #     api_key=api_key
+    # )
+    
     # Print summary
     translate.print_translation_summary(translated_data)
     
@@ -164,9 +176,20 @@ def main():
         language='ml',
         tts_engine='gtts',
         max_speedup=1.5,  # Allow up to 50% speedup
-        use_original=False  # Use translated text
+        use_original=False,  # Use translated text
+        fallback_engines=['edge']  # Used for clips gTTS fails on after retries
     )    
 
+    # Pass incremental=True above to keep a manifest and PCM sidecar; after editing
+    # the translation JSON only the changed segments are re-synthesized and re-encoded:
+    # from TTS import redub
+    # redub.redub_changed_segments(json_file, "Media/malayalam_perfect_sync.mp3", language='ml')
+
+    # Or render the dubbed video directly from the TTS clips in one ffmpeg run
+    # (single audio encode, video stream copied from the source)
+    # clips = tts.plan_dub_clips(json_file, language='ml', tts_engine='gtts', max_speedup=1.5)
+    # seperator.render_dubbed_video(input_video, clips, "Media/dubbed_video.mp4")
+
     # Option 2: Original English TTS with pauses
     # print("\n" + "=" * 70)
     # print("Creating English TTS with pauses...")